@@ -4,7 +4,8 @@ from sqlalchemy import pool
 from alembic import context
 from app.config import settings
 from app.database import Base
-from app.models import User, AlumniProfile, Post
+from app.models import User, AlumniProfile, Post, NewsletterSubscriber
+from app.search import SEARCH_TABLES
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -27,6 +28,12 @@ target_metadata = Base.metadata
 def get_url():
     return settings.DATABASE_URL
 
+def include_object(object, name, type_, reflected, compare_to):
+    # The search tables (and SQLite's FTS5 shadow tables) are managed by app.search
+    if type_ == "table" and name.startswith(SEARCH_TABLES):
+        return False
+    return True
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -43,6 +50,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -68,7 +76,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
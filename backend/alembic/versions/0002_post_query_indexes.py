@@ -0,0 +1,37 @@
+"""composite indexes for post feed, moderation queue and my-posts
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 23:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # posts is a hot table, so build the indexes without blocking writes on Postgres.
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_posts_status_created_at_id', 'posts', ['status', 'created_at', 'id'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_posts_author_id_created_at_id', 'posts', ['author_id', 'created_at', 'id'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_posts_author_id_created_at_id', table_name='posts', postgresql_concurrently=True)
+        op.drop_index('ix_posts_status_created_at_id', table_name='posts', postgresql_concurrently=True)
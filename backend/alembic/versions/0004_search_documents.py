@@ -0,0 +1,31 @@
+"""full-text search documents (tsvector + GIN on Postgres, FTS5 on SQLite)
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from app.search import POSTGRES_DDL, SQLITE_DDL, rebuild_search_index
+
+    bind = op.get_bind()
+    statements = POSTGRES_DDL if bind.dialect.name == 'postgresql' else SQLITE_DDL
+    for statement in statements:
+        op.execute(statement)
+    rebuild_search_index(bind)
+
+
+def downgrade() -> None:
+    op.execute('DROP TABLE IF EXISTS search_documents')
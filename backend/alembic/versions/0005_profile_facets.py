@@ -0,0 +1,48 @@
+"""alumni directory filter indexes and precomputed facet counts
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from app.facets import rebuild_profile_facets
+
+    op.create_table(
+        'profile_facet_counts',
+        sa.Column('facet', sa.String(), nullable=False),
+        sa.Column('value', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('facet', 'value')
+    )
+    rebuild_profile_facets(op.get_bind())
+
+    with op.get_context().autocommit_block():
+        for column in ('graduation_year', 'major', 'company'):
+            op.create_index(
+                f'ix_alumni_profiles_{column}_id', 'alumni_profiles', [column, 'id'],
+                unique=False, postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in ('company', 'major', 'graduation_year'):
+            op.drop_index(
+                f'ix_alumni_profiles_{column}_id', table_name='alumni_profiles',
+                postgresql_concurrently=True
+            )
+    op.drop_table('profile_facet_counts')
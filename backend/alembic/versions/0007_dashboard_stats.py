@@ -0,0 +1,42 @@
+"""admin dashboard counters and daily rollups
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 02:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    from app.counters import rebuild_stats
+
+    op.create_table(
+        'stat_counters',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('value', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table(
+        'daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('metric', sa.String(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'metric')
+    )
+    rebuild_stats(op.get_bind())
+
+
+def downgrade() -> None:
+    op.drop_table('daily_stats')
+    op.drop_table('stat_counters')
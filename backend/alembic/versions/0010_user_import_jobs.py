@@ -0,0 +1,37 @@
+"""user import jobs
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 07:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_import_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('RUNNING', 'DONE', 'FAILED', name='userimportjobstatus'), nullable=False),
+    sa.Column('report', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_user_import_jobs_id'), 'user_import_jobs', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_user_import_jobs_id'), table_name='user_import_jobs')
+    op.drop_table('user_import_jobs')
+    sa.Enum(name='userimportjobstatus').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,27 @@
+"""index profile facet counts by facet and count
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18 08:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_profile_facet_counts_facet_count', 'profile_facet_counts', ['facet', 'count'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_profile_facet_counts_facet_count', table_name='profile_facet_counts')
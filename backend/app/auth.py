@@ -1,16 +1,39 @@
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
 from app.database import get_db
 from app.models import User, UserRole
+from app.cache import create_cache_backend
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
+principal_cache = create_cache_backend(settings.AUTH_CACHE_MAX_ENTRIES)
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller: just what authorization checks need, cacheable without a DB row"""
+    id: int
+    email: str
+    role: UserRole
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, role=user.role, is_active=user.is_active)
+
+def _principal_key(subject: str) -> str:
+    return f"principal:{subject}"
+
+async def invalidate_principal(subject: str):
+    """Drop a cached principal; call after changing a user's role or active flag"""
+    await principal_cache.delete(_principal_key(subject))
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -28,38 +51,59 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def token_subject(token: str) -> Optional[str]:
+    """The subject (email) of a valid access token, None if it is invalid or expired"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+async def load_principal(email: str, db: AsyncSession) -> Optional[Principal]:
+    """The principal for a token subject, from the cache or the users table"""
+    cached = await principal_cache.get(_principal_key(email))
+    if cached is not None:
+        return Principal(**{**cached, "role": UserRole(cached["role"])})
+    
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
+    if user is None:
+        return None
+    principal = Principal.from_user(user)
+    await principal_cache.set(
+        _principal_key(email),
+        {**asdict(principal), "role": principal.role.value},
+        settings.AUTH_CACHE_TTL_SECONDS,
+    )
+    return principal
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+    email = token_subject(token)
+    if email is None:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    principal = await load_principal(email, db)
+    if principal is None:
         raise credentials_exception
-    return user
+    return principal
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 async def get_current_admin(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: Principal = Depends(get_current_active_user)
+) -> Principal:
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -67,3 +111,12 @@ async def get_current_admin(
         )
     return current_user
 
+async def get_streaming_admin(
+    token: str = Depends(oauth2_scheme),
+    # Closed when the endpoint returns, so a long-lived stream doesn't hold a pooled connection
+    db: AsyncSession = Depends(get_db, scope="function")
+) -> Principal:
+    """get_current_admin for endpoints that return a long-lived stream"""
+    principal = await get_current_user(token, db)
+    return await get_current_admin(await get_current_active_user(principal))
+
@@ -0,0 +1,80 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from app.config import settings
+
+class CacheBackend:
+    """Async key/value cache with per-entry TTL. Values must be JSON-serializable."""
+
+    async def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    async def delete(self, *keys: str):
+        raise NotImplementedError
+
+class MemoryCache(CacheBackend):
+    """
+    Per-process TTL + LRU cache. Also serves as the in-process stand-in for
+    the shared backend in tests: hand the same instance to several apps to
+    simulate workers sharing one cache.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+class RedisCache(CacheBackend):
+    """Cache shared by every worker through Redis (requires the `redis` package)"""
+
+    def __init__(self, url: str, prefix: str = "alumni:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_URL is set but the 'redis' package is not installed")
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self._client.set(self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._client.delete(*(self.prefix + key for key in keys))
+
+def create_cache_backend(max_entries: int = 10000) -> CacheBackend:
+    """Shared Redis cache when CACHE_URL is configured, otherwise per-process memory"""
+    if settings.CACHE_URL:
+        return RedisCache(settings.CACHE_URL)
+    return MemoryCache(max_entries)
@@ -0,0 +1,108 @@
+"""
+Response compression, negotiated from Accept-Encoding.
+
+COMPRESSION_ENCODINGS lists what the server offers, most preferred first
+("br,gzip"); each response uses the first one the client accepts (q > 0).
+Bodies under COMPRESSION_MINIMUM_SIZE bytes, already-encoded responses and
+binary/streaming types (images, event streams...) are sent as they are.
+Streaming responses (the exports) are compressed chunk by chunk.
+
+Built on Starlette's GZip responders; brotli needs `pip install brotli`.
+"""
+from typing import Optional
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipResponder, IdentityResponder
+from app.config import settings
+
+SUPPORTED_ENCODINGS = ("br", "gzip")
+
+def _load_brotli():
+    try:
+        import brotli
+    except ImportError as exc:
+        raise RuntimeError("COMPRESSION_ENCODINGS includes br but the brotli package is not installed") from exc
+    return brotli
+
+def configured_encodings() -> tuple[str, ...]:
+    """COMPRESSION_ENCODINGS, checked, so a bad value fails at startup rather than on the first request"""
+    encodings = tuple(
+        encoding.strip().lower() for encoding in settings.COMPRESSION_ENCODINGS.split(",") if encoding.strip()
+    )
+    unknown = [encoding for encoding in encodings if encoding not in SUPPORTED_ENCODINGS]
+    if unknown:
+        raise RuntimeError(f"Unsupported COMPRESSION_ENCODINGS: {', '.join(unknown)}")
+    if "br" in encodings:
+        _load_brotli()
+    return encodings
+
+def accepted_encodings(header: str) -> dict[str, float]:
+    """Accept-Encoding as {coding: q}"""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+def negotiate(header: str, offered: tuple[str, ...]) -> Optional[str]:
+    """The first offered encoding the client accepts, or None for identity"""
+    if not header:
+        return None
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    for encoding in offered:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app, minimum_size: int, quality: int, *, exclude_content_types: tuple[str, ...]):
+        super().__init__(app, minimum_size, exclude_content_types=exclude_content_types)
+        self.quality = quality
+        self._compressor = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = _load_brotli().Compressor(quality=self.quality)
+        if more_body:
+            return self._compressor.process(body) + self._compressor.flush()
+        return self._compressor.process(body) + self._compressor.finish()
+
+class CompressionMiddleware:
+    def __init__(self, app, encodings: tuple[str, ...]):
+        self.app = app
+        self.encodings = encodings
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE
+        self.exclude_content_types = DEFAULT_EXCLUDED_CONTENT_TYPES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding == "br":
+            responder = BrotliResponder(
+                self.app, self.minimum_size, settings.COMPRESSION_BROTLI_QUALITY,
+                exclude_content_types=self.exclude_content_types,
+            )
+        elif encoding == "gzip":
+            responder = GZipResponder(
+                self.app, self.minimum_size, settings.COMPRESSION_GZIP_LEVEL,
+                exclude_content_types=self.exclude_content_types,
+            )
+        else:
+            # Still adds "Vary: Accept-Encoding" to responses that could have been compressed
+            responder = IdentityResponder(self.app, self.minimum_size, exclude_content_types=self.exclude_content_types)
+        await responder(scope, receive, send)
@@ -1,16 +1,122 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Create missing tables at startup instead of running Alembic (throwaway/dev databases only)
+    CREATE_SCHEMA_ON_STARTUP: bool = False
+    # Connection pool, per engine and per process (QueuePool)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    # Seconds before a connection is replaced; -1 keeps connections forever
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Comma-separated read replica URLs; read-only endpoints are spread across them
+    DATABASE_REPLICA_URLS: str = ""
+    # After a user's write, their reads stay on the primary this long (0 disables)
+    READ_AFTER_WRITE_SECONDS: float = 5
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # bcrypt cost factor for new hashes; existing hashes keep the cost they were made with
+    BCRYPT_ROUNDS: int = 12
+    # Password hashing pool ("thread" or "process")
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_RETRY_AFTER: int = 1
+
+    # Shared cache (redis://...). Unset means a per-process in-memory cache.
+    CACHE_URL: Optional[str] = None
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    # Public approved-posts feed; 0 disables the response cache
+    FEED_CACHE_TTL_SECONDS: int = 30
+    # Token buckets on login/register/subscribe, per client IP and per email, as "<requests>/<period>"
+    # with period a number of seconds or second/minute/hour/day; empty turns that one off.
+    # Shared across workers when CACHE_URL is set; otherwise up to RATE_LIMIT_MAX_KEYS per process.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN_PER_IP: str = "30/minute"
+    RATE_LIMIT_LOGIN_PER_ACCOUNT: str = "10/minute"
+    RATE_LIMIT_REGISTER_PER_IP: str = "10/hour"
+    RATE_LIMIT_REGISTER_PER_ACCOUNT: str = "5/hour"
+    RATE_LIMIT_SUBSCRIBE_PER_IP: str = "20/hour"
+    RATE_LIMIT_SUBSCRIBE_PER_ACCOUNT: str = "5/hour"
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    # Moderation event stream (/api/admin/posts/events): keep-alive interval, and how many events
+    # a subscriber may fall behind before it is cut off (its client reconnects)
+    EVENTS_HEARTBEAT_SECONDS: float = 15
+    EVENTS_SUBSCRIBER_QUEUE: int = 100
+    # Response compression, most preferred first ("br" needs the brotli package); empty disables it.
+    # Smaller bodies are sent uncompressed.
+    COMPRESSION_ENCODINGS: str = "gzip"
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    # Profile pictures: content-addressed files under MEDIA_ROOT, served from /api/media.
+    # Uploads larger than MEDIA_MAX_UPLOAD_BYTES or MEDIA_MAX_PIXELS decoded pixels are refused.
+    MEDIA_ROOT: str = "media"
+    MEDIA_MAX_UPLOAD_BYTES: int = 5 * 1024 * 1024
+    MEDIA_MAX_PIXELS: int = 40_000_000
+    # Square WebP thumbnails, edge in pixels, made by THUMBNAIL_WORKERS processes; uploads
+    # are refused with a 503 once THUMBNAIL_MAX_QUEUE jobs are waiting
+    THUMBNAIL_SIZES: str = "96,320"
+    THUMBNAIL_WORKERS: int = 2
+    THUMBNAIL_MAX_QUEUE: int = 32
+    # Rows fetched per server-side cursor batch by the streaming exports
+    EXPORT_BATCH_SIZE: int = 1000
+    # Prometheus-style /metrics, served only when METRICS_TOKEN is set; scrapes need
+    # "Authorization: Bearer <token>"
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+    # Request profiling (off unless enabled): admins opt in per request with "X-Profile: 1",
+    # and this fraction of all requests is sampled. Profiles kept per process:
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_BUFFER_SIZE: int = 50
+
+    # Newsletter dispatch worker (scripts/newsletter_worker.py)
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 25
+    SMTP_USERNAME: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_STARTTLS: bool = False
+    NEWSLETTER_FROM: str = "newsletter@alumni.local"
+    NEWSLETTER_BATCH_SIZE: int = 100
+    NEWSLETTER_SMTP_CONNECTIONS: int = 4
+    # Messages per second across all connections; 0 means unthrottled
+    NEWSLETTER_SEND_RATE: float = 20
+    NEWSLETTER_MAX_ATTEMPTS: int = 3
+    # Wait before retrying a temporary failure, doubled for each further attempt
+    NEWSLETTER_RETRY_DELAY_SECONDS: float = 60
+    # Recipients claimed by a worker that died this long ago are given up on
+    NEWSLETTER_CLAIM_TIMEOUT_SECONDS: int = 600
+    NEWSLETTER_POLL_SECONDS: float = 5
+
+    # Bulk user import: rows per transaction (capped below Postgres's bind parameter limit),
+    # and for imports uploaded to the API, processes hashing passwords and imports running at
+    # once per worker. The import script hashes on every CPU instead.
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_HASH_WORKERS: int = 2
+    IMPORT_MAX_RUNNING: int = 1
     
     class Config:
         env_file = ".env"
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Read from the environment and .env on first use rather than at import"""
+    return Settings()
+
+def __getattr__(name: str):
+    # `from app.config import settings` still works; it just builds Settings at that point
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 
 
@@ -0,0 +1,122 @@
+"""
+Running totals and daily growth for the admin dashboard.
+
+stat_counters holds one row per total (users, active users, posts by status,
+active subscribers) and daily_stats one row per (UTC day, metric) for
+signups, posts, subscriptions and unsubscriptions. The write paths adjust
+them with atomic upserts inside their own transaction, as facets.py does for
+the directory facets, so /api/admin/stats reads a few rows however large the
+tables get.
+"""
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Mapping, Optional
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import DailyStat, PostStatus, StatCounter
+
+USERS = "users"
+ACTIVE_USERS = "active_users"
+ACTIVE_SUBSCRIBERS = "active_subscribers"
+DAILY_METRICS = ("signups", "posts", "subscriptions", "unsubscriptions")
+
+def posts_counter(post_status: PostStatus) -> str:
+    return f"posts_{post_status.value}"
+
+def post_status_changes(old_statuses: Iterable[PostStatus], new_status: Optional[PostStatus]) -> dict[str, int]:
+    """Counter deltas for posts moving from their old statuses to new_status (None: deleted)"""
+    deltas = Counter()
+    for old_status in old_statuses:
+        if old_status == new_status:
+            continue
+        deltas[posts_counter(old_status)] -= 1
+        if new_status is not None:
+            deltas[posts_counter(new_status)] += 1
+    return deltas
+
+def today() -> date:
+    return datetime.now(timezone.utc).date()
+
+def _statements(dialect: str, counters: Mapping[str, int], daily: Mapping[str, int]):
+    dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    for name, delta in counters.items():
+        if delta:
+            statement = dialect_insert(StatCounter).values(name=name, value=delta)
+            yield statement.on_conflict_do_update(
+                index_elements=[StatCounter.name], set_={"value": StatCounter.value + delta}
+            )
+    day = today()
+    for metric, delta in daily.items():
+        if delta:
+            statement = dialect_insert(DailyStat).values(day=day, metric=metric, count=delta)
+            yield statement.on_conflict_do_update(
+                index_elements=[DailyStat.day, DailyStat.metric], set_={"count": DailyStat.count + delta}
+            )
+
+async def apply_stat_changes(db: AsyncSession, counters: Mapping[str, int], daily: Mapping[str, int] = {}):
+    """Add to the totals and to today's growth, in the caller's transaction"""
+    for statement in _statements(db.bind.dialect.name, counters, daily):
+        await db.execute(statement)
+
+def apply_stat_changes_sync(db, counters: Mapping[str, int], daily: Mapping[str, int] = {}):
+    """apply_stat_changes for a sync Session (scripts)"""
+    for statement in _statements(db.bind.dialect.name, counters, daily):
+        db.execute(statement)
+
+async def load_stats(db: AsyncSession, days: int) -> dict:
+    """Totals and the last `days` days of growth, oldest first, with empty days as zeros"""
+    totals = dict((await db.execute(select(StatCounter.name, StatCounter.value))).all())
+    first_day = today() - timedelta(days=days - 1)
+    result = await db.execute(
+        select(DailyStat.day, DailyStat.metric, DailyStat.count).where(DailyStat.day >= first_day)
+    )
+    series = {
+        first_day + timedelta(days=offset): {"day": first_day + timedelta(days=offset), **dict.fromkeys(DAILY_METRICS, 0)}
+        for offset in range(days)
+    }
+    for day, metric, count in result:
+        if day in series and metric in DAILY_METRICS:
+            series[day][metric] = count
+    return {
+        "users": totals.get(USERS, 0),
+        "active_users": totals.get(ACTIVE_USERS, 0),
+        "posts": {post_status.value: totals.get(posts_counter(post_status), 0) for post_status in PostStatus},
+        "active_subscribers": totals.get(ACTIVE_SUBSCRIBERS, 0),
+        "daily": list(series.values()),
+    }
+
+def rebuild_stats(connection):
+    """
+    Recount everything from the source tables (sync connection). Days come
+    from created_at / subscribed_at, so the daily history keeps only the rows
+    still there: deleted posts, reactivations and unsubscriptions drop out.
+    """
+    if connection.dialect.name == "postgresql":
+        day_of = "CAST({} AT TIME ZONE 'UTC' AS DATE)".format
+    else:
+        day_of = "DATE({})".format
+    connection.execute(text("DELETE FROM stat_counters"))
+    connection.execute(text("DELETE FROM daily_stats"))
+    connection.execute(text(
+        f"INSERT INTO stat_counters (name, value)"
+        f" SELECT '{USERS}', COUNT(*) FROM users"
+        f" UNION ALL SELECT '{ACTIVE_USERS}', COUNT(*) FROM users WHERE is_active"
+        f" UNION ALL SELECT '{ACTIVE_SUBSCRIBERS}', COUNT(*) FROM newsletter_subscribers WHERE is_active"
+    ))
+    for post_status in PostStatus:
+        # Enum columns store the member name
+        connection.execute(
+            text("INSERT INTO stat_counters (name, value) SELECT :name, COUNT(*) FROM posts WHERE status = :status"),
+            {"name": posts_counter(post_status), "status": post_status.name},
+        )
+    for metric, table, column in (
+        ("signups", "users", "created_at"),
+        ("posts", "posts", "created_at"),
+        ("subscriptions", "newsletter_subscribers", "subscribed_at"),
+    ):
+        connection.execute(text(
+            f"INSERT INTO daily_stats (day, metric, count)"
+            f" SELECT {day_of(column)}, '{metric}', COUNT(*) FROM {table}"
+            f" WHERE {column} IS NOT NULL GROUP BY {day_of(column)}"
+        ))
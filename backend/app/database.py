@@ -1,24 +1,116 @@
-from sqlalchemy import create_engine
+import threading
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from app.config import settings
+from app.config import get_settings
+from app.db_pool import PoolMetrics, pool_options
 
-# SQLite requires check_same_thread=False
-connect_args = {}
-if settings.DATABASE_URL.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
-
-engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def get_async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its async driver (asyncpg / aiosqlite)"""
+    scheme, sep, rest = url.partition("://")
+    dialect = scheme.split("+", 1)[0]
+    if dialect in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Checkout wait, in-use and overflow counters per engine, served by /api/admin/metrics/db-pool.
+# Each is attached when its engine is created.
+pool_metrics = {"async": PoolMetrics("async"), "sync": PoolMetrics("sync")}
+
+# The engines and session factories below are created on first use, not at
+# import: importing the models (Alembic, scripts) neither reads settings nor
+# loads a driver, and the web app never builds the sync engine it doesn't use.
+# `from app.database import engine` still works; inside the app, read them as
+# `database.AsyncSessionLocal` at call time so the import stays cheap.
+_create_lock = threading.Lock()
+
+def _create_sync_engine():
+    global engine, SessionLocal
+    url = get_settings().DATABASE_URL
+    # SQLite requires check_same_thread=False
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    # Sync engine: used by scripts and Alembic
+    engine = create_engine(url, connect_args=connect_args, **pool_options(url))
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    pool_metrics["sync"].attach(engine)
+
+def _create_async_engines():
+    global async_engine, AsyncSessionLocal, replica_urls, replica_engines, ReplicaSessionLocals
+    settings = get_settings()
+    # Async engine: used by the request handlers so queries never block the event loop
+    async_engine = create_async_engine(
+        get_async_database_url(settings.DATABASE_URL),
+        **pool_options(settings.DATABASE_URL, asynchronous=True),
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    pool_metrics["async"].attach(async_engine.sync_engine)
+
+    # Read replicas: async only, handed out by app.db_routing.get_read_db
+    replica_urls = [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+    replica_engines = [
+        create_async_engine(get_async_database_url(url), **pool_options(url, asynchronous=True))
+        for url in replica_urls
+    ]
+    ReplicaSessionLocals = [
+        async_sessionmaker(bind=replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+        for replica_engine in replica_engines
+    ]
+    for number, replica_engine in enumerate(replica_engines, start=1):
+        pool_metrics[f"replica{number}"] = PoolMetrics(f"replica{number}")
+        pool_metrics[f"replica{number}"].attach(replica_engine.sync_engine)
 
+_LAZY = {
+    "engine": _create_sync_engine,
+    "SessionLocal": _create_sync_engine,
+    "async_engine": _create_async_engines,
+    "AsyncSessionLocal": _create_async_engines,
+    "replica_urls": _create_async_engines,
+    "replica_engines": _create_async_engines,
+    "ReplicaSessionLocals": _create_async_engines,
+}
 
+def _lazy(name: str):
+    value = globals().get(name)
+    if value is None:
+        with _create_lock:
+            if name not in globals():
+                _LAZY[name]()
+        value = globals()[name]
+    return value
 
+def __getattr__(name: str):
+    if name in _LAZY:
+        return _lazy(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def create_schema(bind):
+    """Create missing tables, search tables included. For development and scripts; deployments use Alembic."""
+    from app import models, search  # registers every table and the search DDL
+    Base.metadata.create_all(bind=bind)
+
+async def dispose_engines():
+    """Close the pooled connections of whichever engines were created"""
+    if "async_engine" in globals():
+        for each in (async_engine, *replica_engines):
+            await each.dispose()
+    if "engine" in globals():
+        engine.dispose()
+
+async def check_connection():
+    """One round trip to the primary; raises if it can't be reached"""
+    async with _lazy("async_engine").connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+async def get_db():
+    async with _lazy("AsyncSessionLocal")() as db:
+        yield db
@@ -0,0 +1,140 @@
+"""
+Connection pool configuration and telemetry for the SQLAlchemy engines.
+
+Both engines get the DB_POOL_* settings, on a QueuePool subclass whose
+connect() is timed: the wait covers time blocked on a full pool, opening a
+connection when a new one is needed and the pre-ping, so a rising checkout
+wait or timeout count means the pool is too small for the traffic (or
+connections are being held too long). Every checkout goes through
+Pool.connect(), whether it comes from engine.connect(), engine.begin(), a
+Session or the async engine. Pool events count connects, overflow
+connections (opened past pool_size) and invalidations, e.g. pre-ping finding
+a dead connection. Only public pool API is used (poolclass, connect(),
+recreate(), events, size(), checkedout(), overflow()), so SQLAlchemy upgrades
+can't quietly break the numbers.
+"""
+import time
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+from app.config import get_settings
+from app.stats import LatencyStats
+
+class TimedPool:
+    """Reports how long each checkout took to the PoolMetrics attached to it"""
+
+    metrics: Optional["PoolMetrics"] = None
+
+    def connect(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_wait(time.perf_counter() - started, timed_out)
+
+    def recreate(self):
+        # engine.dispose() swaps in the pool made here; keep reporting to the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class TimedQueuePool(TimedPool, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(TimedPool, AsyncAdaptedQueuePool):
+    pass
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.engine: Optional[Engine] = None
+        # DBAPI connections open right now, checked out or idle
+        self.open_connections = 0
+        self.reset()
+
+    @property
+    def pool(self) -> Optional[Pool]:
+        # Read through the engine: dispose() replaces its pool (the listeners carry over)
+        return self.engine.pool if self.engine is not None else None
+
+    def reset(self):
+        self.checkout_wait = LatencyStats()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.overflow_connects = 0
+        self.invalidations = 0
+        self.peak_in_use = 0
+
+    def attach(self, engine: Engine):
+        if not isinstance(engine.pool, TimedPool):
+            return
+        self.engine = engine
+        engine.pool.metrics = self
+
+        @event.listens_for(engine, "connect")
+        def on_connect(dbapi_connection, record):
+            self.connects += 1
+            self.open_connections += 1
+            if self.open_connections > self.pool.size():
+                self.overflow_connects += 1
+
+        @event.listens_for(engine, "close")
+        def on_close(dbapi_connection, record):
+            # Overflow connections are closed at checkin, the rest on dispose, recycle or invalidation
+            self.open_connections -= 1
+
+        @event.listens_for(engine, "checkout")
+        def on_checkout(dbapi_connection, record, proxy):
+            self.checkouts += 1
+            self.peak_in_use = max(self.peak_in_use, self.pool.checkedout())
+
+        @event.listens_for(engine, "invalidate")
+        def on_invalidate(dbapi_connection, record, exception):
+            self.invalidations += 1
+
+    def observe_wait(self, seconds: float, timed_out: bool):
+        self.checkout_wait.observe(seconds)
+        if timed_out:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        pool = self.pool
+        return {
+            "pool_size": pool.size(),
+            # Every pool is built by pool_options() below
+            "max_overflow": get_settings().DB_MAX_OVERFLOW,
+            "timeout_seconds": pool.timeout(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),
+            "peak_in_use": self.peak_in_use,
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "overflow_connects": self.overflow_connects,
+            "invalidations": self.invalidations,
+            "checkout_wait": self.checkout_wait.snapshot(),
+        }
+
+def pool_options(url: str, asynchronous: bool = False) -> dict:
+    """create_engine() keyword arguments for the configured pool"""
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        # In-memory SQLite is one connection per thread/process; nothing to size
+        return {}
+    settings = get_settings()
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool if asynchronous else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
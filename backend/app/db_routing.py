@@ -0,0 +1,89 @@
+"""
+Read-replica routing.
+
+With DATABASE_REPLICA_URLS set, read-only endpoints take their session from
+get_read_db, which hands them out round-robin across the replicas; everything
+using get_db stays on the primary.
+
+Replicas lag behind the primary, so someone who just wrote could read their
+own change back as missing. ReadAfterWriteMiddleware marks the caller's token
+subject after every successful write request, and for READ_AFTER_WRITE_SECONDS
+that caller's reads go to the primary instead. Marks live in the shared cache
+(CACHE_URL) so they hold across workers. Anonymous callers cannot write, so
+their reads always go to a replica.
+"""
+import itertools
+from typing import Optional
+from fastapi import Request
+from fastapi.security.utils import get_authorization_scheme_param
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.datastructures import Headers
+from app.auth import token_subject
+from app.cache import create_cache_backend
+from app.config import settings
+from app import database
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_replicas = None
+recent_writers = create_cache_backend(settings.AUTH_CACHE_MAX_ENTRIES)
+
+def _recent_writer_key(subject: str) -> str:
+    return f"recent-write:{subject}"
+
+def _sticky_enabled() -> bool:
+    return bool(database.ReplicaSessionLocals) and settings.READ_AFTER_WRITE_SECONDS > 0
+
+def _next_replica() -> async_sessionmaker:
+    global _replicas
+    if _replicas is None:
+        _replicas = itertools.cycle(database.ReplicaSessionLocals)
+    return next(_replicas)
+
+def _bearer_subject(headers: Headers) -> Optional[str]:
+    scheme, token = get_authorization_scheme_param(headers.get("authorization"))
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token_subject(token)
+
+async def mark_recent_write(subject: str):
+    """Keep this subject's reads on the primary for READ_AFTER_WRITE_SECONDS"""
+    await recent_writers.set(_recent_writer_key(subject), 1, settings.READ_AFTER_WRITE_SECONDS)
+
+async def read_session_factory(request: Request) -> async_sessionmaker:
+    if not database.ReplicaSessionLocals:
+        return database.AsyncSessionLocal
+    if _sticky_enabled():
+        subject = _bearer_subject(request.headers)
+        if subject is not None and await recent_writers.get(_recent_writer_key(subject)) is not None:
+            return database.AsyncSessionLocal
+    return _next_replica()
+
+async def get_read_db(request: Request):
+    """Session for read-only endpoints: a replica, or the primary right after the caller wrote"""
+    session_factory = await read_session_factory(request)
+    async with session_factory() as db:
+        yield db
+
+class ReadAfterWriteMiddleware:
+    """Marks the caller as a recent writer once a write request has succeeded"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or not _sticky_enabled():
+            await self.app(scope, receive, send)
+            return
+        subject = _bearer_subject(Headers(scope=scope))
+        if subject is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_marking(message):
+            # The handler has committed by the time its response starts
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                await mark_recent_write(subject)
+            await send(message)
+
+        await self.app(scope, receive, send_marking)
@@ -0,0 +1,68 @@
+"""
+Weak ETags for list and detail responses.
+
+A page's ETag is derived from a "stamp": the row count, the sum/min/max of
+the row ids and the newest updated_at (falling back to created_at) of each
+table the response embeds. Any insert, delete or ORM update on those rows
+changes the stamp. The same stamp can be computed either from rows already
+loaded, or with one aggregate query over just the page's keys, so a
+revalidation that ends in 304 never fetches or serializes the full rows.
+"""
+import hashlib
+from typing import Optional
+from fastapi import Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Clients re-check with If-None-Match on every use; an unchanged page then costs a 304
+PUBLIC_REVALIDATE = "no-cache"
+PRIVATE_REVALIDATE = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison against If-None-Match, as required for GET"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == wanted for candidate in header.split(","))
+
+def not_modified(etag: str, cache_control: str = PUBLIC_REVALIDATE) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+def stamp_from_rows(rows: list, *stamp_getters) -> tuple:
+    """Stamp of already-loaded rows; each getter returns one embedded table's timestamp"""
+    if not rows:
+        return (0, None, None, None) + (None,) * len(stamp_getters)
+    ids = [row.id for row in rows]
+    return (len(ids), sum(ids), min(ids), max(ids)) + tuple(
+        max(getter(row) for row in rows) for getter in stamp_getters
+    )
+
+async def stamp_from_query(db: AsyncSession, keys_query) -> tuple:
+    """
+    Stamp of a page computed in the database. `keys_query` selects the
+    page's rows as (id, stamp, ...) with the endpoint's filter, order and limit.
+    """
+    page = keys_query.subquery()
+    id_column, *stamp_columns = page.c
+    aggregate = select(
+        func.count(),
+        func.sum(id_column),
+        func.min(id_column),
+        func.max(id_column),
+        *(func.max(column) for column in stamp_columns),
+    )
+    row = (await db.execute(aggregate)).one()
+    return tuple(row)
+
+def row_stamp(row) -> Optional[object]:
+    return row.updated_at or row.created_at
@@ -0,0 +1,189 @@
+"""
+Moderation events, pushed to admins over Server-Sent Events.
+
+create_post, the moderation endpoints and post deletion publish an event once
+their transaction has committed, and GET /api/admin/posts/events streams them
+to every connected admin, so the dashboard no longer re-polls the pending
+queue. Each event is {"type": "post.created" | "post.approved" |
+"post.rejected" | "post.deleted", "post": {...}}; "post" always has the id,
+and the status unless the post was deleted. A bulk approve, reject or delete
+publishes a single {"type": "posts.bulk", "ids": [...], "status": ...} (status
+null when deleted), so one action of up to BULK_MODERATION_LIMIT posts takes
+one queue slot rather than overflowing every subscriber's queue.
+
+EventBroker fans events out to the subscribers of this process. With
+CACHE_URL set, RedisBroker relays them through a Redis channel instead, so
+subscribers on every worker see every worker's events, over one pub/sub
+connection per process however many subscribers it has. Each subscriber gets
+a bounded queue: one that falls EVENTS_SUBSCRIBER_QUEUE events behind is cut
+off, and its client reconnects, rather than the worker buffering for it
+without limit. Delivery is best effort; clients reload the pending queue
+whenever they (re)connect.
+"""
+import asyncio
+import json
+from typing import Optional
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.models import PostStatus
+from app.schemas import PostResponse
+
+# How long a browser waits before reconnecting a dropped stream
+RECONNECT_MILLISECONDS = 3000
+
+def sse_frame(data: str) -> str:
+    """A serialized event as a text/event-stream frame; built once per event, not per subscriber"""
+    return f"event: {json.loads(data)['type']}\ndata: {data}\n\n"
+
+class Subscription:
+    __slots__ = ("queue", "cut_off")
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.cut_off = False
+
+class EventBroker:
+    """Fans events out to the subscribers of this process"""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscriptions: set[Subscription] = set()
+        self.published = 0
+        self.cut_off = 0
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+
+    def _deliver(self, frame: str):
+        """Queue one formatted event for every subscriber"""
+        for subscription in list(self._subscriptions):
+            try:
+                subscription.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                subscription.cut_off = True
+                self._subscriptions.discard(subscription)
+                self.cut_off += 1
+
+    async def publish(self, event: dict):
+        self.published += 1
+        self._deliver(sse_frame(json.dumps(event)))
+
+    async def close(self):
+        pass
+
+    def metrics(self) -> dict:
+        return {"subscribers": self.subscribers, "published": self.published, "cut_off": self.cut_off}
+
+class RedisBroker(EventBroker):
+    """
+    Relays events between workers through a Redis channel (requires the
+    `redis` package). `client` replaces the connection made from `url`;
+    anything with redis-py's async publish() and pubsub() works, such as a
+    local fake.
+    """
+
+    def __init__(self, url: Optional[str] = None, channel: str = "alumni:moderation-events",
+                 queue_size: int = 100, client=None):
+        super().__init__(queue_size)
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError("CACHE_URL is set but the 'redis' package is not installed")
+            client = redis.from_url(url)
+        self.channel = channel
+        self.publish_failures = 0
+        self._client = client
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> Subscription:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.ensure_future(self._listen())
+        return super().subscribe()
+
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = self._client.pubsub()
+                await pubsub.subscribe(self.channel)
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            data = message["data"]
+                            self._deliver(sse_frame(data.decode() if isinstance(data, bytes) else data))
+                finally:
+                    await pubsub.aclose()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Lost the connection; events published meanwhile are missed, as with any best-effort stream
+                await asyncio.sleep(1)
+
+    async def publish(self, event: dict):
+        self.published += 1
+        try:
+            await self._client.publish(self.channel, json.dumps(event))
+        except Exception:
+            # The write this reports has already committed; a broker outage must not fail it
+            self.publish_failures += 1
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+    def metrics(self) -> dict:
+        return {**super().metrics(), "publish_failures": self.publish_failures}
+
+def create_event_broker() -> EventBroker:
+    """Redis relay when CACHE_URL is configured, otherwise this process only"""
+    if settings.CACHE_URL:
+        return RedisBroker(settings.CACHE_URL, queue_size=settings.EVENTS_SUBSCRIBER_QUEUE)
+    return EventBroker(settings.EVENTS_SUBSCRIBER_QUEUE)
+
+moderation_events = create_event_broker()
+
+def post_event(event_type: str, post) -> dict:
+    """An event carrying the whole post (what the pending queue lists)"""
+    return {"type": event_type, "post": PostResponse.model_validate(post).model_dump(mode="json")}
+
+async def publish_status_changes(post_ids: list[int], new_status: Optional[PostStatus]):
+    """One event for a whole bulk moderation call; new_status None means deleted"""
+    await moderation_events.publish({
+        "type": "posts.bulk",
+        "ids": post_ids,
+        "status": None if new_status is None else new_status.value,
+    })
+
+async def _event_stream(broker: EventBroker):
+    subscription = broker.subscribe()
+    try:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscription.queue.get(), settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            if subscription.cut_off:
+                return
+            yield frame
+    finally:
+        broker.unsubscribe(subscription)
+
+def event_stream_response(broker: EventBroker) -> StreamingResponse:
+    return StreamingResponse(
+        _event_stream(broker),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,85 @@
+"""
+Precomputed facet counts for the alumni directory sidebar.
+
+Instead of a GROUP BY over alumni_profiles per request, profile_facet_counts
+holds one counter per (facet, value). create/update of a profile adjusts
+only the counters whose value changed, inside the same transaction, with a
+single atomic upsert per counter.
+"""
+from typing import Optional
+from sqlalchemy import literal, select, text, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import AlumniProfile, ProfileFacetCount
+
+FACETS = ("graduation_year", "major", "company")
+
+def facet_values(profile: AlumniProfile) -> dict[str, Optional[str]]:
+    values = {}
+    for facet in FACETS:
+        value = getattr(profile, facet)
+        values[facet] = None if value in (None, "") else str(value)
+    return values
+
+async def _bump(db: AsyncSession, facet: str, value: str, delta: int):
+    dialect_insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(ProfileFacetCount).values(facet=facet, value=value, count=delta)
+    statement = statement.on_conflict_do_update(
+        index_elements=[ProfileFacetCount.facet, ProfileFacetCount.value],
+        set_={"count": ProfileFacetCount.count + delta},
+    )
+    await db.execute(statement)
+
+async def apply_facet_changes(
+    db: AsyncSession, before: dict[str, Optional[str]], after: dict[str, Optional[str]]
+):
+    """Move one profile's contribution from its old facet values to its new ones"""
+    for facet in FACETS:
+        old, new = before.get(facet), after.get(facet)
+        if old == new:
+            continue
+        if old is not None:
+            await _bump(db, facet, old, -1)
+        if new is not None:
+            await _bump(db, facet, new, 1)
+
+async def add_facet_counts(db: AsyncSession, counts: dict[tuple[str, str], int]):
+    """Apply many profiles' contributions at once, one upsert per distinct (facet, value)"""
+    for (facet, value), delta in counts.items():
+        await _bump(db, facet, value, delta)
+
+async def load_facets(db: AsyncSession, limit: int) -> dict[str, list[dict]]:
+    """
+    The `limit` most common values of each facet. One statement with a LIMIT
+    per facet, so each reads only its top rows from the (facet, count) index
+    however many distinct companies or majors there are.
+    """
+    tops = [
+        select(ProfileFacetCount.value, ProfileFacetCount.count)
+        .where(ProfileFacetCount.facet == facet, ProfileFacetCount.count > 0)
+        .order_by(ProfileFacetCount.count.desc(), ProfileFacetCount.value)
+        .limit(limit)
+        .subquery()
+        for facet in FACETS
+    ]
+    result = await db.execute(union_all(*(
+        select(literal(facet).label("facet"), top.c.value, top.c.count) for facet, top in zip(FACETS, tops)
+    )))
+    facets = {facet: [] for facet in FACETS}
+    for row in result:
+        facets[row.facet].append({"value": row.value, "count": row.count})
+    for bucket in facets.values():
+        # UNION ALL doesn't promise to keep each part's order
+        bucket.sort(key=lambda entry: (-entry["count"], entry["value"]))
+    return facets
+
+def rebuild_profile_facets(connection):
+    """Recount every facet from alumni_profiles (sync connection)"""
+    connection.execute(text("DELETE FROM profile_facet_counts"))
+    for facet in FACETS:
+        connection.execute(text(
+            f"INSERT INTO profile_facet_counts (facet, value, count)"
+            f" SELECT '{facet}', CAST({facet} AS VARCHAR), COUNT(*) FROM alumni_profiles"
+            f" WHERE {facet} IS NOT NULL AND CAST({facet} AS VARCHAR) <> ''"
+            f" GROUP BY CAST({facet} AS VARCHAR)"
+        ))
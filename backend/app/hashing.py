@@ -0,0 +1,117 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from fastapi import HTTPException, status
+from app.config import settings
+from app.auth import verify_password, get_password_hash
+from app.stats import LatencyStats
+from app import profiling
+
+def _verify_job(plain_password: str, hashed_password: str) -> tuple[bool, float]:
+    started_at = time.monotonic()
+    return verify_password(plain_password, hashed_password), started_at
+
+def _hash_job(password: str) -> tuple[str, float]:
+    started_at = time.monotonic()
+    return get_password_hash(password), started_at
+
+def _hash_many_job(passwords: list[str]) -> tuple[list[str], float]:
+    started_at = time.monotonic()
+    return [get_password_hash(password) for password in passwords], started_at
+
+class PasswordHashPool:
+    """
+    Runs bcrypt hash/verify on a bounded thread or process pool so the event
+    loop keeps serving other requests. Once `max_queue` jobs are waiting for a
+    worker, new jobs are refused with a 503 and a Retry-After header.
+    """
+
+    def __init__(self, workers: int, max_queue: int, kind: str = "thread", retry_after: int = 1):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {kind}")
+        self.workers = workers
+        self.max_queue = max_queue
+        self.kind = kind
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.rejected = 0
+        self.hash_latency = LatencyStats()
+        self.queue_wait = LatencyStats()
+        self._executor: Optional[Executor] = None
+
+    @classmethod
+    def from_settings(cls) -> "PasswordHashPool":
+        return cls(
+            workers=settings.PASSWORD_HASH_WORKERS,
+            max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+            kind=settings.PASSWORD_HASH_EXECUTOR,
+            retry_after=settings.PASSWORD_HASH_RETRY_AFTER,
+        )
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    async def _submit(self, job, *args):
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        self.in_flight += 1
+        submitted_at = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started_at = await loop.run_in_executor(self.executor, job, *args)
+        finally:
+            self.in_flight -= 1
+        finished_at = time.monotonic()
+        self.queue_wait.observe(max(0.0, started_at - submitted_at))
+        self.hash_latency.observe(finished_at - started_at)
+        profiling.add_timing("password_hash_queue", max(0.0, started_at - submitted_at))
+        profiling.add_timing("password_hash", finished_at - started_at)
+        return result
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(_verify_job, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash_job, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """Hash a list in one job, saving a round trip to the pool per password"""
+        return await self._submit(_hash_many_job, passwords)
+
+    def metrics(self) -> dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "hash_latency": self.hash_latency.snapshot(),
+            "queue_wait": self.queue_wait.snapshot(),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHashPool.from_settings()
@@ -1,19 +1,65 @@
-from fastapi import FastAPI
+import asyncio
+import secrets
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, alumni, posts, admin, newsletter
-from app.database import engine, Base
+from sqlalchemy.exc import SQLAlchemyError
+from app.config import settings
+from app.routers import auth, alumni, posts, admin, newsletter, search, media
+from app import database
+from app.compression import CompressionMiddleware, configured_encodings
+from app.db_routing import ReadAfterWriteMiddleware
+from app.events import moderation_events
+from app.hashing import password_hasher
+from app.media import thumbnail_pool
+from app.user_import import import_jobs
+from app.rate_limit import RateLimiter, RateLimitMiddleware, configured_limits, create_rate_limit_backend
+from app.profiling import PROFILE_ID_HEADER, ProfilingMiddleware, install_sql_hooks
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, install_query_hooks, render as render_metrics
+from app.pagination import NEXT_CURSOR_HEADER
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+READY_CHECK_TIMEOUT_SECONDS = 2
+
+async def database_reachable() -> bool:
+    try:
+        await asyncio.wait_for(database.check_connection(), READY_CHECK_TIMEOUT_SECONDS)
+    except (asyncio.TimeoutError, SQLAlchemyError, OSError):
+        return False
+    return True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema is Alembic's job; creating it here is an opt-in for throwaway databases
+    if settings.CREATE_SCHEMA_ON_STARTUP:
+        async with database.async_engine.begin() as connection:
+            await connection.run_sync(database.create_schema)
+    # Opens the first pooled connection now instead of on the first request. An
+    # unreachable database doesn't stop startup; /api/ready reports it.
+    await database_reachable()
+    app.state.started = True
+    yield
+    app.state.started = False
+    await moderation_events.close()
+    password_hasher.shutdown()
+    thumbnail_pool.shutdown()
+    await import_jobs.shutdown()
+    await database.dispose_engines()
 
 app = FastAPI(
     title="Alumni Update Platform API",
     description="Backend API for Alumni Update Platform",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    lifespan=lifespan
 )
 
+# Token buckets on login/register/subscribe, checked before any DB or bcrypt work. Added
+# first, so it sits inside CORS and browsers can read its 429s.
+rate_limits = configured_limits() if settings.RATE_LIMIT_ENABLED else {}
+if rate_limits:
+    app.add_middleware(RateLimitMiddleware, limiter=RateLimiter(rate_limits, create_rate_limit_backend()))
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -21,14 +67,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", PROFILE_ID_HEADER, "Retry-After"],
 )
 
+# Keeps a user's reads on the primary database right after they write (read replicas only)
+app.add_middleware(ReadAfterWriteMiddleware)
+
+# gzip/brotli, as the client accepts, for bodies of COMPRESSION_MINIMUM_SIZE bytes or more.
+# Inside the metrics middleware, so response sizes there are what was actually sent.
+if settings.COMPRESSION_ENCODINGS.strip():
+    app.add_middleware(CompressionMiddleware, encodings=configured_encodings())
+
+# Opt-in request profiles for /api/admin/profiles; nothing is installed unless enabled
+if settings.PROFILING_ENABLED:
+    install_sql_hooks()
+    app.add_middleware(ProfilingMiddleware)
+
+# Request/DB metrics for /metrics; added last so it wraps (and times) every other middleware
+if settings.METRICS_ENABLED:
+    install_query_hooks()
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(alumni.router, prefix="/api/alumni", tags=["Alumni"])
 app.include_router(posts.router, prefix="/api/posts", tags=["Posts"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 app.include_router(newsletter.router, prefix="/api/newsletter", tags=["Newsletter"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
+app.include_router(media.router, prefix="/api/media", tags=["Media"])
 
 @app.get("/")
 async def root():
@@ -36,7 +103,33 @@ async def root():
 
 @app.get("/api/health")
 async def health_check():
+    """Liveness: the process is up and serving; checks nothing else"""
     return {"status": "healthy"}
 
+@app.get("/api/ready")
+async def readiness_check(request: Request):
+    """Readiness: startup has finished and the database answers"""
+    if not getattr(request.app.state, "started", False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Starting up"
+        )
+    if not await database_reachable():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database unavailable"
+        )
+    return {"status": "ready"}
 
-
+# Route-level traffic and database timings aren't public: without METRICS_TOKEN there is no /metrics
+if settings.METRICS_ENABLED and settings.METRICS_TOKEN:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics(request: Request):
+        if not secrets.compare_digest(
+            request.headers.get("authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token"
+            )
+        return Response(content=render_metrics(), media_type=CONTENT_TYPE)
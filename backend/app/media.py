@@ -0,0 +1,287 @@
+"""
+Uploaded profile pictures: content-addressed storage and thumbnails.
+
+An upload streams to disk under the SHA-256 of its bytes, so the same image
+uploaded twice is stored once and a file name never changes meaning; that is
+what lets GET /api/media/<name> be cached as immutable. Square WebP
+thumbnails, one per THUMBNAIL_SIZES edge, are made on a process pool after
+the upload has been answered, and the profile is pointed at the picture
+(AlumniProfile.profile_picture_hash) only once they are written, so the
+directory never links an image that isn't there. Originals are kept to make
+new sizes from (scripts/rebuild_thumbnails.py) and are never served.
+
+    MEDIA_ROOT/originals/ab/ab12...            uploaded bytes
+    MEDIA_ROOT/thumbnails/ab/ab12...-96.webp   served
+    MEDIA_ROOT/incoming/                       uploads in progress
+"""
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from fastapi import HTTPException, Request, status
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+from app import database
+from app.models import AlumniProfile
+from app.stats import LatencyStats
+
+MEDIA_URL = "/api/media"
+# Served files never change, so browsers and CDNs can keep them for good
+IMMUTABLE = "public, max-age=31536000, immutable"
+THUMBNAIL_NAME = re.compile(r"([0-9a-f]{64})-([0-9]+)\.webp")
+# Accepted Content-Type -> the Pillow format the bytes must actually be
+ACCEPTED_TYPES = {"image/jpeg": "JPEG", "image/png": "PNG", "image/webp": "WEBP", "image/gif": "GIF"}
+WEBP_QUALITY = 80
+
+logger = logging.getLogger(__name__)
+
+@lru_cache
+def thumbnail_sizes() -> tuple[int, ...]:
+    sizes = sorted({int(size) for size in get_settings().THUMBNAIL_SIZES.split(",") if size.strip()})
+    if not sizes or sizes[0] <= 0:
+        raise ValueError(f"THUMBNAIL_SIZES must be positive pixel sizes, got {get_settings().THUMBNAIL_SIZES!r}")
+    return tuple(sizes)
+
+def _root() -> Path:
+    return Path(get_settings().MEDIA_ROOT)
+
+def original_path(digest: str) -> Path:
+    return _root() / "originals" / digest[:2] / digest
+
+def thumbnail_name(digest: str, size: int) -> str:
+    return f"{digest}-{size}.webp"
+
+def thumbnail_path(name: str) -> Path:
+    return _root() / "thumbnails" / name[:2] / name
+
+def thumbnail_urls(digest: str) -> dict[int, str]:
+    return {size: f"{MEDIA_URL}/{thumbnail_name(digest, size)}" for size in thumbnail_sizes()}
+
+def thumbnails_exist(digest: str) -> bool:
+    return all(thumbnail_path(thumbnail_name(digest, size)).is_file() for size in thumbnail_sizes())
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"Pictures can be at most {get_settings().MEDIA_MAX_UPLOAD_BYTES} bytes",
+    )
+
+def _check_image(path: str, expected_format: str):
+    """Reads only the header: an image of the declared format, of at most MEDIA_MAX_PIXELS"""
+    from PIL import Image
+
+    try:
+        with Image.open(path, formats=list(ACCEPTED_TYPES.values())) as image:
+            found_format = image.format
+            width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Not a JPEG, PNG, WebP or GIF image")
+    if found_format != expected_format:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Content-Type says {expected_format} but the body is {found_format}",
+        )
+    if width * height > get_settings().MEDIA_MAX_PIXELS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Pictures can be at most {get_settings().MEDIA_MAX_PIXELS} pixels",
+        )
+
+def _store(temp_path: str, path: Path):
+    if path.exists():
+        # Already uploaded, by this user or another one
+        os.unlink(temp_path)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(temp_path, path)
+
+async def receive_upload(request: Request) -> str:
+    """
+    Stream the request body into storage and return its SHA-256. The body
+    is the image itself, with its Content-Type; the size limit is enforced
+    as the bytes arrive, so nothing larger is ever buffered or written.
+    """
+    content_type = request.headers.get("content-type", "").partition(";")[0].strip().lower()
+    if content_type not in ACCEPTED_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send a JPEG, PNG, WebP or GIF image as the request body",
+        )
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > get_settings().MEDIA_MAX_UPLOAD_BYTES:
+        raise _too_large()
+
+    incoming = _root() / "incoming"
+    incoming.mkdir(parents=True, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=incoming)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(handle, "wb") as file:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > get_settings().MEDIA_MAX_UPLOAD_BYTES:
+                    raise _too_large()
+                digest.update(chunk)
+                # One socket read at a time, into the page cache; short enough to do on the loop
+                file.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty upload")
+        await asyncio.to_thread(_check_image, temp_path, ACCEPTED_TYPES[content_type])
+        await asyncio.to_thread(_store, temp_path, original_path(digest.hexdigest()))
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_path)
+        raise
+    return digest.hexdigest()
+
+def make_thumbnails(source: str, targets: list[tuple[int, str]], max_pixels: int) -> float:
+    """
+    Write a square WebP thumbnail of `source` for each (size, path); runs on
+    the pool. Returns when it started. Each file is written under a temporary
+    name and renamed, so a thumbnail is never seen half written and two
+    workers making the same one don't clash.
+    """
+    started_at = time.monotonic()
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    largest = max(size for size, _ in targets)
+    with Image.open(source) as image:
+        # JPEGs decode straight to 1/2, 1/4 or 1/8 scale when that is still big enough: much less work
+        image.draft(None, (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        transparent = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if transparent else "RGB")
+    for size, path in targets:
+        thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        thumbnail.save(temp_path, "WEBP", quality=WEBP_QUALITY)
+        os.replace(temp_path, path)
+    return started_at
+
+def thumbnail_targets(digest: str) -> list[tuple[int, str]]:
+    return [(size, str(thumbnail_path(thumbnail_name(digest, size)))) for size in thumbnail_sizes()]
+
+async def set_profile_picture(db: AsyncSession, profile_id: int, digest: Optional[str]):
+    """Point a profile at an uploaded picture (None removes it), in the caller's transaction"""
+    await db.execute(
+        update(AlumniProfile).where(AlumniProfile.id == profile_id).values(profile_picture_hash=digest)
+    )
+
+class ThumbnailPool:
+    """
+    Makes thumbnails on a bounded process pool, off the event loop and out of
+    the request: an upload is answered once its bytes are stored, and its
+    profile is pointed at the picture when the thumbnails are written. Once
+    `max_queue` jobs are waiting for a worker, new uploads are refused with
+    a 503 and a Retry-After header.
+    """
+
+    def __init__(self, workers: int, max_queue: int, retry_after: int = 1):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.rejected = 0
+        self.failed = 0
+        self.latency = LatencyStats()
+        self.queue_wait = LatencyStats()
+        self._executor: Optional[Executor] = None
+        self._tasks: set[asyncio.Task] = set()
+        # Newest upload per profile, so an older one that finishes later doesn't replace it
+        self._latest: dict[int, str] = {}
+
+    @classmethod
+    def from_settings(cls) -> "ThumbnailPool":
+        return cls(workers=get_settings().THUMBNAIL_WORKERS, max_queue=get_settings().THUMBNAIL_MAX_QUEUE)
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    def attach_when_ready(self, profile_id: int, digest: str):
+        """Start making the thumbnails; the profile gets the picture when they are done"""
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, please retry shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        self.in_flight += 1
+        self._latest[profile_id] = digest
+        task = asyncio.ensure_future(self._attach(profile_id, digest))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def supersede(self, profile_id: int):
+        """The profile's picture was just set (or removed) directly; jobs still running for it are ignored"""
+        self._latest.pop(profile_id, None)
+
+    async def _attach(self, profile_id: int, digest: str):
+        submitted_at = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            started_at = await loop.run_in_executor(
+                self.executor, make_thumbnails,
+                str(original_path(digest)), thumbnail_targets(digest), get_settings().MEDIA_MAX_PIXELS,
+            )
+            finished_at = time.monotonic()
+            self.queue_wait.observe(max(0.0, started_at - submitted_at))
+            self.latency.observe(finished_at - started_at)
+            if self._latest.get(profile_id) == digest:
+                async with database.AsyncSessionLocal() as db:
+                    await set_profile_picture(db, profile_id, digest)
+                    await db.commit()
+        except Exception:
+            # Nobody is waiting on this; the user sees no new picture and can upload again
+            self.failed += 1
+            logger.exception("Thumbnails for profile %s (picture %s) failed", profile_id, digest)
+        finally:
+            self.in_flight -= 1
+            if self._latest.get(profile_id) == digest:
+                del self._latest[profile_id]
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "latency": self.latency.snapshot(),
+            "queue_wait": self.queue_wait.snapshot(),
+        }
+
+    def shutdown(self):
+        for task in self._tasks:
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+def __getattr__(name: str):
+    # The pool is built on first use, so importing the URL helpers (schemas) doesn't read settings
+    if name == "thumbnail_pool":
+        global thumbnail_pool
+        thumbnail_pool = ThumbnailPool.from_settings()
+        return thumbnail_pool
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,249 @@
+"""
+Prometheus-style request and database metrics, served on /metrics in the
+Prometheus text exposition format.
+
+MetricsMiddleware records, per method and route template (e.g.
+/api/posts/{post_id}, so ids don't blow up the label space; requests that
+match no route share the "unmatched" label):
+
+  - http_requests_total{method,route,status}
+  - http_request_duration_seconds{method,route}: histogram, until the last body byte
+  - http_response_size_bytes{method,route}: histogram of body bytes sent
+  - http_requests_in_progress{method}: gauge
+  - db_queries_per_request{method,route} and db_query_seconds_per_request{method,route}:
+    histograms of the statements each request ran and the time spent in them
+
+The DB figures come from cursor-execute hooks on every Engine that add into a
+per-request tally held in a context variable (SQLAlchemy's async greenlets
+inherit it), so queries run outside a request are not counted.
+
+Values are per process: scrape each worker, or run a single one.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+UNMATCHED_ROUTE = "unmatched"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def _label_text(self, values: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self.samples()
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{self._label_text(labels)} {_format_value(value)}"
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: a count per bucket (not cumulative), then the +Inf bucket, then the sum
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> Iterator[str]:
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{self._label_text(labels, le)} {cumulative}"
+            yield f"{self.name}_sum{self._label_text(labels)} {_format_value(series[-1])}"
+            yield f"{self.name}_count{self._label_text(labels)} {cumulative}"
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+registry = Registry()
+
+requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status"),
+))
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to serve a request", ("method", "route"), LATENCY_BUCKETS,
+))
+response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Response body size", ("method", "route"), SIZE_BUCKETS,
+))
+requests_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "Requests being served", ("method",),
+))
+db_queries = registry.register(Histogram(
+    "db_queries_per_request", "SQL statements run per request", ("method", "route"), QUERY_COUNT_BUCKETS,
+))
+db_query_seconds = registry.register(Histogram(
+    "db_query_seconds_per_request", "Time spent in SQL statements per request", ("method", "route"), LATENCY_BUCKETS,
+))
+
+class _QueryTally:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+_current_tally: ContextVar[Optional[_QueryTally]] = ContextVar("query_tally", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_tally.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    tally = _current_tally.get()
+    started = getattr(context, "_metrics_started", None)
+    if tally is not None and started is not None:
+        tally.count += 1
+        tally.seconds += time.perf_counter() - started
+
+def install_query_hooks():
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+def remove_query_hooks():
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+
+def _route_template(route, path: str) -> str:
+    """Full path template of the matched route, e.g. /api/posts/{post_id}"""
+    template = getattr(route, "path", None)
+    if template is None:
+        return UNMATCHED_ROUTE
+    # Routes of an included router carry a template relative to its prefix; the
+    # template matched the trailing segments of the path, the rest is the prefix
+    segments = template.count("/")
+    if not segments:
+        return path
+    return path.rsplit("/", segments)[0] + template
+
+# Finished requests not yet folded into the metrics above. Folding happens at
+# scrape time (or every PENDING_LIMIT requests), keeping it off the request path.
+PENDING_LIMIT = 1000
+_pending: list[tuple] = []
+
+def fold_pending():
+    global _pending
+    pending, _pending = _pending, []
+    for method, route, path, status_code, elapsed, body_bytes, queries, query_seconds in pending:
+        labels = (method, _route_template(route, path))
+        requests_total.inc((*labels, str(status_code)))
+        request_duration.observe(labels, elapsed)
+        response_size.observe(labels, body_bytes)
+        db_queries.observe(labels, queries)
+        db_query_seconds.observe(labels, query_seconds)
+
+def render() -> str:
+    fold_pending()
+    return registry.render()
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        body_bytes = 0
+
+        start_headers = ()
+
+        async def send_measured(message):
+            nonlocal status_code, body_bytes, start_headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                start_headers = message.get("headers", ())
+            elif message["type"] == "http.response.body":
+                body_bytes += len(message.get("body", b""))
+            elif message["type"] == "http.response.pathsend":
+                # The server sends the file itself; FileResponse declared its size
+                body_bytes += next((int(value) for name, value in start_headers if name == b"content-length"), 0)
+            await send(message)
+
+        tally = _QueryTally()
+        token = _current_tally.set(tally)
+        requests_in_progress.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_measured)
+        finally:
+            elapsed = time.perf_counter() - started
+            requests_in_progress.dec((method,))
+            _current_tally.reset(token)
+            # The router stores the matched route in the scope
+            _pending.append((
+                method, scope.get("route"), scope["path"], status_code,
+                elapsed, body_bytes, tally.count, tally.seconds,
+            ))
+            if len(_pending) >= PENDING_LIMIT:
+                fold_pending()
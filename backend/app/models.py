@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, ForeignKey, Index, JSON, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -18,6 +18,7 @@ class User(Base):
     role = Column(SQLEnum(UserRole), default=UserRole.ALUMNI, nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     alumni_profile = relationship("AlumniProfile", back_populates="user", uselist=False)
@@ -35,11 +36,20 @@ class AlumniProfile(Base):
     bio = Column(Text)
     linkedin_url = Column(String)
     profile_picture_url = Column(String)
+    # SHA-256 of an uploaded picture (app/media.py), set once its thumbnails exist
+    profile_picture_hash = Column(String(64))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="alumni_profile")
+    
+    __table_args__ = (
+        # Directory filters, each paired with id for keyset paging
+        Index("ix_alumni_profiles_graduation_year_id", "graduation_year", "id"),
+        Index("ix_alumni_profiles_major_id", "major", "id"),
+        Index("ix_alumni_profiles_company_id", "company", "id"),
+    )
 
 class PostStatus(str, enum.Enum):
     PENDING = "pending"
@@ -59,6 +69,41 @@ class Post(Base):
     
     # Relationships
     author = relationship("User", back_populates="posts")
+    
+    __table_args__ = (
+        # Feed (APPROVED) and moderation queue (PENDING), newest first
+        Index("ix_posts_status_created_at_id", "status", "created_at", "id"),
+        # My posts, newest first
+        Index("ix_posts_author_id_created_at_id", "author_id", "created_at", "id"),
+    )
+
+class ProfileFacetCount(Base):
+    """Number of alumni per graduation year / major / company, kept up to date by the profile write paths"""
+    __tablename__ = "profile_facet_counts"
+    
+    facet = Column(String, primary_key=True)
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        # Top values of one facet, read with a LIMIT
+        Index("ix_profile_facet_counts_facet_count", "facet", "count"),
+    )
+
+class StatCounter(Base):
+    """A running total for the admin dashboard (users, posts by status...), kept up to date by the write paths"""
+    __tablename__ = "stat_counters"
+    
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+class DailyStat(Base):
+    """Signups, posts, subscriptions and unsubscriptions per UTC day, kept up to date by the write paths"""
+    __tablename__ = "daily_stats"
+    
+    day = Column(Date, primary_key=True)
+    metric = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
 
 class NewsletterSubscriber(Base):
     __tablename__ = "newsletter_subscribers"
@@ -68,5 +113,65 @@ class NewsletterSubscriber(Base):
     is_active = Column(Boolean, default=True)
     subscribed_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class NewsletterIssueStatus(str, enum.Enum):
+    QUEUED = "queued"
+    SENDING = "sending"
+    SENT = "sent"
 
+class NewsletterIssue(Base):
+    __tablename__ = "newsletter_issues"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(SQLEnum(NewsletterIssueStatus), default=NewsletterIssueStatus.QUEUED, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        # The dispatch worker picks the oldest unfinished issue
+        Index("ix_newsletter_issues_status_id", "status", "id"),
+    )
+
+class DeliveryStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
 
+class NewsletterDelivery(Base):
+    """One recipient of one issue; the dispatch worker's progress is the state of these rows"""
+    __tablename__ = "newsletter_deliveries"
+    
+    issue_id = Column(Integer, ForeignKey("newsletter_issues.id"), primary_key=True)
+    subscriber_id = Column(Integer, ForeignKey("newsletter_subscribers.id"), primary_key=True)
+    email = Column(String, nullable=False)
+    status = Column(SQLEnum(DeliveryStatus), default=DeliveryStatus.PENDING, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text)
+    claimed_at = Column(DateTime(timezone=True))
+    # After a temporary failure, not claimed again before this
+    next_attempt_at = Column(DateTime(timezone=True))
+    sent_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        # Next batch of pending recipients for an issue, in subscriber order
+        Index("ix_newsletter_deliveries_issue_id_status_subscriber_id", "issue_id", "status", "subscriber_id"),
+    )
+
+class UserImportJobStatus(str, enum.Enum):
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+class UserImportJob(Base):
+    """A CSV import uploaded to the API; its report is updated as each batch commits"""
+    __tablename__ = "user_import_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(SQLEnum(UserImportJobStatus), default=UserImportJobStatus.RUNNING, nullable=False)
+    report = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
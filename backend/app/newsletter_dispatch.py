@@ -0,0 +1,427 @@
+"""
+Newsletter issues and their dispatch.
+
+Queuing an issue (from the API) renders it once and fans it out to one
+newsletter_deliveries row per active subscriber with a single INSERT ... SELECT.
+Sending happens in a separate worker process (scripts/newsletter_worker.py):
+
+  - recipients are claimed in batches (PENDING -> SENDING, committed) before
+    anything is sent, and each batch's outcomes are written back in one
+    executemany, so progress survives the worker dying at any point
+  - messages go out over a small pool of reused SMTP connections, throttled
+    by a token bucket shared by the sending threads
+  - 4xx/connection errors return the recipient to PENDING until
+    NEWSLETTER_MAX_ATTEMPTS, not to be claimed again before a backoff of
+    NEWSLETTER_RETRY_DELAY_SECONDS doubling per attempt, so a short mail
+    server outage doesn't use up every attempt; 5xx rejections fail it
+    immediately
+  - recipients who unsubscribed after the issue was queued are marked
+    FAILED when their batch is claimed instead of being sent to
+
+Delivery is at most once. A restarted worker never re-sends a SENT row, and
+rows left in SENDING by a dead worker (whose message may or may not have gone
+out) are marked FAILED once their claim is NEWSLETTER_CLAIM_TIMEOUT_SECONDS old
+rather than risking a duplicate.
+"""
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import Optional
+from sqlalchemy import and_, exists, func, insert, literal, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.models import (
+    DeliveryStatus,
+    NewsletterDelivery,
+    NewsletterIssue,
+    NewsletterIssueStatus,
+    NewsletterSubscriber,
+    Post,
+    PostStatus,
+)
+from app.queries import select_posts_with_author
+
+INTERRUPTED_ERROR = "Interrupted while sending; not retried to avoid a duplicate"
+UNSUBSCRIBED_ERROR = "Unsubscribed before sending"
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def render_issue(posts: list[Post]) -> str:
+    sections = [f"{post.title}\nby {post.author.full_name}\n\n{post.content}" for post in posts]
+    return "\n\n----\n\n".join(sections)
+
+async def queue_issue(db: AsyncSession, subject: Optional[str], days: int) -> Optional[NewsletterIssue]:
+    """Render the last `days` of approved posts and queue them for every active subscriber"""
+    since = _utcnow() - timedelta(days=days)
+    result = await db.execute(
+        select_posts_with_author()
+        .where(Post.status == PostStatus.APPROVED, Post.created_at >= since)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+    )
+    posts = result.scalars().all()
+    if not posts:
+        return None
+
+    issue = NewsletterIssue(
+        subject=subject or f"Alumni Update: {len(posts)} new post{'s' if len(posts) != 1 else ''}",
+        body=render_issue(posts),
+    )
+    db.add(issue)
+    await db.flush()
+    await db.execute(
+        insert(NewsletterDelivery).from_select(
+            ["issue_id", "subscriber_id", "email"],
+            select(literal(issue.id), NewsletterSubscriber.id, NewsletterSubscriber.email)
+            .where(NewsletterSubscriber.is_active == True),
+        )
+    )
+    await db.commit()
+    await db.refresh(issue)
+    return issue
+
+async def delivery_counts(db: AsyncSession, issue_id: int) -> dict[str, int]:
+    result = await db.execute(
+        select(NewsletterDelivery.status, func.count())
+        .where(NewsletterDelivery.issue_id == issue_id)
+        .group_by(NewsletterDelivery.status)
+    )
+    counts = {status.value: 0 for status in DeliveryStatus}
+    for status, count in result:
+        counts[status.value] = count
+    return counts
+
+class SendRateLimiter:
+    """Token bucket shared by the sending threads; a rate of 0 disables throttling"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        # Bursts of at most a tenth of a second's worth of messages
+        self.capacity = max(1.0, rate / 10)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class SMTPPool:
+    """Up to `size` open SMTP connections, reused across messages"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        size: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = False,
+        timeout: float = 30,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.size = size
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self.connects = 0
+
+    @classmethod
+    def from_settings(cls) -> "SMTPPool":
+        return cls(
+            settings.SMTP_HOST,
+            settings.SMTP_PORT,
+            settings.NEWSLETTER_SMTP_CONNECTIONS,
+            settings.SMTP_USERNAME,
+            settings.SMTP_PASSWORD,
+            settings.SMTP_STARTTLS,
+        )
+
+    def _connect(self) -> smtplib.SMTP:
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password or "")
+        self.connects += 1
+        return connection
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        connection = None
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+            yield connection
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The server answered, so the connection is still usable
+            raise
+        except OSError:
+            # Broken connection (SMTPServerDisconnected, socket errors): drop it so the next message reconnects
+            if connection is not None:
+                connection.close()
+                connection = None
+            raise
+        finally:
+            if connection is not None:
+                self._idle.put(connection)
+            self._slots.release()
+
+    def send(self, message: EmailMessage):
+        with self.connection() as connection:
+            connection.send_message(message)
+
+    def close(self):
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                connection.quit()
+            except (smtplib.SMTPException, OSError):
+                connection.close()
+
+class NewsletterDispatcher:
+    """Sends queued issues; one run_once() call works the oldest issue with work due as far as it can"""
+
+    def __init__(
+        self,
+        session_factory,
+        smtp: SMTPPool,
+        limiter: SendRateLimiter,
+        batch_size: int = settings.NEWSLETTER_BATCH_SIZE,
+        max_attempts: int = settings.NEWSLETTER_MAX_ATTEMPTS,
+        retry_delay: float = settings.NEWSLETTER_RETRY_DELAY_SECONDS,
+        claim_timeout: float = settings.NEWSLETTER_CLAIM_TIMEOUT_SECONDS,
+        sender: str = settings.NEWSLETTER_FROM,
+    ):
+        self.session_factory = session_factory
+        self.smtp = smtp
+        self.limiter = limiter
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.claim_timeout = claim_timeout
+        self.sender = sender
+        self.stopping = threading.Event()
+
+    def stop(self):
+        """Finish the batch in flight, then return from run_once"""
+        self.stopping.set()
+
+    def run_once(self) -> Optional[dict]:
+        """Dispatch the oldest unfinished issue with work due now; None when there is nothing to do"""
+        db = self.session_factory()
+        try:
+            issue = db.execute(
+                select(NewsletterIssue)
+                .where(
+                    NewsletterIssue.status.in_([NewsletterIssueStatus.QUEUED, NewsletterIssueStatus.SENDING]),
+                    self._has_work_due(),
+                )
+                .order_by(NewsletterIssue.id)
+                .limit(1)
+            ).scalars().first()
+            if issue is None:
+                return None
+            if issue.status == NewsletterIssueStatus.QUEUED:
+                issue.status = NewsletterIssueStatus.SENDING
+                issue.started_at = _utcnow()
+            self._release_stale_claims(db, issue.id)
+            db.commit()
+
+            stats = {"issue_id": issue.id, "batches": 0, "sent": 0, "retried": 0, "failed": 0}
+            # Detached copy for the sending threads: each batch's commit expires `issue`, and
+            # the threads mustn't all reload it through the one session at the same time
+            content = NewsletterIssue(id=issue.id, subject=issue.subject, body=issue.body)
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.smtp.size) as executor:
+                while not self.stopping.is_set():
+                    recipients = self._claim_batch(db, issue.id)
+                    if not recipients:
+                        break
+                    outcomes = list(executor.map(
+                        lambda recipient: self._send_one(content, recipient[0], recipient[1]), recipients
+                    ))
+                    self._record(db, issue.id, recipients, outcomes, stats)
+                    stats["batches"] += 1
+            self.smtp.close()
+
+            if self._unfinished(db, issue.id) == 0:
+                issue.status = NewsletterIssueStatus.SENT
+                issue.finished_at = _utcnow()
+                db.commit()
+            stats["status"] = issue.status.value
+            stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+            return stats
+        finally:
+            db.close()
+
+    def _has_work_due(self):
+        """
+        Whether an issue has recipients that can be claimed now, expired claims
+        to release, or nothing unfinished left (so it only needs marking SENT).
+        An issue whose remaining recipients all wait on a retry is skipped so it
+        doesn't hold up the issues queued after it.
+        """
+        now = _utcnow()
+        cutoff = now - timedelta(seconds=self.claim_timeout)
+        deliveries = NewsletterDelivery.issue_id == NewsletterIssue.id
+        due = exists().where(deliveries, or_(
+            and_(
+                NewsletterDelivery.status == DeliveryStatus.PENDING,
+                or_(NewsletterDelivery.next_attempt_at.is_(None), NewsletterDelivery.next_attempt_at <= now),
+            ),
+            and_(NewsletterDelivery.status == DeliveryStatus.SENDING, NewsletterDelivery.claimed_at < cutoff),
+        ))
+        unfinished = exists().where(
+            deliveries, NewsletterDelivery.status.in_([DeliveryStatus.PENDING, DeliveryStatus.SENDING])
+        )
+        return or_(due, ~unfinished)
+
+    def _release_stale_claims(self, db, issue_id: int):
+        cutoff = _utcnow() - timedelta(seconds=self.claim_timeout)
+        db.execute(
+            update(NewsletterDelivery)
+            .where(
+                NewsletterDelivery.issue_id == issue_id,
+                NewsletterDelivery.status == DeliveryStatus.SENDING,
+                NewsletterDelivery.claimed_at < cutoff,
+            )
+            .values(status=DeliveryStatus.FAILED, last_error=INTERRUPTED_ERROR)
+        )
+
+    def _claim_batch(self, db, issue_id: int) -> list[tuple[int, str, int]]:
+        """
+        (subscriber_id, email, attempt number) of the next PENDING recipients
+        that are due, now SENDING. Recipients who have unsubscribed since the
+        issue was queued are marked FAILED on the way.
+        """
+        while True:
+            now = _utcnow()
+            rows = db.execute(
+                select(
+                    NewsletterDelivery.subscriber_id,
+                    NewsletterDelivery.email,
+                    NewsletterDelivery.attempts,
+                    NewsletterSubscriber.is_active,
+                )
+                .join(NewsletterSubscriber, NewsletterSubscriber.id == NewsletterDelivery.subscriber_id)
+                .where(
+                    NewsletterDelivery.issue_id == issue_id,
+                    NewsletterDelivery.status == DeliveryStatus.PENDING,
+                    or_(NewsletterDelivery.next_attempt_at.is_(None), NewsletterDelivery.next_attempt_at <= now),
+                )
+                .order_by(NewsletterDelivery.subscriber_id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True, of=NewsletterDelivery)
+            ).all()
+            active = [row for row in rows if row.is_active]
+            unsubscribed = [row.subscriber_id for row in rows if not row.is_active]
+            if unsubscribed:
+                db.execute(
+                    update(NewsletterDelivery)
+                    .where(NewsletterDelivery.issue_id == issue_id, NewsletterDelivery.subscriber_id.in_(unsubscribed))
+                    .values(status=DeliveryStatus.FAILED, last_error=UNSUBSCRIBED_ERROR)
+                )
+            if active:
+                db.execute(
+                    update(NewsletterDelivery)
+                    .where(
+                        NewsletterDelivery.issue_id == issue_id,
+                        NewsletterDelivery.subscriber_id.in_([row.subscriber_id for row in active]),
+                    )
+                    .values(
+                        status=DeliveryStatus.SENDING,
+                        claimed_at=now,
+                        attempts=NewsletterDelivery.attempts + 1,
+                    )
+                )
+            db.commit()
+            # A batch of only unsubscribed recipients doesn't mean there is nothing left to send
+            if active or not rows:
+                return [(row.subscriber_id, row.email, row.attempts + 1) for row in active]
+
+    def _message(self, issue: NewsletterIssue, subscriber_id: int, email: str) -> EmailMessage:
+        message = EmailMessage()
+        message["Subject"] = issue.subject
+        message["From"] = self.sender
+        message["To"] = email
+        # Stable per recipient, so receivers can drop a duplicate if one ever slips through
+        message["Message-ID"] = f"<issue-{issue.id}.{subscriber_id}@{self.sender.rpartition('@')[2]}>"
+        message.set_content(
+            f"{issue.body}\n\n--\nYou are receiving this because {email} subscribed to the Alumni Update newsletter."
+        )
+        return message
+
+    def _send_one(self, issue: NewsletterIssue, subscriber_id: int, email: str) -> tuple[bool, bool, Optional[str]]:
+        """(sent, retryable, error)"""
+        self.limiter.acquire()
+        try:
+            self.smtp.send(self._message(issue, subscriber_id, email))
+        except smtplib.SMTPRecipientsRefused as exc:
+            code, reply = next(iter(exc.recipients.values()))
+            return False, code < 500, f"{code} {reply.decode(errors='replace')}"
+        except smtplib.SMTPResponseException as exc:
+            return False, exc.smtp_code < 500, f"{exc.smtp_code} {exc.smtp_error.decode(errors='replace')}"
+        except (smtplib.SMTPException, OSError) as exc:
+            return False, True, str(exc) or exc.__class__.__name__
+        return True, False, None
+
+    def _record(self, db, issue_id: int, recipients, outcomes, stats: dict):
+        now = _utcnow()
+        changes = []
+        for (subscriber_id, _, attempt), (sent, retryable, error) in zip(recipients, outcomes):
+            if sent:
+                status = DeliveryStatus.SENT
+                stats["sent"] += 1
+            elif retryable and attempt < self.max_attempts:
+                status = DeliveryStatus.PENDING
+                stats["retried"] += 1
+            else:
+                status = DeliveryStatus.FAILED
+                stats["failed"] += 1
+            retry_at = None
+            if status == DeliveryStatus.PENDING:
+                retry_at = now + timedelta(seconds=self.retry_delay * 2 ** (attempt - 1))
+            changes.append({
+                "issue_id": issue_id,
+                "subscriber_id": subscriber_id,
+                "status": status,
+                "last_error": error,
+                "next_attempt_at": retry_at,
+                "sent_at": now if sent else None,
+            })
+        db.execute(update(NewsletterDelivery), changes)
+        db.commit()
+
+    def _unfinished(self, db, issue_id: int) -> int:
+        return db.execute(
+            select(func.count()).select_from(NewsletterDelivery).where(
+                NewsletterDelivery.issue_id == issue_id,
+                NewsletterDelivery.status.in_([DeliveryStatus.PENDING, DeliveryStatus.SENDING]),
+            )
+        ).scalar_one()
@@ -0,0 +1,93 @@
+"""
+Opaque keyset cursors for list endpoints.
+
+A cursor is the sort key of the last row on a page, base64url-encoded so
+clients treat it as a token. The next page is fetched with a range
+predicate on that key instead of OFFSET, so page 10,000 costs the same
+index range scan as page 1. The cursor for the following page is sent in
+the X-Next-Cursor response header, which keeps the list bodies unchanged.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import HTTPException, Response, status
+from sqlalchemy import DateTime, bindparam, tuple_
+from sqlalchemy.dialects import sqlite
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Largest `limit` a list endpoint accepts, so one request can't pull a whole table
+MAX_PAGE_SIZE = 200
+
+# SQLite stores server_default=func.now() as "YYYY-MM-DD HH:MM:SS" text, so
+# the cursor timestamp has to be bound in that same format to compare equal.
+_CURSOR_TIMESTAMP = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(truncate_microseconds=True), "sqlite"
+)
+
+def encode_cursor(*values) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list):
+            raise ValueError("cursor payload must be a list")
+        return values
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise _invalid_cursor()
+
+def paginate_by_id(query, id_column, cursor: Optional[str], skip: int, limit: int):
+    """Order by id ascending and start after the cursor (or at `skip` without one)"""
+    query = query.order_by(id_column.asc())
+    if cursor:
+        (last_id,) = _unpack(cursor, int)
+        query = query.where(id_column > last_id)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def paginate_by_created(query, created_column, id_column, cursor: Optional[str], skip: int, limit: int):
+    """Order newest first on (created_at, id) and start after the cursor"""
+    query = query.order_by(created_column.desc(), id_column.desc())
+    if cursor:
+        last_created, last_id = _unpack(cursor, datetime.fromisoformat, int)
+        query = query.where(
+            tuple_(created_column, id_column)
+            < tuple_(bindparam("cursor_created_at", last_created, type_=_CURSOR_TIMESTAMP), last_id)
+        )
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def next_cursor(rows: list, limit: int, *key_attrs: str) -> Optional[str]:
+    """Cursor for the page after `rows`, or None if this page was the last"""
+    if rows and len(rows) >= limit:
+        last = rows[-1]
+        return encode_cursor(*(getattr(last, attr) for attr in key_attrs))
+    return None
+
+def set_next_cursor(response: Response, rows: list, limit: int, *key_attrs: str):
+    """Expose the cursor for the page after `rows` if this page was full"""
+    cursor = next_cursor(rows, limit, *key_attrs)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
+
+def _unpack(cursor: str, *parsers) -> list:
+    values = decode_cursor(cursor)
+    if len(values) != len(parsers):
+        raise _invalid_cursor()
+    try:
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (TypeError, ValueError):
+        raise _invalid_cursor()
@@ -0,0 +1,208 @@
+"""
+Opt-in per-request profiling, for finding where a slow endpoint spends its time.
+
+With PROFILING_ENABLED, a request is profiled when an admin sends
+"X-Profile: 1", or when it falls in the PROFILING_SAMPLE_RATE sample. A
+profile holds:
+
+  - the hottest functions from cProfile, by cumulative and by own time
+    (Pydantic validation/serialization and routing show up here)
+  - every SQL statement with its duration (statements only, no parameters)
+  - time waiting for and running bcrypt on the hashing pool
+  - time spent in send(), i.e. handing the response to the server and client
+
+The last PROFILING_BUFFER_SIZE profiles are kept in a per-process ring
+buffer, read through /api/admin/profiles; profiled responses carry their id
+in X-Profile-Id.
+
+cProfile sees the whole thread, so only one request is profiled at a time
+(others run unprofiled) and coroutines of concurrent requests that run while
+it awaits are included. With profiling disabled nothing is installed: no
+middleware, no SQL hooks.
+"""
+import cProfile
+import os
+import pstats
+import random
+import sys
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi.security.utils import get_authorization_scheme_param
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers
+from app.auth import load_principal, token_subject
+from app.config import settings
+from app import database
+from app.models import UserRole
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+TOP_FUNCTIONS = 25
+MAX_STATEMENTS = 200
+
+SUMMARY_FIELDS = ("id", "method", "path", "status", "trigger", "started_at", "duration_ms", "sql_count", "sql_ms")
+
+profiles: deque = deque(maxlen=settings.PROFILING_BUFFER_SIZE)
+
+class RequestProfile:
+    def __init__(self, scope, trigger: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query = scope.get("query_string", b"").decode("latin-1")
+        self.trigger = trigger
+        self.started_at = datetime.now(timezone.utc)
+        self.statements: list[dict] = []
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.timings: dict[str, float] = {}
+
+    def add_statement(self, statement: str, seconds: float, executemany: bool):
+        self.sql_count += 1
+        self.sql_seconds += seconds
+        if len(self.statements) < MAX_STATEMENTS:
+            self.statements.append({
+                "sql": " ".join(statement.split()),
+                "ms": round(seconds * 1000, 3),
+                "executemany": executemany,
+            })
+
+    def add_timing(self, name: str, seconds: float):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def finish(self, profiler: cProfile.Profile, status_code: int, duration: float) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": status_code,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(duration * 1000, 3),
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql_seconds * 1000, 3),
+            "query": self.query,
+            "timings_ms": {name: round(seconds * 1000, 3) for name, seconds in self.timings.items()},
+            "sql": self.statements,
+            "sql_truncated": self.sql_count > len(self.statements),
+            **_function_stats(profiler),
+        }
+
+def _short_filename(filename: str) -> str:
+    for root in sorted(sys.path, key=len, reverse=True):
+        if root and filename.startswith(root + os.sep):
+            return filename[len(root) + 1:]
+    return filename
+
+def _function_stats(profiler: cProfile.Profile) -> dict:
+    stats = pstats.Stats(profiler).stats
+
+    def rows(sort_index: int) -> list[dict]:
+        ordered = sorted(stats.items(), key=lambda item: item[1][sort_index], reverse=True)
+        return [
+            {
+                "function": f"{_short_filename(filename)}:{line}({name})",
+                "calls": calls,
+                "own_ms": round(own * 1000, 3),
+                "cumulative_ms": round(cumulative * 1000, 3),
+            }
+            for (filename, line, name), (_, calls, own, cumulative, _) in ordered[:TOP_FUNCTIONS]
+        ]
+
+    return {"by_cumulative_time": rows(3), "by_own_time": rows(2)}
+
+_active: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+_profiler_busy = False
+
+def add_timing(name: str, seconds: float):
+    """Attribute time spent off the event loop (e.g. bcrypt) to the request being profiled"""
+    profile = _active.get()
+    if profile is not None:
+        profile.add_timing(name, seconds)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get() is not None:
+        context._profile_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active.get()
+    started = getattr(context, "_profile_started", None)
+    if profile is not None and started is not None:
+        profile.add_statement(statement, time.perf_counter() - started, executemany)
+
+def install_sql_hooks():
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+async def _requested_by_admin(headers: Headers) -> bool:
+    if headers.get(PROFILE_HEADER, "").lower() not in ("1", "true"):
+        return False
+    scheme, token = get_authorization_scheme_param(headers.get("authorization"))
+    subject = token_subject(token) if scheme.lower() == "bearer" else None
+    if subject is None:
+        return False
+    async with database.AsyncSessionLocal() as db:
+        principal = await load_principal(subject, db)
+    return principal is not None and principal.is_active and principal.role == UserRole.ADMIN
+
+def list_profiles() -> list[dict]:
+    """Summaries of the buffered profiles, newest first"""
+    return [{field: profile[field] for field in SUMMARY_FIELDS} for profile in reversed(profiles)]
+
+def get_profile(profile_id: str) -> Optional[dict]:
+    return next((profile for profile in profiles if profile["id"] == profile_id), None)
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _profiler_busy:
+            await self.app(scope, receive, send)
+            return
+        if await _requested_by_admin(Headers(scope=scope)):
+            trigger = "header"
+        elif settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE:
+            trigger = "sample"
+        else:
+            await self.app(scope, receive, send)
+            return
+        await self._profile(scope, receive, send, trigger)
+
+    async def _profile(self, scope, receive, send, trigger: str):
+        global _profiler_busy
+        if _profiler_busy:
+            # Another request started profiling while the admin check awaited
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile(scope, trigger)
+        status_code = 500
+
+        async def send_timed(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]
+            sent_at = time.perf_counter()
+            await send(message)
+            profile.add_timing("send", time.perf_counter() - sent_at)
+
+        profiler = cProfile.Profile()
+        _profiler_busy = True
+        token = _active.set(profile)
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - started
+            _active.reset(token)
+            _profiler_busy = False
+            profiles.append(profile.finish(profiler, status_code, duration))
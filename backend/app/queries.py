@@ -0,0 +1,81 @@
+"""
+Shared query builders for endpoints that embed related rows.
+
+Responses such as PostWithAuthor and AlumniProfileWithUser serialize a
+many-to-one relationship for every row. Loading it lazily costs one round
+trip per row (and is not allowed at all on an AsyncSession), so every list
+and detail endpoint builds its SELECT from here with the relationship
+joined into the same statement.
+"""
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+from app.models import User, Post, PostStatus, AlumniProfile
+
+# author_id / user_id are NOT NULL, so an inner join is safe and plans better
+POST_WITH_AUTHOR = (joinedload(Post.author, innerjoin=True),)
+PROFILE_WITH_USER = (joinedload(AlumniProfile.user, innerjoin=True),)
+
+def select_posts_with_author():
+    return select(Post).options(*POST_WITH_AUTHOR)
+
+def select_profiles_with_user():
+    return select(AlumniProfile).options(*PROFILE_WITH_USER)
+
+def select_post_feed(status: PostStatus):
+    """Feed filtered on one status; served by ix_posts_status_created_at_id"""
+    return select_posts_with_author().where(Post.status == status)
+
+def select_post_feed_keys(status: PostStatus):
+    """(id, post stamp, author stamp) of feed rows, for ETag aggregates"""
+    return (
+        select(
+            Post.id,
+            func.coalesce(Post.updated_at, Post.created_at),
+            func.coalesce(User.updated_at, User.created_at),
+        )
+        .join(Post.author)
+        .where(Post.status == status)
+    )
+
+def select_profile_keys():
+    """(id, profile stamp, user stamp) of profile rows, for ETag aggregates"""
+    return select(
+        AlumniProfile.id,
+        func.coalesce(AlumniProfile.updated_at, AlumniProfile.created_at),
+        func.coalesce(User.updated_at, User.created_at),
+    ).join(AlumniProfile.user)
+
+def profile_filters(
+    graduation_year_min: Optional[int] = None,
+    graduation_year_max: Optional[int] = None,
+    major: Optional[str] = None,
+    company: Optional[str] = None,
+) -> list:
+    """WHERE conditions for the alumni directory filters"""
+    conditions = []
+    if graduation_year_min is not None:
+        conditions.append(AlumniProfile.graduation_year >= graduation_year_min)
+    if graduation_year_max is not None:
+        conditions.append(AlumniProfile.graduation_year <= graduation_year_max)
+    if major is not None:
+        conditions.append(AlumniProfile.major == major)
+    if company is not None:
+        conditions.append(AlumniProfile.company == company)
+    return conditions
+
+def select_author_posts(author_id: int):
+    """One author's posts, newest first; served by ix_posts_author_id_created_at_id"""
+    return (
+        select_posts_with_author()
+        .where(Post.author_id == author_id)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+    )
+
+def select_pending_posts():
+    """Moderation queue, newest first; served by ix_posts_status_created_at_id"""
+    return (
+        select(Post)
+        .where(Post.status == PostStatus.PENDING)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+    )
@@ -0,0 +1,265 @@
+"""
+Token-bucket rate limiting for the public endpoints that are costly to abuse:
+login and register each run a bcrypt operation, and subscribe writes a row.
+
+Each limited route has a per-IP bucket and, keyed by the email in the JSON
+body, a per-account bucket, configured as "<requests>/<period>" settings
+(RATE_LIMIT_LOGIN_PER_IP="30/minute" allows bursts of 30, refilled at 30 a
+minute). A request takes one token from each; when either is empty it gets a
+429 with Retry-After. RateLimitMiddleware decides before the request reaches
+the app, so a rejected request does no database or bcrypt work.
+
+Buckets live in this process (MemoryRateLimitBackend) unless CACHE_URL is
+set, in which case every worker shares them in Redis
+(RedisRateLimitBackend). The client IP is the connection's peer address; run
+uvicorn with --proxy-headers behind a proxy so it is the real client's.
+"""
+import json
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from starlette.responses import JSONResponse
+from app.config import settings
+from app.metrics import Counter, registry
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Limited routes and the prefix of the settings that configure them (<PREFIX>_PER_IP, <PREFIX>_PER_ACCOUNT)
+LIMITED_ROUTES = {
+    ("POST", "/api/auth/login"): "RATE_LIMIT_LOGIN",
+    ("POST", "/api/auth/register"): "RATE_LIMIT_REGISTER",
+    ("POST", "/api/newsletter/subscribe"): "RATE_LIMIT_SUBSCRIBE",
+}
+
+# Largest body a per-account limited route accepts: its JSON is a few short fields, and the
+# middleware holds the body in memory to find the account
+MAX_ACCOUNT_BODY_BYTES = 16 * 1024
+
+rejections = registry.register(Counter(
+    "rate_limit_rejections_total", "Requests refused by a rate limit", ("route", "bucket"),
+))
+
+@dataclass(frozen=True)
+class Rate:
+    capacity: float
+    per_second: float
+
+    @classmethod
+    def parse(cls, value: str) -> Optional["Rate"]:
+        """'30/minute' or '30/60' (seconds); empty means no limit"""
+        if not value.strip():
+            return None
+        count, _, period = value.partition("/")
+        period = period.strip().lower()
+        seconds = PERIODS[period] if period in PERIODS else float(period or 1)
+        if float(count) <= 0 or seconds <= 0:
+            raise ValueError(f"Invalid rate limit: {value!r}")
+        return cls(capacity=float(count), per_second=float(count) / seconds)
+
+class RateLimitBackend:
+    """Token buckets by key"""
+
+    async def take(self, key: str, rate: Rate) -> float:
+        """Take a token from key's bucket: 0 if there was one, otherwise seconds until there is"""
+        raise NotImplementedError
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Buckets in this process. The least recently used are dropped past
+    max_keys; a dropped bucket starts again full, which only ever lets a
+    client through sooner.
+    """
+
+    def __init__(self, max_keys: int = 100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        # key -> [tokens, refilled_at]
+        self._buckets: OrderedDict[str, list] = OrderedDict()
+
+    async def take(self, key: str, rate: Rate) -> float:
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [rate.capacity, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(rate.capacity, bucket[0] + (now - bucket[1]) * rate.per_second)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate.per_second
+
+    def clear(self):
+        self._buckets.clear()
+
+# Refill and take in one step on the Redis server, timed by its clock so
+# workers with skewed clocks agree. Idle buckets expire once they'd be full.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local per_second = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(bucket[1]) or capacity
+local at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - at) * per_second)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / per_second
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / per_second * 1000))
+return tostring(wait)
+"""
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Buckets shared by every worker through Redis (requires the `redis`
+    package). `client` replaces the connection made from `url`; anything with
+    redis-py's async register_script() works, such as a local fake.
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "alumni:rate-limit:", client=None):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError("CACHE_URL is set but the 'redis' package is not installed")
+            client = redis.from_url(url)
+        self.prefix = prefix
+        self._client = client
+        self._take = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, rate: Rate) -> float:
+        wait = await self._take(keys=[self.prefix + key], args=[rate.capacity, rate.per_second])
+        return float(wait)
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    """Shared Redis buckets when CACHE_URL is configured, otherwise per-process memory"""
+    if settings.CACHE_URL:
+        return RedisRateLimitBackend(settings.CACHE_URL)
+    return MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+def configured_limits() -> dict[tuple[str, str], tuple[Optional[Rate], Optional[Rate]]]:
+    """(per-IP, per-account) rates of each limited route that has any, read from the settings"""
+    limits = {}
+    for route, prefix in LIMITED_ROUTES.items():
+        per_ip = Rate.parse(getattr(settings, f"{prefix}_PER_IP"))
+        per_account = Rate.parse(getattr(settings, f"{prefix}_PER_ACCOUNT"))
+        if per_ip or per_account:
+            limits[route] = (per_ip, per_account)
+    return limits
+
+def account_from_body(body: bytes) -> Optional[str]:
+    """The normalized email of a JSON body, or None if there isn't one to key on"""
+    try:
+        email = json.loads(body).get("email")
+    except (ValueError, AttributeError):
+        return None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+class RateLimiter:
+    def __init__(self, limits: dict, backend: RateLimitBackend):
+        self.limits = limits
+        self.backend = backend
+
+    async def check_ip(self, method: str, path: str, client_ip: str) -> float:
+        """Seconds to wait, or 0 when this IP may go ahead (and a token was taken)"""
+        rate = self.limits[(method, path)][0]
+        if rate is None:
+            return 0.0
+        wait = await self.backend.take(f"ip:{path}:{client_ip}", rate)
+        if wait:
+            rejections.inc((path, "ip"))
+        return wait
+
+    async def check_account(self, method: str, path: str, account: str) -> float:
+        """As check_ip, for the account the request names"""
+        rate = self.limits[(method, path)][1]
+        if rate is None:
+            return 0.0
+        wait = await self.backend.take(f"account:{path}:{account}", rate)
+        if wait:
+            rejections.inc((path, "account"))
+        return wait
+
+def too_many_requests(wait: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": "Too many requests, please retry later"},
+        status_code=429,
+        headers={"Retry-After": str(max(1, math.ceil(wait)))},
+    )
+
+def body_too_large() -> JSONResponse:
+    return JSONResponse(
+        {"detail": f"Request body can be at most {MAX_ACCOUNT_BODY_BYTES} bytes"},
+        status_code=413,
+    )
+
+class RateLimitMiddleware:
+    """Applies the route's per-IP bucket, then reads the body for its per-account one"""
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.limiter.limits:
+            await self.app(scope, receive, send)
+            return
+        method, path = scope["method"], scope["path"]
+        client = scope.get("client")
+        wait = await self.limiter.check_ip(method, path, client[0] if client else "unknown")
+        if wait:
+            await too_many_requests(wait)(scope, receive, send)
+            return
+        if self.limiter.limits[(method, path)][1] is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Read the whole body for the email, then hand the same body on to the app. Past
+        # MAX_ACCOUNT_BODY_BYTES it is refused rather than buffered, or passed on unkeyed,
+        # which would let padding the JSON get around the per-account bucket
+        declared = dict(scope.get("headers", [])).get(b"content-length", b"")
+        if declared.isdigit() and int(declared) > MAX_ACCOUNT_BODY_BYTES:
+            await body_too_large()(scope, receive, send)
+            return
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                # Client went away
+                return
+            chunks.append(message.get("body", b""))
+            size += len(chunks[-1])
+            if size > MAX_ACCOUNT_BODY_BYTES:
+                await body_too_large()(scope, receive, send)
+                return
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        account = account_from_body(body)
+        if account is not None:
+            wait = await self.limiter.check_account(method, path, account)
+            if wait:
+                await too_many_requests(wait)(scope, receive, send)
+                return
+
+        replayed = False
+
+        async def receive_body():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        await self.app(scope, receive_body, send)
@@ -0,0 +1,90 @@
+import asyncio
+import uuid
+from typing import Awaitable, Callable, Optional
+from app.cache import CacheBackend, create_cache_backend
+from app.config import settings
+
+class ResponseCache:
+    """
+    Read-through cache for rendered responses, e.g. the public posts feed.
+
+    Entries are keyed under a version token. invalidate() swaps the token,
+    which orphans every cached page at once (they then age out by TTL), and
+    works the same on a shared backend without scanning keys. The version is
+    read before the page is built, so a build racing with a write can only
+    ever land under the old version.
+
+    Concurrent misses for the same key within a worker share one rebuild
+    instead of stampeding the database.
+    """
+
+    VERSION_TTL = 24 * 60 * 60
+
+    def __init__(self, name: str, backend: CacheBackend, ttl: float):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    async def _version(self) -> str:
+        version_key = f"{self.name}:version"
+        version = await self.backend.get(version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            await self.backend.set(version_key, version, self.VERSION_TTL)
+        return version
+
+    async def get_or_build(self, key: str, build: Callable[[], Awaitable[dict]]) -> dict:
+        """Return the cached entry for `key`, building (once per worker) on a miss"""
+        full_key = f"{self.name}:{await self._version()}:{key}"
+        entry = await self.backend.get(full_key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        pending: Optional[asyncio.Future] = self._inflight.get(full_key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            entry = await build()
+            await self.backend.set(full_key, entry, self.ttl)
+            future.set_result(entry)
+            return entry
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Waiters re-raise it; mark it retrieved so an unwatched future doesn't warn
+            future.exception()
+            raise
+        finally:
+            del self._inflight[full_key]
+
+    async def invalidate(self):
+        self.invalidations += 1
+        await self.backend.set(f"{self.name}:version", uuid.uuid4().hex, self.VERSION_TTL)
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+feed_cache = ResponseCache("posts-feed", create_cache_backend(), settings.FEED_CACHE_TTL_SECONDS)
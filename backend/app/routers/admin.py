@@ -1,71 +1,251 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models import User, Post, PostStatus
-from app.schemas import PostResponse, UserResponse
-from app.auth import get_current_admin
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, pool_metrics
+from app.models import User, Post, PostStatus, UserImportJob
+from app.schemas import (
+    PostResponse,
+    UserResponse,
+    BulkPostSelection,
+    BulkModerationResult,
+    UserImportJobResponse,
+    AdminStats
+)
+from app.auth import Principal, get_current_admin, get_streaming_admin, invalidate_principal
+from app.hashing import password_hasher
+from app.media import thumbnail_pool
+from app.pagination import MAX_PAGE_SIZE, paginate_by_id, set_next_cursor
+from app.export import ExportFormat, export_response, select_export_columns
+from app.user_import import import_jobs
+from app.queries import select_pending_posts
+from app.response_cache import feed_cache
+from app import profiling
+from app import search
+from app.events import event_stream_response, moderation_events, post_event, publish_status_changes
+from app.counters import ACTIVE_USERS, apply_stat_changes, load_stats, post_status_changes
 
 router = APIRouter()
 
+# Posts matched by one bulk request; filter-only requests act on the oldest this many
+BULK_MODERATION_LIMIT = 1000
+
+@router.get("/stats", response_model=AdminStats)
+async def get_stats(
+    days: int = Query(30, ge=1, le=366),
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Dashboard totals and the last `days` days of growth, from the maintained counters"""
+    return await load_stats(db, days)
+
 @router.get("/posts/pending", response_model=list[PostResponse])
 async def get_pending_posts(
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
 ):
-    posts = db.query(Post).filter(Post.status == PostStatus.PENDING).order_by(Post.created_at.desc()).all()
+    result = await db.execute(select_pending_posts())
+    posts = result.scalars().all()
     return posts
 
+@router.get("/posts/events")
+async def stream_moderation_events(
+    current_user: Principal = Depends(get_streaming_admin)
+):
+    """Server-Sent Events: post.created, post.approved, post.rejected and post.deleted as they happen"""
+    return event_stream_response(moderation_events)
+
 @router.put("/posts/{post_id}/approve", response_model=PostResponse)
 async def approve_post(
     post_id: int,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.get(Post, post_id, with_for_update=True)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
     
+    await apply_stat_changes(db, post_status_changes([post.status], PostStatus.APPROVED))
     post.status = PostStatus.APPROVED
-    db.commit()
-    db.refresh(post)
+    await search.index_post(db, post)
+    await db.commit()
+    await db.refresh(post)
+    await feed_cache.invalidate()
+    await moderation_events.publish(post_event("post.approved", post))
     return post
 
 @router.put("/posts/{post_id}/reject", response_model=PostResponse)
 async def reject_post(
     post_id: int,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.get(Post, post_id, with_for_update=True)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
     
+    await apply_stat_changes(db, post_status_changes([post.status], PostStatus.REJECTED))
     post.status = PostStatus.REJECTED
-    db.commit()
-    db.refresh(post)
+    await search.remove_post(db, post.id)
+    await db.commit()
+    await db.refresh(post)
+    await feed_cache.invalidate()
+    await moderation_events.publish(post_event("post.rejected", post))
     return post
 
+async def _select_bulk_targets(db: AsyncSession, selection: BulkPostSelection) -> dict[int, PostStatus]:
+    """Current status of every selected post, locked for the rest of the transaction"""
+    filters = (selection.status, selection.author_id, selection.created_before)
+    if selection.ids is None and all(value is None for value in filters):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide ids or at least one filter"
+        )
+    query = select(Post.id, Post.status)
+    if selection.ids is not None:
+        query = query.where(Post.id.in_(selection.ids))
+    if selection.status is not None:
+        query = query.where(Post.status == selection.status)
+    if selection.author_id is not None:
+        query = query.where(Post.author_id == selection.author_id)
+    if selection.created_before is not None:
+        query = query.where(Post.created_at < selection.created_before)
+    query = query.order_by(Post.id).limit(BULK_MODERATION_LIMIT).with_for_update()
+    result = await db.execute(query)
+    return {post_id: post_status for post_id, post_status in result}
+
+def _bulk_result(action: str, outcome: str, selection: BulkPostSelection, targets: dict, changed: list[int]):
+    changed_ids = set(changed)
+    ids = list(dict.fromkeys(selection.ids)) if selection.ids is not None else list(targets)
+    results = []
+    for post_id in ids:
+        if post_id not in targets:
+            results.append({"id": post_id, "outcome": "not_found"})
+        elif post_id in changed_ids:
+            results.append({"id": post_id, "outcome": outcome})
+        else:
+            results.append({"id": post_id, "outcome": "unchanged"})
+    return {"action": action, "changed": len(changed_ids), "results": results}
+
+async def _bulk_set_status(db: AsyncSession, selection: BulkPostSelection, new_status: PostStatus) -> tuple:
+    targets = await _select_bulk_targets(db, selection)
+    changed = [post_id for post_id, post_status in targets.items() if post_status != new_status]
+    if changed:
+        await db.execute(
+            update(Post)
+            .where(Post.id.in_(changed))
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+        if new_status == PostStatus.APPROVED:
+            await search.index_posts(db, changed)
+        else:
+            await search.remove_posts(db, changed)
+        await apply_stat_changes(db, post_status_changes((targets[post_id] for post_id in changed), new_status))
+    await db.commit()
+    if changed:
+        await feed_cache.invalidate()
+        await publish_status_changes(changed, new_status)
+    return targets, changed
+
+@router.post("/posts/bulk/approve", response_model=BulkModerationResult)
+async def bulk_approve_posts(
+    selection: BulkPostSelection,
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Approve many posts with one UPDATE in one transaction"""
+    targets, changed = await _bulk_set_status(db, selection, PostStatus.APPROVED)
+    return _bulk_result("approve", "approved", selection, targets, changed)
+
+@router.post("/posts/bulk/reject", response_model=BulkModerationResult)
+async def bulk_reject_posts(
+    selection: BulkPostSelection,
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Reject many posts with one UPDATE in one transaction"""
+    targets, changed = await _bulk_set_status(db, selection, PostStatus.REJECTED)
+    return _bulk_result("reject", "rejected", selection, targets, changed)
+
+@router.post("/posts/bulk/delete", response_model=BulkModerationResult)
+async def bulk_delete_posts(
+    selection: BulkPostSelection,
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Delete many posts with one DELETE in one transaction"""
+    targets = await _select_bulk_targets(db, selection)
+    changed = list(targets)
+    if changed:
+        await db.execute(
+            delete(Post).where(Post.id.in_(changed)).execution_options(synchronize_session=False)
+        )
+        await search.remove_posts(db, changed)
+        await apply_stat_changes(db, post_status_changes(targets.values(), None))
+    await db.commit()
+    if changed:
+        await feed_cache.invalidate()
+        await publish_status_changes(changed, None)
+    return _bulk_result("delete", "deleted", selection, targets, changed)
+
 @router.get("/users", response_model=list[UserResponse])
 async def get_all_users(
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    response: Response,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True, description="Use cursor instead"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
 ):
-    users = db.query(User).offset(skip).limit(limit).all()
+    result = await db.execute(paginate_by_id(select(User), User.id, cursor, skip, limit))
+    users = result.scalars().all()
+    set_next_cursor(response, users, limit, "id")
     return users
 
+@router.get("/users/export")
+async def export_users(
+    format: ExportFormat = Query("ndjson"),
+    current_user: Principal = Depends(get_current_admin)
+):
+    """Stream every user as NDJSON or CSV"""
+    return export_response(select_export_columns(User, UserResponse), UserResponse, format, "users")
+
+@router.post("/users/import", response_model=UserImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def import_users_csv(
+    file: UploadFile = File(...),
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Start creating alumni accounts (and profiles) from a CSV; poll the returned job for its report"""
+    return await import_jobs.start(db, file.file)
+
+@router.get("/users/import/{job_id}", response_model=UserImportJobResponse)
+async def get_import_job(
+    job_id: int,
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Progress of an import, and once done its report: bad rows are reported, not fatal"""
+    job = await db.get(UserImportJob, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import not found"
+        )
+    return job
+
 @router.put("/users/{user_id}/toggle-active", response_model=UserResponse)
 async def toggle_user_active(
     user_id: int,
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     if user_id == current_user.id:
         raise HTTPException(
@@ -73,7 +253,7 @@ async def toggle_user_active(
             detail="Cannot deactivate yourself"
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id, with_for_update=True)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -81,9 +261,66 @@ async def toggle_user_active(
         )
     
     user.is_active = not user.is_active
-    db.commit()
-    db.refresh(user)
+    await apply_stat_changes(db, {ACTIVE_USERS: 1 if user.is_active else -1})
+    await db.commit()
+    await db.refresh(user)
+    await invalidate_principal(user.email)
+    # The feed embeds each author's is_active
+    await feed_cache.invalidate()
     return user
 
+@router.get("/metrics/password-hashing")
+async def get_password_hashing_metrics(
+    current_user: Principal = Depends(get_current_admin)
+):
+    """Hash latency, queue wait and backpressure counters for the bcrypt pool"""
+    return password_hasher.metrics()
 
+@router.get("/metrics/feed-cache")
+async def get_feed_cache_metrics(
+    current_user: Principal = Depends(get_current_admin)
+):
+    """Hit/miss counters for the public posts feed response cache"""
+    return feed_cache.metrics()
+
+@router.get("/metrics/events")
+async def get_event_metrics(
+    current_user: Principal = Depends(get_current_admin)
+):
+    """Moderation event stream subscribers in this worker, events published and slow subscribers cut off"""
+    return moderation_events.metrics()
 
+@router.get("/metrics/thumbnails")
+async def get_thumbnail_metrics(
+    current_user: Principal = Depends(get_current_admin)
+):
+    """Profile picture thumbnail pool in this worker: queue, refusals, failures and time per picture"""
+    return thumbnail_pool.metrics()
+
+@router.get("/metrics/db-pool")
+async def get_db_pool_metrics(
+    current_user: Principal = Depends(get_current_admin)
+):
+    """Connection pool usage per engine: in-use/overflow connections, checkout waits and timeouts"""
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items() if metrics.pool is not None}
+
+@router.get("/profiles")
+async def get_request_profiles(
+    current_user: Principal = Depends(get_current_admin)
+):
+    """Recent request profiles in this worker, newest first (PROFILING_ENABLED)"""
+    return profiling.list_profiles()
+
+@router.get("/profiles/{profile_id}")
+async def get_request_profile(
+    profile_id: str,
+    current_user: Principal = Depends(get_current_admin)
+):
+    """One profile: hottest functions, SQL statements with timings, hashing and send time"""
+    profile = profiling.get_profile(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return profile
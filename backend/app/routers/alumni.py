@@ -1,25 +1,44 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
+from app.db_routing import get_read_db
 from app.models import User, AlumniProfile
 from app.schemas import (
     AlumniProfileCreate,
     AlumniProfileUpdate,
     AlumniProfileResponse,
-    AlumniProfileWithUser
+    AlumniProfileWithUser,
+    ProfileFacets,
+    ProfilePictureUpload
+)
+from app.auth import Principal, get_current_active_user
+from app.queries import select_profiles_with_user, select_profile_keys, profile_filters
+from app.pagination import MAX_PAGE_SIZE, paginate_by_id, set_next_cursor
+from app import media, search
+from app.facets import apply_facet_changes, facet_values, load_facets
+from app.etag import (
+    PUBLIC_REVALIDATE,
+    etag_matches,
+    make_etag,
+    not_modified,
+    row_stamp,
+    stamp_from_query,
+    stamp_from_rows,
 )
-from app.auth import get_current_active_user
 
 router = APIRouter()
 
 @router.post("/profile", response_model=AlumniProfileResponse, status_code=status.HTTP_201_CREATED)
 async def create_alumni_profile(
     profile_data: AlumniProfileCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     # Check if profile already exists
-    existing_profile = db.query(AlumniProfile).filter(AlumniProfile.user_id == current_user.id).first()
+    result = await db.execute(select(AlumniProfile).where(AlumniProfile.user_id == current_user.id))
+    existing_profile = result.scalars().first()
     if existing_profile:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -28,16 +47,22 @@ async def create_alumni_profile(
     
     db_profile = AlumniProfile(user_id=current_user.id, **profile_data.model_dump())
     db.add(db_profile)
-    db.commit()
-    db.refresh(db_profile)
+    await db.flush()
+    await search.index_profile(db, db_profile, await db.get(User, current_user.id))
+    await apply_facet_changes(db, {}, facet_values(db_profile))
+    await db.commit()
+    await db.refresh(db_profile)
     return db_profile
 
 @router.get("/profile", response_model=AlumniProfileWithUser)
 async def get_my_profile(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    profile = db.query(AlumniProfile).filter(AlumniProfile.user_id == current_user.id).first()
+    result = await db.execute(
+        select_profiles_with_user().where(AlumniProfile.user_id == current_user.id)
+    )
+    profile = result.scalars().first()
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -48,39 +73,128 @@ async def get_my_profile(
 @router.put("/profile", response_model=AlumniProfileResponse)
 async def update_my_profile(
     profile_data: AlumniProfileUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    profile = db.query(AlumniProfile).filter(AlumniProfile.user_id == current_user.id).first()
+    result = await db.execute(select(AlumniProfile).where(AlumniProfile.user_id == current_user.id))
+    profile = result.scalars().first()
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Profile not found"
         )
     
+    facets_before = facet_values(profile)
     update_data = profile_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(profile, field, value)
     
-    db.commit()
-    db.refresh(profile)
+    await search.index_profile(db, profile, await db.get(User, current_user.id))
+    await apply_facet_changes(db, facets_before, facet_values(profile))
+    await db.commit()
+    await db.refresh(profile)
     return profile
 
+async def _my_profile_id(db: AsyncSession, user_id: int) -> int:
+    profile_id = (await db.execute(select(AlumniProfile.id).where(AlumniProfile.user_id == user_id))).scalar()
+    if profile_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    return profile_id
+
+@router.put("/profile/picture", response_model=ProfilePictureUpload)
+async def upload_profile_picture(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload a profile picture as the raw request body (Content-Type image/jpeg,
+    image/png, image/webp or image/gif). Answers 202 while its thumbnails are
+    made; the profile shows the picture once they exist.
+    """
+    profile_id = await _my_profile_id(db, current_user.id)
+    # Ends the read transaction, so a slow upload doesn't hold a pooled connection
+    await db.rollback()
+    digest = await media.receive_upload(request)
+    if media.thumbnails_exist(digest):
+        media.thumbnail_pool.supersede(profile_id)
+        await media.set_profile_picture(db, profile_id, digest)
+        await db.commit()
+        return ProfilePictureUpload(status="ready", thumbnails=media.thumbnail_urls(digest))
+    media.thumbnail_pool.attach_when_ready(profile_id, digest)
+    response.status_code = status.HTTP_202_ACCEPTED
+    return ProfilePictureUpload(status="processing", thumbnails=media.thumbnail_urls(digest))
+
+@router.delete("/profile/picture", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_profile_picture(
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Stop showing the uploaded picture; its files stay until scripts.rebuild_thumbnails --prune"""
+    profile_id = await _my_profile_id(db, current_user.id)
+    media.thumbnail_pool.supersede(profile_id)
+    await media.set_profile_picture(db, profile_id, None)
+    await db.commit()
+
 @router.get("/profiles", response_model=list[AlumniProfileWithUser])
 async def get_all_profiles(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True, description="Use cursor instead"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    graduation_year_min: Optional[int] = None,
+    graduation_year_max: Optional[int] = None,
+    major: Optional[str] = None,
+    company: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    profiles = db.query(AlumniProfile).offset(skip).limit(limit).all()
+    filters = profile_filters(graduation_year_min, graduation_year_max, major, company)
+
+    def page_etag(stamp: tuple) -> str:
+        return make_etag(
+            "profiles", cursor, skip, limit,
+            graduation_year_min, graduation_year_max, major, company, *stamp
+        )
+
+    # Revalidation: compare against an aggregate over the page's keys before loading rows
+    if request.headers.get("if-none-match"):
+        keys = paginate_by_id(select_profile_keys().where(*filters), AlumniProfile.id, cursor, skip, limit)
+        etag = page_etag(await stamp_from_query(db, keys))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+    query = paginate_by_id(select_profiles_with_user().where(*filters), AlumniProfile.id, cursor, skip, limit)
+    result = await db.execute(query)
+    profiles = result.scalars().all()
+    set_next_cursor(response, profiles, limit, "id")
+    response.headers["ETag"] = page_etag(
+        stamp_from_rows(profiles, row_stamp, lambda profile: row_stamp(profile.user))
+    )
+    response.headers["Cache-Control"] = PUBLIC_REVALIDATE
     return profiles
 
+@router.get("/facets", response_model=ProfileFacets)
+async def get_profile_facets(
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Alumni counts per graduation year, major and company (most common first)"""
+    return await load_facets(db, limit)
+
 @router.get("/profiles/{profile_id}", response_model=AlumniProfileWithUser)
 async def get_profile_by_id(
     profile_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    profile = db.query(AlumniProfile).filter(AlumniProfile.id == profile_id).first()
+    result = await db.execute(
+        select_profiles_with_user().where(AlumniProfile.id == profile_id)
+    )
+    profile = result.scalars().first()
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,24 +1,28 @@
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import User, UserRole
 from app.schemas import UserCreate, UserResponse, Token, LoginRequest
 from app.auth import (
-    verify_password,
-    get_password_hash,
     create_access_token,
     get_current_active_user,
-    get_current_user
+    get_current_user,
+    Principal
 )
 from app.config import settings
+from app.hashing import password_hasher
+from app.counters import ACTIVE_USERS, USERS, apply_stat_changes
+from app.etag import PRIVATE_REVALIDATE, etag_matches, make_etag, not_modified, row_stamp
 
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    db_user = result.scalars().first()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -26,7 +30,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     db_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -34,14 +38,16 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         role=UserRole.ALUMNI
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await apply_stat_changes(db, {USERS: 1, ACTIVE_USERS: 1}, {"signups": 1})
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.post("/login", response_model=Token)
-async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == login_data.email).first()
-    if not user or not verify_password(login_data.password, user.hashed_password):
+async def login(login_data: LoginRequest, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User).where(User.email == login_data.email))
+    user = result.scalars().first()
+    if not user or not await password_hasher.verify(login_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -60,8 +66,31 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-async def read_users_me(current_user: User = Depends(get_current_active_user)):
-    return current_user
+async def read_users_me(
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    if request.headers.get("if-none-match"):
+        result = await db.execute(
+            select(User.id, User.created_at, User.updated_at).where(User.id == current_user.id)
+        )
+        stamp = result.first()
+        if stamp is not None:
+            etag = make_etag("me", stamp.id, row_stamp(stamp))
+            if etag_matches(request, etag):
+                return not_modified(etag, PRIVATE_REVALIDATE)
+
+    user = await db.get(User, current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    response.headers["ETag"] = make_etag("me", user.id, row_stamp(user))
+    response.headers["Cache-Control"] = PRIVATE_REVALIDATE
+    return user
 
 
 
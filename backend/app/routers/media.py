@@ -0,0 +1,23 @@
+import asyncio
+import os
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
+from app.media import IMMUTABLE, THUMBNAIL_NAME, thumbnail_path
+
+router = APIRouter()
+
+@router.get("/{name}", response_class=FileResponse)
+async def get_thumbnail(name: str):
+    """
+    A profile picture thumbnail. Names are content hashes, so responses are
+    cached as immutable. Under a server offering the ASGI pathsend extension
+    the file is sent without being read into Python (sendfile).
+    """
+    if not THUMBNAIL_NAME.fullmatch(name):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    path = thumbnail_path(name)
+    try:
+        stat_result = await asyncio.to_thread(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+    return FileResponse(path, media_type="image/webp", stat_result=stat_result, headers={"Cache-Control": IMMUTABLE})
@@ -1,23 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
-from app.models import NewsletterSubscriber
-from app.schemas import NewsletterSubscribe, NewsletterSubscriberResponse
-from app.auth import get_current_admin, get_current_active_user, get_current_user
-from app.models import User
+from app.models import NewsletterSubscriber, NewsletterIssue
+from app.schemas import (
+    NewsletterSubscribe,
+    NewsletterSubscriberResponse,
+    NewsletterIssueCreate,
+    NewsletterIssueResponse
+)
+from app.auth import Principal, get_current_admin, get_current_active_user, get_current_user
+from app.export import ExportFormat, export_response, select_export_columns
+from app.newsletter_dispatch import delivery_counts, queue_issue
+from app.counters import ACTIVE_SUBSCRIBERS, apply_stat_changes
 
 router = APIRouter()
 
 @router.post("/subscribe", status_code=status.HTTP_201_CREATED)
 async def subscribe_to_newsletter(
     subscription: NewsletterSubscribe,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Subscribe to newsletter (public endpoint)"""
     # Check if already subscribed
-    existing = db.query(NewsletterSubscriber).filter(
-        NewsletterSubscriber.email == subscription.email
-    ).first()
+    result = await db.execute(
+        select(NewsletterSubscriber)
+        .where(NewsletterSubscriber.email == subscription.email)
+        .with_for_update()
+    )
+    existing = result.scalars().first()
     
     if existing:
         if existing.is_active:
@@ -25,7 +36,8 @@ async def subscribe_to_newsletter(
         else:
             # Reactivate subscription
             existing.is_active = True
-            db.commit()
+            await apply_stat_changes(db, {ACTIVE_SUBSCRIBERS: 1}, {"subscriptions": 1})
+            await db.commit()
             return {"message": "Subscription reactivated", "subscribed": True}
     
     # Create new subscription
@@ -34,31 +46,79 @@ async def subscribe_to_newsletter(
         is_active=True
     )
     db.add(subscriber)
-    db.commit()
-    db.refresh(subscriber)
+    await apply_stat_changes(db, {ACTIVE_SUBSCRIBERS: 1}, {"subscriptions": 1})
+    await db.commit()
+    await db.refresh(subscriber)
     
     return {"message": "Successfully subscribed to newsletter", "subscribed": True}
 
 @router.get("/subscribers", response_model=list[NewsletterSubscriberResponse])
 async def get_subscribers(
-    current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all newsletter subscribers (admin only)"""
-    subscribers = db.query(NewsletterSubscriber).filter(
-        NewsletterSubscriber.is_active == True
-    ).all()
+    result = await db.execute(
+        select(NewsletterSubscriber).where(NewsletterSubscriber.is_active == True)
+    )
+    subscribers = result.scalars().all()
     return subscribers
 
+@router.get("/subscribers/export")
+async def export_subscribers(
+    format: ExportFormat = Query("ndjson"),
+    current_user: Principal = Depends(get_current_admin)
+):
+    """Stream all active newsletter subscribers as NDJSON or CSV (admin only)"""
+    query = select_export_columns(NewsletterSubscriber, NewsletterSubscriberResponse).where(
+        NewsletterSubscriber.is_active == True
+    )
+    return export_response(query, NewsletterSubscriberResponse, format, "subscribers")
+
+@router.post("/issues", response_model=NewsletterIssueResponse, status_code=status.HTTP_201_CREATED)
+async def create_issue(
+    issue_data: NewsletterIssueCreate,
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Queue an issue of recently approved posts for every active subscriber (admin only)"""
+    issue = await queue_issue(db, issue_data.subject, issue_data.days)
+    if issue is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No approved posts in that period"
+        )
+    response = NewsletterIssueResponse.model_validate(issue)
+    response.deliveries = await delivery_counts(db, issue.id)
+    return response
+
+@router.get("/issues/{issue_id}", response_model=NewsletterIssueResponse)
+async def get_issue(
+    issue_id: int,
+    current_user: Principal = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Dispatch progress of an issue: its status and recipients per delivery state (admin only)"""
+    issue = await db.get(NewsletterIssue, issue_id)
+    if not issue:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Issue not found"
+        )
+    response = NewsletterIssueResponse.model_validate(issue)
+    response.deliveries = await delivery_counts(db, issue.id)
+    return response
+
 @router.delete("/unsubscribe/{email}")
 async def unsubscribe_from_newsletter(
     email: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Unsubscribe from newsletter (public endpoint)"""
-    subscriber = db.query(NewsletterSubscriber).filter(
-        NewsletterSubscriber.email == email
-    ).first()
+    result = await db.execute(
+        select(NewsletterSubscriber).where(NewsletterSubscriber.email == email).with_for_update()
+    )
+    subscriber = result.scalars().first()
     
     if not subscriber:
         raise HTTPException(
@@ -66,8 +126,10 @@ async def unsubscribe_from_newsletter(
             detail="Email not found in subscribers"
         )
     
-    subscriber.is_active = False
-    db.commit()
+    if subscriber.is_active:
+        subscriber.is_active = False
+        await apply_stat_changes(db, {ACTIVE_SUBSCRIBERS: -1}, {"unsubscriptions": 1})
+        await db.commit()
     
     return {"message": "Successfully unsubscribed from newsletter"}
 
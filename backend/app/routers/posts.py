@@ -1,18 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+from app import database
 from app.database import get_db
-from app.models import User, Post, PostStatus, UserRole
+from app.db_routing import get_read_db
+from app.models import Post, PostStatus, UserRole
 from app.schemas import PostCreate, PostUpdate, PostResponse, PostWithAuthor
-from app.auth import get_current_active_user
+from app.auth import Principal, get_current_active_user
+from app.queries import select_posts_with_author, select_post_feed, select_post_feed_keys, select_author_posts
+from app.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, next_cursor, paginate_by_created
+from app.response_cache import feed_cache
+from app import search
+from app.events import moderation_events, post_event
+from app.counters import apply_stat_changes, post_status_changes, posts_counter
+from app.etag import (
+    PUBLIC_REVALIDATE,
+    etag_matches,
+    make_etag,
+    not_modified,
+    row_stamp,
+    stamp_from_query,
+    stamp_from_rows,
+)
 
 router = APIRouter()
 
+post_list_adapter = TypeAdapter(list[PostWithAuthor])
+
 @router.post("/", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
 async def create_post(
     post_data: PostCreate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     # Alumni posts are pending by default, admins are auto-approved
     status_value = PostStatus.APPROVED if current_user.role == UserRole.ADMIN else PostStatus.PENDING
@@ -23,41 +43,84 @@ async def create_post(
         status=status_value
     )
     db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
+    await db.flush()
+    await search.index_post(db, db_post)
+    await apply_stat_changes(db, {posts_counter(db_post.status): 1}, {"posts": 1})
+    await db.commit()
+    await db.refresh(db_post)
+    if db_post.status == PostStatus.APPROVED:
+        await feed_cache.invalidate()
+    await moderation_events.publish(post_event("post.created", db_post))
     return db_post
 
 @router.get("/", response_model=list[PostWithAuthor])
 async def get_posts(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    cursor: Optional[str] = None,
+    skip: int = Query(0, deprecated=True, description="Use cursor instead"),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     status_filter: Optional[PostStatus] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = db.query(Post)
-    if status_filter:
-        query = query.filter(Post.status == status_filter)
+    # By default, only show approved posts to non-admins
+    status_value = status_filter or PostStatus.APPROVED
+
+    def page_etag(stamp: tuple) -> str:
+        return make_etag("posts", status_value.value, cursor, skip, limit, *stamp)
+
+    async def build_page(db: AsyncSession) -> dict:
+        query = paginate_by_created(select_post_feed(status_value), Post.created_at, Post.id, cursor, skip, limit)
+        result = await db.execute(query)
+        posts = result.scalars().all()
+        return {
+            "body": post_list_adapter.dump_json(post_list_adapter.validate_python(posts)).decode(),
+            "next_cursor": next_cursor(posts, limit, "created_at", "id"),
+            "etag": page_etag(stamp_from_rows(posts, row_stamp, lambda post: row_stamp(post.author))),
+        }
+
+    async def build_cached_page() -> dict:
+        # Fill from the primary: a page read from a lagging replica would stay stale for the whole TTL
+        async with database.AsyncSessionLocal() as primary:
+            return await build_page(primary)
+
+    # The approved feed's first page is public and identical for everyone, so it is served
+    # from cache. Later pages are cheap keyset scans, and caching them would let any client
+    # fill the cache with made-up cursors and offsets, so they go to the database.
+    if status_value == PostStatus.APPROVED and feed_cache.enabled and cursor is None and skip == 0:
+        page = await feed_cache.get_or_build(f"first:{limit}", build_cached_page)
     else:
-        # By default, only show approved posts to non-admins
-        query = query.filter(Post.status == PostStatus.APPROVED)
-    
-    posts = query.order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
-    return posts
+        if request.headers.get("if-none-match"):
+            keys = paginate_by_created(select_post_feed_keys(status_value), Post.created_at, Post.id, cursor, skip, limit)
+            etag = page_etag(await stamp_from_query(db, keys))
+            if etag_matches(request, etag):
+                return not_modified(etag)
+        page = await build_page(db)
+
+    if etag_matches(request, page["etag"]):
+        return not_modified(page["etag"])
+    headers = {"ETag": page["etag"], "Cache-Control": PUBLIC_REVALIDATE}
+    if page["next_cursor"]:
+        headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    return Response(content=page["body"], media_type="application/json", headers=headers)
 
 @router.get("/my-posts", response_model=list[PostWithAuthor])
 async def get_my_posts(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    posts = db.query(Post).filter(Post.author_id == current_user.id).order_by(Post.created_at.desc()).all()
+    result = await db.execute(select_author_posts(current_user.id))
+    posts = result.scalars().all()
     return posts
 
 @router.get("/{post_id}", response_model=PostWithAuthor)
 async def get_post(
     post_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
+    result = await db.execute(
+        select_posts_with_author().where(Post.id == post_id)
+    )
+    post = result.scalars().first()
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -69,10 +132,10 @@ async def get_post(
 async def update_post(
     post_id: int,
     post_data: PostUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -90,17 +153,19 @@ async def update_post(
     for field, value in update_data.items():
         setattr(post, field, value)
     
-    db.commit()
-    db.refresh(post)
+    await search.index_post(db, post)
+    await db.commit()
+    await db.refresh(post)
+    await feed_cache.invalidate()
     return post
 
 @router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_post(
     post_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.get(Post, post_id, with_for_update=True)
     if not post:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -114,7 +179,11 @@ async def delete_post(
             detail="Not enough permissions"
         )
     
-    db.delete(post)
-    db.commit()
+    await db.delete(post)
+    await search.remove_post(db, post.id)
+    await apply_stat_changes(db, post_status_changes([post.status], None))
+    await db.commit()
+    await feed_cache.invalidate()
+    await moderation_events.publish({"type": "post.deleted", "post": {"id": post_id}})
     return None
 
@@ -0,0 +1,45 @@
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db_routing import get_read_db
+from app.models import Post, AlumniProfile
+from app.schemas import SearchHit
+from app.queries import select_posts_with_author, select_profiles_with_user
+from app.search import search_documents
+
+router = APIRouter()
+
+@router.get("", response_model=list[SearchHit])
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[Literal["post", "profile"]] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Ranked full-text search over approved posts and alumni profiles"""
+    matches = await search_documents(db, q, kind, limit)
+
+    post_ids = [ref_id for match_kind, ref_id, _ in matches if match_kind == "post"]
+    profile_ids = [ref_id for match_kind, ref_id, _ in matches if match_kind == "profile"]
+    posts = {}
+    if post_ids:
+        result = await db.execute(select_posts_with_author().where(Post.id.in_(post_ids)))
+        posts = {post.id: post for post in result.scalars()}
+    profiles = {}
+    if profile_ids:
+        result = await db.execute(select_profiles_with_user().where(AlumniProfile.id.in_(profile_ids)))
+        profiles = {profile.id: profile for profile in result.scalars()}
+
+    hits = []
+    for match_kind, ref_id, rank in matches:
+        row = posts.get(ref_id) if match_kind == "post" else profiles.get(ref_id)
+        if row is None:
+            continue
+        hits.append(SearchHit(
+            kind=match_kind,
+            id=ref_id,
+            rank=rank,
+            post=row if match_kind == "post" else None,
+            profile=row if match_kind == "profile" else None,
+        ))
+    return hits
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
-from datetime import datetime
-from app.models import UserRole, PostStatus
+from pydantic import BaseModel, EmailStr, Field, computed_field
+from typing import Literal, Optional
+from datetime import date, datetime
+from app.models import UserRole, PostStatus, NewsletterIssueStatus, UserImportJobStatus
+from app.media import thumbnail_urls
 
 # User Schemas
 class UserBase(BaseModel):
@@ -12,6 +13,8 @@ class UserCreate(UserBase):
     password: str
 
 class UserResponse(UserBase):
+    # Checked when it was stored; EmailStr validation is most of the cost of serializing a page of posts or profiles
+    email: str
     id: int
     role: UserRole
     is_active: bool
@@ -41,6 +44,13 @@ class AlumniProfileResponse(AlumniProfileBase):
     user_id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    profile_picture_hash: Optional[str] = Field(None, exclude=True)
+
+    @computed_field
+    @property
+    def profile_picture_thumbnails(self) -> dict[int, str]:
+        """Uploaded picture's thumbnail URL per edge in pixels; empty without one"""
+        return thumbnail_urls(self.profile_picture_hash) if self.profile_picture_hash else {}
     
     class Config:
         from_attributes = True
@@ -48,6 +58,20 @@ class AlumniProfileResponse(AlumniProfileBase):
 class AlumniProfileWithUser(AlumniProfileResponse):
     user: UserResponse
 
+class ProfilePictureUpload(BaseModel):
+    # "processing" until the thumbnails are made; the profile shows the picture from then on
+    status: Literal["ready", "processing"]
+    thumbnails: dict[int, str]
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class ProfileFacets(BaseModel):
+    graduation_year: list[FacetCount]
+    major: list[FacetCount]
+    company: list[FacetCount]
+
 # Post Schemas
 class PostBase(BaseModel):
     title: str
@@ -98,5 +122,86 @@ class NewsletterSubscriberResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class NewsletterIssueCreate(BaseModel):
+    subject: Optional[str] = None
+    days: int = Field(7, ge=1, le=90)
 
+class NewsletterIssueResponse(BaseModel):
+    id: int
+    subject: str
+    status: NewsletterIssueStatus
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    deliveries: dict[str, int] = {}
+    
+    class Config:
+        from_attributes = True
+
+# Bulk Moderation Schemas
+class BulkPostSelection(BaseModel):
+    """Posts to act on: explicit ids, filters, or both (filters narrow the ids)"""
+    ids: Optional[list[int]] = Field(None, max_length=1000)
+    status: Optional[PostStatus] = None
+    author_id: Optional[int] = None
+    created_before: Optional[datetime] = None
+
+class BulkPostOutcome(BaseModel):
+    id: int
+    outcome: Literal["approved", "rejected", "deleted", "unchanged", "not_found"]
 
+class BulkModerationResult(BaseModel):
+    action: Literal["approve", "reject", "delete"]
+    changed: int
+    results: list[BulkPostOutcome]
+
+# Bulk Import Schemas
+class UserImportRow(UserCreate, AlumniProfileBase):
+    """One CSV row: a new alumni account and, optionally, its profile"""
+
+class UserImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    error: str
+
+class UserImportReport(BaseModel):
+    rows: int
+    created: int
+    profiles: int
+    failed: int
+    errors: list[UserImportError]
+    elapsed_seconds: float
+
+class UserImportJobResponse(BaseModel):
+    id: int
+    status: UserImportJobStatus
+    report: Optional[UserImportReport] = None
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+# Admin Stats Schemas
+class DailyGrowth(BaseModel):
+    day: date
+    signups: int
+    posts: int
+    subscriptions: int
+    unsubscriptions: int
+
+class AdminStats(BaseModel):
+    users: int
+    active_users: int
+    posts: dict[PostStatus, int]
+    active_subscribers: int
+    daily: list[DailyGrowth]
+
+# Search Schemas
+class SearchHit(BaseModel):
+    kind: str
+    id: int
+    rank: float
+    post: Optional[PostWithAuthor] = None
+    profile: Optional[AlumniProfileWithUser] = None
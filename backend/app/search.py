@@ -0,0 +1,205 @@
+"""
+Full-text search over approved posts and alumni profiles.
+
+Documents live in a `search_documents` table outside the ORM metadata:
+  - Postgres: a tsvector column with a GIN index, ranked with ts_rank_cd
+  - SQLite:   an FTS5 virtual table (porter stemming), ranked with bm25
+Each document has an id of ref_id * 2 + kind code, so a post and a
+profile with the same primary key never collide and SQLite can address
+documents by rowid. Writers call index_post / index_profile / remove_*
+before committing, so the index changes in the same transaction as the row.
+"""
+import re
+from typing import Optional
+from sqlalchemy import DDL, bindparam, event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Base
+from app.models import User, Post, PostStatus, AlumniProfile
+
+KIND_CODES = {"post": 0, "profile": 1}
+KIND_NAMES = {code: kind for kind, code in KIND_CODES.items()}
+SEARCH_TABLES = ("search_documents",)
+
+POSTGRES_DDL = (
+    "CREATE TABLE IF NOT EXISTS search_documents ("
+    " doc_id BIGINT PRIMARY KEY,"
+    " document TSVECTOR NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_search_documents_document"
+    " ON search_documents USING GIN (document)",
+)
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents"
+    " USING fts5(title, body, tokenize='porter unicode61')",
+)
+
+# Title terms weigh more than body terms in both engines
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(:title, '')), 'A')"
+    " || setweight(to_tsvector('english', coalesce(:body, '')), 'B')"
+)
+UPSERT_SQL = {
+    "postgresql": (
+        f"INSERT INTO search_documents (doc_id, document) VALUES (:doc_id, {_PG_DOCUMENT})"
+        " ON CONFLICT (doc_id) DO UPDATE SET document = EXCLUDED.document"
+    ),
+    "sqlite": "INSERT OR REPLACE INTO search_documents (rowid, title, body) VALUES (:doc_id, :title, :body)",
+}
+DELETE_SQL = {
+    "postgresql": "DELETE FROM search_documents WHERE doc_id = :doc_id",
+    "sqlite": "DELETE FROM search_documents WHERE rowid = :doc_id",
+}
+SEARCH_SQL = {
+    "postgresql": (
+        "SELECT doc_id, ts_rank_cd(document, query) AS rank"
+        " FROM search_documents, websearch_to_tsquery('english', :query) AS query"
+        " WHERE document @@ query {kind_filter}"
+        " ORDER BY rank DESC, doc_id LIMIT :limit"
+    ),
+    "sqlite": (
+        "SELECT rowid AS doc_id, -bm25(search_documents, 4.0, 1.0) AS rank"
+        " FROM search_documents WHERE search_documents MATCH :query {kind_filter}"
+        " ORDER BY rank DESC, rowid LIMIT :limit"
+    ),
+}
+KIND_FILTER = {
+    "postgresql": "AND doc_id % 2 = :kind_code",
+    "sqlite": "AND rowid % 2 = :kind_code",
+}
+
+_PG_POST_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A')"
+    " || setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+_PG_PROFILE_SELECT = (
+    "SELECT p.id * 2 + 1, setweight(to_tsvector('english', coalesce(u.full_name, '')), 'A')"
+    " || setweight(to_tsvector('english', concat_ws(' ', p.major, p.company, p.current_position, p.bio)), 'B')"
+    " FROM alumni_profiles p JOIN users u ON u.id = p.user_id"
+)
+_SQLITE_PROFILE_SELECT = (
+    "SELECT p.id * 2 + 1, u.full_name,"
+    " coalesce(p.major, '') || ' ' || coalesce(p.company, '') || ' '"
+    " || coalesce(p.current_position, '') || ' ' || coalesce(p.bio, '')"
+    " FROM alumni_profiles p JOIN users u ON u.id = p.user_id"
+)
+
+# Set-based variants over an expanding :ids list, used by bulk moderation and imports
+INDEX_POSTS_SQL = {
+    "postgresql": (
+        f"INSERT INTO search_documents (doc_id, document) SELECT id * 2, {_PG_POST_DOCUMENT}"
+        " FROM posts WHERE id IN :ids AND status = 'APPROVED'"
+        " ON CONFLICT (doc_id) DO UPDATE SET document = EXCLUDED.document"
+    ),
+    "sqlite": (
+        "INSERT OR REPLACE INTO search_documents (rowid, title, body)"
+        " SELECT id * 2, title, content FROM posts WHERE id IN :ids AND status = 'APPROVED'"
+    ),
+}
+INDEX_PROFILES_SQL = {
+    "postgresql": (
+        f"INSERT INTO search_documents (doc_id, document) {_PG_PROFILE_SELECT} WHERE p.id IN :ids"
+        " ON CONFLICT (doc_id) DO UPDATE SET document = EXCLUDED.document"
+    ),
+    "sqlite": f"INSERT OR REPLACE INTO search_documents (rowid, title, body) {_SQLITE_PROFILE_SELECT} WHERE p.id IN :ids",
+}
+DELETE_MANY_SQL = {
+    "postgresql": "DELETE FROM search_documents WHERE doc_id IN :doc_ids",
+    "sqlite": "DELETE FROM search_documents WHERE rowid IN :doc_ids",
+}
+
+# Full rebuild from the source tables, used by migrations and scripts
+REBUILD_SQL = {
+    "postgresql": (
+        "DELETE FROM search_documents",
+        f"INSERT INTO search_documents (doc_id, document) SELECT id * 2, {_PG_POST_DOCUMENT}"
+        " FROM posts WHERE status = 'APPROVED'",
+        f"INSERT INTO search_documents (doc_id, document) {_PG_PROFILE_SELECT}",
+    ),
+    "sqlite": (
+        "DELETE FROM search_documents",
+        "INSERT INTO search_documents (rowid, title, body)"
+        " SELECT id * 2, title, content FROM posts WHERE status = 'APPROVED'",
+        f"INSERT INTO search_documents (rowid, title, body) {_SQLITE_PROFILE_SELECT}",
+    ),
+}
+
+# Tables created through Base.metadata.create_all get their search table too
+for _statement in POSTGRES_DDL:
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in SQLITE_DDL:
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+def doc_id(kind: str, ref_id: int) -> int:
+    return ref_id * 2 + KIND_CODES[kind]
+
+def split_doc_id(value: int) -> tuple[str, int]:
+    return KIND_NAMES[value % 2], value // 2
+
+def _dialect(db: AsyncSession) -> str:
+    return db.bind.dialect.name
+
+def profile_body(profile: AlumniProfile) -> str:
+    parts = (profile.major, profile.company, profile.current_position, profile.bio)
+    return " ".join(part for part in parts if part)
+
+async def _upsert(db: AsyncSession, kind: str, ref_id: int, title: str, body: str):
+    await db.execute(
+        text(UPSERT_SQL[_dialect(db)]),
+        {"doc_id": doc_id(kind, ref_id), "title": title, "body": body},
+    )
+
+async def _delete(db: AsyncSession, kind: str, ref_id: int):
+    await db.execute(text(DELETE_SQL[_dialect(db)]), {"doc_id": doc_id(kind, ref_id)})
+
+async def index_post(db: AsyncSession, post: Post):
+    """Only approved posts are searchable; anything else is dropped from the index"""
+    if post.status == PostStatus.APPROVED:
+        await _upsert(db, "post", post.id, post.title, post.content)
+    else:
+        await _delete(db, "post", post.id)
+
+async def remove_post(db: AsyncSession, post_id: int):
+    await _delete(db, "post", post_id)
+
+async def index_posts(db: AsyncSession, post_ids: list[int]):
+    """Index the approved posts among `post_ids` in one statement"""
+    statement = text(INDEX_POSTS_SQL[_dialect(db)]).bindparams(bindparam("ids", expanding=True))
+    await db.execute(statement, {"ids": post_ids})
+
+async def remove_posts(db: AsyncSession, post_ids: list[int]):
+    statement = text(DELETE_MANY_SQL[_dialect(db)]).bindparams(bindparam("doc_ids", expanding=True))
+    await db.execute(statement, {"doc_ids": [doc_id("post", post_id) for post_id in post_ids]})
+
+async def index_profile(db: AsyncSession, profile: AlumniProfile, user: User):
+    await _upsert(db, "profile", profile.id, user.full_name, profile_body(profile))
+
+async def index_profiles(db: AsyncSession, profile_ids: list[int]):
+    """Index many profiles in one statement, e.g. after a bulk import"""
+    statement = text(INDEX_PROFILES_SQL[_dialect(db)]).bindparams(bindparam("ids", expanding=True))
+    await db.execute(statement, {"ids": profile_ids})
+
+def _fts5_query(query: str) -> Optional[str]:
+    """Quote each word so user input can never be parsed as FTS5 syntax"""
+    terms = re.findall(r"\w+", query)
+    return " ".join(f'"{term}"' for term in terms) or None
+
+async def search_documents(
+    db: AsyncSession, query: str, kind: Optional[str] = None, limit: int = 20
+) -> list[tuple[str, int, float]]:
+    """Ranked (kind, ref_id, rank) matches, best first"""
+    dialect = _dialect(db)
+    if dialect == "sqlite":
+        query = _fts5_query(query)
+        if query is None:
+            return []
+    params = {"query": query, "limit": limit}
+    kind_filter = ""
+    if kind is not None:
+        kind_filter = KIND_FILTER[dialect]
+        params["kind_code"] = KIND_CODES[kind]
+    result = await db.execute(text(SEARCH_SQL[dialect].format(kind_filter=kind_filter)), params)
+    return [(*split_doc_id(row.doc_id), float(row.rank)) for row in result]
+
+def rebuild_search_index(connection):
+    """Repopulate search_documents from posts and profiles (sync connection)"""
+    for statement in REBUILD_SQL[connection.dialect.name]:
+        connection.execute(text(statement))
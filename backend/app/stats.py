@@ -0,0 +1,31 @@
+from collections import deque
+
+class LatencyStats:
+    """Running count/sum/max plus a window of recent samples for percentiles"""
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self._recent.append(seconds)
+
+    def _percentile(self, pct: float) -> float:
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "p50_ms": round(self._percentile(50) * 1000, 2),
+            "p99_ms": round(self._percentile(99) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
@@ -0,0 +1,304 @@
+"""
+Bulk import of alumni accounts and profiles from CSV.
+
+Columns: email, full_name, password, plus any AlumniProfile field
+(graduation_year, major, current_position, company, bio, linkedin_url,
+profile_picture_url). Imported accounts are always alumni.
+
+The file is read row by row and handled in batches of IMPORT_BATCH_SIZE
+(at most MAX_BATCH_SIZE, so one multi-row INSERT stays within Postgres's
+65535 bind parameters):
+
+  - each row is validated on its own, on a thread so a large file doesn't
+    hold up the event loop; bad rows and emails repeated in the file are
+    reported with their line number and skipped, never abort the run
+  - bcrypt runs on a bounded PasswordHashPool, one job per pool worker, and
+    the next batch hashes while the previous one is being written
+  - users and profiles are written with multi-row INSERT ... ON CONFLICT DO
+    NOTHING RETURNING, so an email that already exists is reported as an
+    error rather than failing the batch
+  - search documents and facet counters for the new profiles are updated with
+    set-based statements, and each batch commits on its own
+
+Uploads to the API run as background jobs (ImportJobs) on a small hash pool
+of their own, so an import neither holds its HTTP request open for minutes
+nor takes the CPUs logins need; scripts/import_users.py hashes on every CPU.
+"""
+import asyncio
+import csv
+import logging
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import IO, Iterable, Iterator, Optional
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app import database
+from app.counters import ACTIVE_USERS, USERS, apply_stat_changes
+from app.facets import add_facet_counts, facet_values
+from app.hashing import PasswordHashPool
+from app.models import AlumniProfile, User, UserImportJob, UserImportJobStatus, UserRole
+from app.schemas import AlumniProfileBase, UserImportRow
+from app import search
+
+PROFILE_FIELDS = tuple(AlumniProfileBase.model_fields)
+
+# Postgres allows 65535 bind parameters per statement; a profile row (user_id and
+# every profile field) is the widest row a batch inserts
+MAX_BATCH_SIZE = 65535 // (1 + len(PROFILE_FIELDS))
+
+# Errors listed in a report; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+# Batches committed before the interruption stay imported; the job's progress says how far it got
+INTERRUPTED_ERROR = "Interrupted by a server shutdown before finishing"
+
+logger = logging.getLogger(__name__)
+
+async def _hash_all(hasher: PasswordHashPool, passwords: list[str]) -> list[str]:
+    """Hash a batch on the pool, one job per worker"""
+    chunk = max(1, -(-len(passwords) // hasher.workers))
+    parts = await asyncio.gather(*(
+        hasher.hash_many(passwords[start:start + chunk]) for start in range(0, len(passwords), chunk)
+    ))
+    return [hashed for part in parts for hashed in part]
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+    )
+
+def _dialect_insert(db: AsyncSession):
+    return postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+
+class UserImport:
+    def __init__(self, hasher: PasswordHashPool, batch_size: int = settings.IMPORT_BATCH_SIZE,
+                 job_id: Optional[int] = None):
+        self.hasher = hasher
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.job_id = job_id
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.created = 0
+        self.profiles = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+        self._seen: set[str] = set()
+
+    def _error(self, row: int, email: Optional[str], error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "email": email, "error": error})
+
+    def _validate(self, line: int, raw: dict) -> Optional[UserImportRow]:
+        cleaned = {key.strip(): (value or "").strip() or None for key, value in raw.items() if key}
+        try:
+            row = UserImportRow.model_validate(cleaned)
+        except ValidationError as exc:
+            self._error(line, cleaned.get("email"), _validation_message(exc))
+            return None
+        email = row.email.lower()
+        if email in self._seen:
+            self._error(line, row.email, "Duplicate email in file")
+            return None
+        self._seen.add(email)
+        return row
+
+    def _read_batch(self, reader: Iterator[dict]) -> list[tuple[int, UserImportRow]]:
+        """The next batch of valid rows; runs on a thread"""
+        batch = []
+        for raw in reader:
+            self.rows += 1
+            row = self._validate(reader.line_num, raw)
+            if row is not None:
+                batch.append((reader.line_num, row))
+                if len(batch) >= self.batch_size:
+                    break
+        return batch
+
+    def report(self) -> dict:
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "profiles": self.profiles,
+            "failed": self.failed,
+            "errors": self.errors,
+            "elapsed_seconds": round(time.perf_counter() - self.started, 3),
+        }
+
+    async def _write(self, db: AsyncSession, batch: list[tuple[int, UserImportRow]], hashes: list[str]):
+        insert = _dialect_insert(db)
+        result = await db.execute(
+            insert(User)
+            .values([
+                {"email": row.email, "hashed_password": hashed, "full_name": row.full_name,
+                 "role": UserRole.ALUMNI, "is_active": True}
+                for (_, row), hashed in zip(batch, hashes)
+            ])
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.id, User.email)
+        )
+        user_ids = {email: user_id for user_id, email in result}
+        self.created += len(user_ids)
+        await apply_stat_changes(
+            db, {USERS: len(user_ids), ACTIVE_USERS: len(user_ids)}, {"signups": len(user_ids)}
+        )
+
+        profiles = []
+        for line, row in batch:
+            user_id = user_ids.get(row.email)
+            if user_id is None:
+                self._error(line, row.email, "Email already registered")
+                continue
+            fields = {field: getattr(row, field) for field in PROFILE_FIELDS}
+            if any(value is not None for value in fields.values()):
+                profiles.append({"user_id": user_id, **fields})
+
+        if profiles:
+            result = await db.execute(
+                insert(AlumniProfile)
+                .values(profiles)
+                .on_conflict_do_nothing(index_elements=[AlumniProfile.user_id])
+                .returning(AlumniProfile.id)
+            )
+            profile_ids = list(result.scalars())
+            self.profiles += len(profile_ids)
+            await search.index_profiles(db, profile_ids)
+            counts = Counter(
+                (facet, value)
+                for profile in profiles
+                for facet, value in facet_values(SimpleNamespace(**profile)).items()
+                if value is not None
+            )
+            await add_facet_counts(db, counts)
+        if self.job_id is not None:
+            # Progress for whoever polls the job, committed with the batch it describes
+            await db.execute(update(UserImportJob).where(UserImportJob.id == self.job_id).values(report=self.report()))
+        await db.commit()
+
+    async def run(self, lines: Iterable[str]) -> dict:
+        self.started = time.perf_counter()
+        reader = csv.DictReader(lines)
+        pending: Optional[tuple[list, asyncio.Future]] = None
+        batch: list[tuple[int, UserImportRow]] = []
+
+        async with database.AsyncSessionLocal() as db:
+            async def flush(next_batch: list):
+                # Start hashing this batch, then write the previous one while it runs
+                nonlocal pending
+                previous = pending
+                pending = None
+                if next_batch:
+                    passwords = [row.password for _, row in next_batch]
+                    pending = (next_batch, asyncio.ensure_future(_hash_all(self.hasher, passwords)))
+                if previous is not None:
+                    previous_batch, previous_hashing = previous
+                    await self._write(db, previous_batch, await previous_hashing)
+
+            # The next batch is parsed while the one just flushed hashes
+            while batch := await asyncio.to_thread(self._read_batch, reader):
+                await flush(batch)
+            await flush([])
+
+        return self.report()
+
+async def import_users(lines: Iterable[str], batch_size: int = settings.IMPORT_BATCH_SIZE) -> dict:
+    """Import from a script, hashing on every CPU"""
+    workers = os.cpu_count() or 1
+    hasher = PasswordHashPool(workers=workers, max_queue=workers, kind="process")
+    try:
+        return await UserImport(hasher, batch_size).run(lines)
+    finally:
+        hasher.shutdown()
+
+def _save_upload(upload: IO[bytes]) -> str:
+    handle, path = tempfile.mkstemp(prefix="user-import-", suffix=".csv")
+    with os.fdopen(handle, "wb") as file:
+        shutil.copyfileobj(upload, file)
+    return path
+
+class ImportJobs:
+    """
+    CSV imports uploaded to the API, each run as a task in the worker that
+    received it. Progress and the final report are kept on the job's
+    user_import_jobs row, so any worker can answer a poll for it. Once
+    `max_running` imports are running in this worker, new ones are refused
+    with a 503 and a Retry-After header.
+    """
+
+    def __init__(self, hasher: PasswordHashPool, max_running: int, retry_after: int = 30):
+        self.hasher = hasher
+        self.max_running = max_running
+        self.retry_after = retry_after
+        self._tasks: set[asyncio.Task] = set()
+
+    @classmethod
+    def from_settings(cls) -> "ImportJobs":
+        workers = settings.IMPORT_HASH_WORKERS
+        max_running = settings.IMPORT_MAX_RUNNING
+        # Each running import has at most two batches hashing, one job per worker each
+        hasher = PasswordHashPool(workers=workers, max_queue=2 * max_running * workers, kind="process")
+        return cls(hasher, max_running)
+
+    @property
+    def running(self) -> int:
+        return len(self._tasks)
+
+    async def start(self, db: AsyncSession, upload: IO[bytes]) -> UserImportJob:
+        """Keep a copy of the upload and import it in the background"""
+        if self.running >= self.max_running:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="An import is already running, please retry shortly",
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        path = await asyncio.to_thread(_save_upload, upload)
+        job = UserImportJob(status=UserImportJobStatus.RUNNING)
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        task = asyncio.ensure_future(self._run(job.id, path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job_id: int, path: str):
+        values = {}
+        try:
+            with open(path, encoding="utf-8-sig", newline="") as lines:
+                report = await UserImport(self.hasher, job_id=job_id).run(lines)
+            values = {"status": UserImportJobStatus.DONE, "report": report}
+        except asyncio.CancelledError:
+            logger.warning("User import %s interrupted", job_id)
+            values = {"status": UserImportJobStatus.FAILED, "error": INTERRUPTED_ERROR}
+            raise
+        except Exception as exc:
+            logger.exception("User import %s failed", job_id)
+            values = {"status": UserImportJobStatus.FAILED, "error": str(exc) or exc.__class__.__name__}
+        finally:
+            os.unlink(path)
+            if values:
+                async with database.AsyncSessionLocal() as db:
+                    await db.execute(
+                        update(UserImportJob).where(UserImportJob.id == job_id)
+                        .values(finished_at=datetime.now(timezone.utc), **values)
+                    )
+                    await db.commit()
+
+    async def shutdown(self):
+        """Cancel running imports and wait for them to record themselves FAILED"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.hasher.shutdown()
+
+import_jobs = ImportJobs.from_settings()
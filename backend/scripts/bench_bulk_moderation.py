@@ -0,0 +1,92 @@
+"""
+Clearing the moderation queue one post at a time versus in one bulk request.
+Seeds a scratch SQLite database with pending posts, approves them through
+PUT /api/admin/posts/{id}/approve one by one, then seeds the same number again
+and approves them with a single POST /api/admin/posts/bulk/approve, reporting
+wall time, SQL statements and commits for each.
+Usage: python -m scripts.bench_bulk_moderation [--posts 500]
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-bulk-'), 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-bulk-secret")
+
+import argparse
+import json
+import time
+from sqlalchemy import event, insert, select
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.auth import create_access_token
+from app.database import async_engine, create_schema, engine
+from app.models import Post, PostStatus, User, UserRole
+from scripts.check_query_budget import count_statements
+
+ADMIN_EMAIL = "bulk-admin@example.com"
+
+def seed_admin():
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{
+            "email": ADMIN_EMAIL, "hashed_password": "x", "full_name": "Bulk Admin",
+            "role": UserRole.ADMIN, "is_active": True,
+        }])
+
+def seed_pending(count: int) -> list[int]:
+    with engine.begin() as connection:
+        author_id = connection.execute(select(User.id).where(User.email == ADMIN_EMAIL)).scalar_one()
+        return list(connection.execute(
+            insert(Post).returning(Post.id),
+            [{"author_id": author_id, "title": f"Pending {i}", "content": "Awaiting moderation",
+              "status": PostStatus.PENDING} for i in range(count)],
+        ).scalars())
+
+def measure(run) -> dict:
+    commits = []
+    listener = lambda conn: commits.append(1)
+    event.listen(async_engine.sync_engine, "commit", listener)
+    try:
+        with count_statements(async_engine.sync_engine) as counter:
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+    finally:
+        event.remove(async_engine.sync_engine, "commit", listener)
+    return {
+        "seconds": round(elapsed, 3),
+        "statements": len(counter.statements),
+        "commits": len(commits),
+    }
+
+if __name__ == "__main__":
+    create_schema(engine)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=500)
+    args = parser.parse_args()
+
+    seed_admin()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': ADMIN_EMAIL})}"}
+    with TestClient(app) as client:
+        client.get("/api/auth/me", headers=headers)  # warm the principal cache
+
+        ids = seed_pending(args.posts)
+        def one_by_one():
+            for post_id in ids:
+                assert client.put(f"/api/admin/posts/{post_id}/approve", headers=headers).status_code == 200
+        single = measure(one_by_one)
+
+        ids = seed_pending(args.posts)
+        def bulk():
+            response = client.post("/api/admin/posts/bulk/approve", json={"ids": ids}, headers=headers)
+            assert response.status_code == 200 and response.json()["changed"] == len(ids), response.text
+        bulk_stats = measure(bulk)
+
+    print(json.dumps({
+        "posts": args.posts,
+        "one_by_one": single,
+        "bulk": bulk_stats,
+        "speedup": round(single["seconds"] / bulk_stats["seconds"], 1),
+    }, indent=2))
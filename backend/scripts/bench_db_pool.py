@@ -0,0 +1,118 @@
+"""
+Load test for the async engine's connection pool at and past saturation.
+Uses a deliberately small pool (--pool-size/--max-overflow/--pool-timeout)
+on a scratch SQLite database and runs three phases, printing the pool
+metrics of each:
+  - within capacity: as many concurrent sessions as the pool can hold
+  - saturated: many more sessions than connections, each holding its
+    connection for --hold-ms; waits grow and the slowest time out
+  - http burst: concurrent GET /api/posts/ requests through the app
+and checks that in-use connections never exceed pool_size + max_overflow,
+that an exhausted pool fails fast with a timeout instead of hanging, and
+that every connection is returned once the load stops.
+Usage: python -m scripts.bench_db_pool [--pool-size 4] [--max-overflow 2] [--pool-timeout 1]
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--pool-size", type=int, default=4)
+parser.add_argument("--max-overflow", type=int, default=2)
+parser.add_argument("--pool-timeout", type=float, default=1.0)
+parser.add_argument("--hold-ms", type=float, default=200)
+parser.add_argument("--saturation", type=int, default=40, help="Concurrent sessions in the saturated phase")
+parser.add_argument("--requests", type=int, default=200, help="Requests in the HTTP burst")
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-pool-'), 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-pool-secret")
+os.environ["DB_POOL_SIZE"] = str(args.pool_size)
+os.environ["DB_MAX_OVERFLOW"] = str(args.max_overflow)
+os.environ["DB_POOL_TIMEOUT"] = str(args.pool_timeout)
+os.environ["FEED_CACHE_TTL_SECONDS"] = "0"
+
+import asyncio
+import json
+import time
+import httpx
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.main import app
+from app.database import AsyncSessionLocal, create_schema, engine, pool_metrics
+from scripts.bench_feed_cache import seed
+
+metrics = pool_metrics["async"]
+capacity = args.pool_size + args.max_overflow
+
+async def hold_connection(hold: float) -> str:
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
+            await asyncio.sleep(hold)
+        return "ok"
+    except PoolTimeoutError:
+        return "timeout"
+
+async def sessions_phase(concurrency: int) -> dict:
+    metrics.reset()
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(hold_connection(args.hold_ms / 1000) for _ in range(concurrency)))
+    return {
+        "concurrency": concurrency,
+        "seconds": round(time.perf_counter() - started, 3),
+        "completed": outcomes.count("ok"),
+        "timed_out": outcomes.count("timeout"),
+        "pool": metrics.snapshot(),
+    }
+
+async def http_phase(requests: int) -> dict:
+    metrics.reset()
+    statuses: list[int] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def fetch():
+            statuses.append((await client.get("/api/posts/?limit=20")).status_code)
+        started = time.perf_counter()
+        await asyncio.gather(*(fetch() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "seconds": round(elapsed, 3),
+        "status_codes": {str(code): statuses.count(code) for code in sorted(set(statuses))},
+        "pool": metrics.snapshot(),
+    }
+
+async def main() -> dict:
+    report = {
+        "pool_size": args.pool_size,
+        "max_overflow": args.max_overflow,
+        "pool_timeout": args.pool_timeout,
+        "hold_ms": args.hold_ms,
+        "within_capacity": await sessions_phase(capacity),
+        "saturated": await sessions_phase(args.saturation),
+        "http_burst": await http_phase(args.requests),
+    }
+    within, saturated = report["within_capacity"], report["saturated"]
+    assert within["timed_out"] == 0 and within["pool"]["timeouts"] == 0, within
+    assert within["pool"]["overflow_connects"] == args.max_overflow, within
+    for phase in ("within_capacity", "saturated", "http_burst"):
+        pool = report[phase]["pool"]
+        assert pool["peak_in_use"] <= capacity, (phase, pool)
+        assert pool["in_use"] == 0 and pool["idle"] <= args.pool_size, (phase, pool)
+    # Every waiter either got a connection or gave up after about pool_timeout, never later
+    assert saturated["pool"]["checkout_wait"]["max_ms"] < (args.pool_timeout + args.hold_ms / 1000) * 1000 + 250
+    if args.saturation * args.hold_ms / 1000 / capacity > args.pool_timeout:
+        assert saturated["timed_out"] > 0, saturated
+    assert saturated["timed_out"] == saturated["pool"]["timeouts"], saturated
+    return report
+
+if __name__ == "__main__":
+    create_schema(engine)
+    seed(200)
+    print(json.dumps(asyncio.run(main()), indent=2))
+    print("Pool stayed within its limits and released every connection")
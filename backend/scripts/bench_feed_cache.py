@@ -0,0 +1,91 @@
+"""
+Throughput of GET /api/posts/ with the feed response cache on and off.
+Runs the app in-process against a scratch SQLite database, so the two
+numbers differ only in whether pages come from the cache.
+Usage: python -m scripts.bench_feed_cache [--posts 2000] [--duration 5]
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-feed-cache-'), 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-feed-cache-secret")
+
+import argparse
+import asyncio
+import json
+import time
+import httpx
+
+from app.main import app
+from app.database import SessionLocal, engine, Base
+from app.models import User, Post, PostStatus, UserRole
+from app.response_cache import feed_cache
+from scripts.bench_posts_feed import percentile
+
+def seed(count: int):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        author = User(email="feed-cache@example.com", hashed_password="x",
+                      full_name="Feed Cache Bench", role=UserRole.ALUMNI, is_active=True)
+        db.add(author)
+        db.flush()
+        db.add_all([
+            Post(author_id=author.id, title=f"Post {i}", content="Lorem ipsum dolor sit amet " * 8,
+                 status=PostStatus.APPROVED)
+            for i in range(count)
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+async def run_load(path: str, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    deadline = time.perf_counter() + duration
+    transport = httpx.ASGITransport(app=app)
+
+    async def worker(client: httpx.AsyncClient):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get(path)
+            assert response.status_code == 200, response.text
+            latencies.append(time.perf_counter() - start)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return {
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+async def main(args) -> dict:
+    path = f"/api/posts/?limit={args.limit}"
+    ttl = feed_cache.ttl or 30
+    feed_cache.ttl = 0
+    uncached = await run_load(path, args.concurrency, args.duration)
+    feed_cache.ttl = ttl
+    cached = await run_load(path, args.concurrency, args.duration)
+    return {
+        "posts": args.posts,
+        "limit": args.limit,
+        "concurrency": args.concurrency,
+        "uncached": uncached,
+        "cached": cached,
+        "cache": feed_cache.metrics(),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    seed(args.posts)
+    print(json.dumps(asyncio.run(main(args)), indent=2))
@@ -0,0 +1,121 @@
+"""
+Cost of the /metrics instrumentation on GET /api/posts/. Drives the ASGI app
+directly (no HTTP client in the measurement) against a scratch SQLite
+database, in back-to-back pairs of rounds with MetricsMiddleware and the
+query hooks in place and removed, for the cached feed and with the feed
+cache turned off. The overhead is the median of the per-pair ratios, so
+drift in machine speed over the run cancels out. Exits non-zero when it is
+above --max-overhead percent.
+Usage: python -m scripts.bench_metrics_overhead [--rounds 40] [--requests 200]
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-metrics-'), 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-metrics-secret")
+os.environ["METRICS_ENABLED"] = "true"
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from app.main import app
+from app.metrics import MetricsMiddleware, install_query_hooks, remove_query_hooks
+from app.response_cache import feed_cache
+from scripts.bench_feed_cache import seed
+
+def build_stacks():
+    """The app's middleware stack with and without MetricsMiddleware"""
+    instrumented = app.build_middleware_stack()
+    metrics_middleware = next(m for m in app.user_middleware if m.cls is MetricsMiddleware)
+    app.user_middleware.remove(metrics_middleware)
+    try:
+        baseline = app.build_middleware_stack()
+    finally:
+        app.user_middleware.insert(0, metrics_middleware)
+    return instrumented, baseline
+
+async def call(asgi, path: str, query: bytes) -> int:
+    finished = asyncio.Event()
+    requested = False
+    status_code = 0
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif not message.get("more_body"):
+            finished.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query,
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    await asgi(scope, receive, send)
+    return status_code
+
+async def timed_round(asgi, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        assert await call(asgi, "/api/posts/", b"limit=20") == 200
+    return (time.perf_counter() - started) / requests
+
+async def compare(instrumented, baseline, rounds: int, requests: int) -> dict:
+    samples = {"with_metrics": [], "without_metrics": []}
+    await timed_round(instrumented, requests)  # warm up caches and connections
+    for round_number in range(rounds):
+        order = [("with_metrics", instrumented), ("without_metrics", baseline)]
+        if round_number % 2:
+            order.reverse()
+        for name, asgi in order:
+            if name == "with_metrics":
+                install_query_hooks()
+            else:
+                remove_query_hooks()
+            samples[name].append(await timed_round(asgi, requests))
+    install_query_hooks()
+    on = statistics.median(samples["with_metrics"])
+    off = statistics.median(samples["without_metrics"])
+    ratios = [with_ / without for with_, without in zip(samples["with_metrics"], samples["without_metrics"])]
+    return {
+        "with_metrics_us": round(on * 1e6, 1),
+        "without_metrics_us": round(off * 1e6, 1),
+        "overhead_pct": round((statistics.median(ratios) - 1) * 100, 2),
+    }
+
+async def main(args) -> dict:
+    instrumented, baseline = build_stacks()
+    report = {"rounds": args.rounds, "requests_per_round": args.requests}
+    report["cached_feed"] = await compare(instrumented, baseline, args.rounds, args.requests)
+    feed_cache.ttl = 0
+    report["uncached_feed"] = await compare(instrumented, baseline, args.rounds, max(1, args.requests // 4))
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--max-overhead", type=float, default=5.0, help="Percent")
+    args = parser.parse_args()
+
+    seed(args.posts)
+    report = asyncio.run(main(args))
+    print(json.dumps(report, indent=2))
+    worst = max(report["cached_feed"]["overhead_pct"], report["uncached_feed"]["overhead_pct"])
+    if worst > args.max_overhead:
+        sys.exit(f"Metrics overhead {worst}% is above {args.max_overhead}%")
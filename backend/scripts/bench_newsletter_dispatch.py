@@ -0,0 +1,192 @@
+"""
+Newsletter dispatch throughput and crash-resume check against the SMTP stub.
+Seeds a scratch SQLite database with subscribers and approved posts, queues an
+issue, and sends it through NewsletterDispatcher:
+  - once straight through, reporting messages/sec
+  - once with the worker "crashing" mid-batch and a second worker resuming,
+    checking that no recipient got the issue twice and every recipient is
+    either SENT or FAILED as interrupted
+  - once with some subscribers unsubscribing after the issue was queued and
+    one recipient's server answering 451, checking that the unsubscribed
+    get nothing and the deferred recipient isn't retried before its backoff,
+    and that an issue queued meanwhile is sent rather than waiting behind it
+Usage: python -m scripts.bench_newsletter_dispatch [--subscribers 5000] [--rate 0]
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-newsletter-'), 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-newsletter-secret")
+
+import argparse
+import asyncio
+import json
+from sqlalchemy import func, insert, select, update
+
+from app.database import AsyncSessionLocal, SessionLocal, engine, Base
+from app.models import (
+    NewsletterDelivery,
+    NewsletterSubscriber,
+    Post,
+    PostStatus,
+    User,
+    UserRole,
+)
+from app.newsletter_dispatch import (
+    INTERRUPTED_ERROR,
+    UNSUBSCRIBED_ERROR,
+    NewsletterDispatcher,
+    SMTPPool,
+    SendRateLimiter,
+    queue_issue,
+)
+from scripts.smtp_stub import SMTPStub
+
+class CrashingDispatcher(NewsletterDispatcher):
+    """Dies halfway through sending its Nth batch, leaving that batch claimed"""
+
+    def __init__(self, *args, crash_after_batches: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.crash_after_batches = crash_after_batches
+        self.batches = 0
+
+    def _claim_batch(self, db, issue_id):
+        recipients = super()._claim_batch(db, issue_id)
+        self.batches += 1
+        if self.batches > self.crash_after_batches:
+            issue = type("Issue", (), {"id": issue_id, "subject": "crash", "body": "crash"})
+            for subscriber_id, email, _ in recipients[: len(recipients) // 2]:
+                self._send_one(issue, subscriber_id, email)
+            raise SystemExit("worker crashed")
+        return recipients
+
+def seed(subscribers: int):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{
+            "email": "newsletter-author@example.com", "hashed_password": "x",
+            "full_name": "Newsletter Author", "role": UserRole.ALUMNI, "is_active": True,
+        }])
+        author_id = connection.execute(select(User.id)).scalar_one()
+        connection.execute(insert(Post), [{
+            "author_id": author_id, "title": f"Weekly news {i}",
+            "content": "Lorem ipsum dolor sit amet " * 40, "status": PostStatus.APPROVED,
+        } for i in range(10)])
+        connection.execute(insert(NewsletterSubscriber), [
+            {"email": f"reader{i}@example.com", "is_active": True} for i in range(subscribers)
+        ])
+
+async def queue() -> int:
+    async with AsyncSessionLocal() as db:
+        return (await queue_issue(db, None, days=7)).id
+
+def dispatcher(stub: SMTPStub, args, cls=NewsletterDispatcher, **kwargs) -> NewsletterDispatcher:
+    return cls(
+        SessionLocal,
+        SMTPPool(stub.host, stub.port, args.connections),
+        SendRateLimiter(args.rate),
+        batch_size=args.batch_size,
+        **kwargs,
+    )
+
+def delivery_states(issue_id: int) -> dict:
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(NewsletterDelivery.status, NewsletterDelivery.last_error, func.count())
+            .where(NewsletterDelivery.issue_id == issue_id)
+            .group_by(NewsletterDelivery.status, NewsletterDelivery.last_error)
+        ).all()
+    reasons = {INTERRUPTED_ERROR: " (interrupted)", UNSUBSCRIBED_ERROR: " (unsubscribed)"}
+    return {f"{status.value}{reasons.get(error, '')}": count for status, error, count in rows}
+
+def throughput(args) -> dict:
+    stub = SMTPStub(latency=args.latency_ms / 1000).start()
+    try:
+        issue_id = asyncio.run(queue())
+        stats = dispatcher(stub, args).run_once()
+        return {
+            "messages_per_sec": round(stats["sent"] / stats["elapsed_seconds"], 1),
+            "dispatch": stats,
+            "smtp_connections": stub.connections,
+            "deliveries": delivery_states(issue_id),
+        }
+    finally:
+        stub.stop()
+
+def crash_and_resume(args) -> dict:
+    stub = SMTPStub(latency=args.latency_ms / 1000).start()
+    try:
+        issue_id = asyncio.run(queue())
+        try:
+            dispatcher(stub, args, CrashingDispatcher, crash_after_batches=args.crash_after).run_once()
+        except SystemExit:
+            pass
+        # The replacement worker treats the dead worker's claims as expired straight away
+        resumed = dispatcher(stub, args, claim_timeout=0).run_once()
+        duplicates = sum(1 for count in stub.received.values() if count > 1)
+        states = delivery_states(issue_id)
+        assert duplicates == 0, f"{duplicates} recipients got the issue twice"
+        assert resumed["status"] == "sent", resumed
+        assert set(states) <= {"sent", "failed (interrupted)"}, states
+        return {"resumed": resumed, "deliveries": states, "duplicates": duplicates}
+    finally:
+        stub.stop()
+
+def unsubscribed_and_deferred(args) -> dict:
+    deferred = "reader0@example.com"
+    unsubscribed = [f"reader{i}@example.com" for i in range(1, 11)]
+    stub = SMTPStub(latency=args.latency_ms / 1000, defer={deferred}).start()
+    try:
+        issue_id = asyncio.run(queue())
+        with engine.begin() as connection:
+            connection.execute(
+                update(NewsletterSubscriber).where(NewsletterSubscriber.email.in_(unsubscribed)).values(is_active=False)
+            )
+        first = dispatcher(stub, args, retry_delay=3600).run_once()
+        # Straight away again: the deferred recipient isn't due for an hour, so there is nothing to do
+        second = dispatcher(stub, args, retry_delay=3600).run_once()
+        states = delivery_states(issue_id)
+        assert not any(stub.received[email] for email in unsubscribed), "an unsubscribed reader got the issue"
+        assert first["retried"] == 1 and second is None, (first, second)
+        assert states.get("failed (unsubscribed)") == len(unsubscribed) and states.get("pending") == 1, states
+
+        # An issue queued while the first waits on its retry goes out instead of queuing behind it
+        next_issue_id = asyncio.run(queue())
+        next_issue = dispatcher(stub, args, retry_delay=3600).run_once()
+        next_states = delivery_states(next_issue_id)
+        assert next_issue is not None and next_issue["issue_id"] == next_issue_id, next_issue
+        assert next_issue["sent"] == first["sent"] and next_issue["retried"] == 1, (first, next_issue)
+        assert delivery_states(issue_id) == states, "the waiting issue's deferred recipient was retried early"
+        return {
+            "first_run": first,
+            "second_run": second,
+            "deliveries": states,
+            "next_issue_run": next_issue,
+            "next_issue_deliveries": next_states,
+        }
+    finally:
+        stub.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=0, help="Messages/sec; 0 is unthrottled")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated SMTP server time per message")
+    parser.add_argument("--crash-after", type=int, default=3, help="Batches sent before the simulated crash")
+    args = parser.parse_args()
+
+    seed(args.subscribers)
+    report = {
+        "subscribers": args.subscribers,
+        "batch_size": args.batch_size,
+        "connections": args.connections,
+        "rate": args.rate,
+        "throughput": throughput(args),
+        "crash_and_resume": crash_and_resume(args),
+        "unsubscribed_and_deferred": unsubscribed_and_deferred(args),
+    }
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,114 @@
+"""
+Compare first-page and deep-page latency of GET /api/posts/ for OFFSET
+(skip) paging versus keyset (cursor) paging.
+Seeds a scratch SQLite database by default; pass --database-url to run
+against a local Postgres instead (its posts table must be empty or disposable).
+Usage: python -m scripts.bench_pagination [--rows 1000000] [--page 10000]
+"""
+import sys
+import os
+import argparse
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--rows", type=int, default=1_000_000)
+parser.add_argument("--page", type=int, default=10_000, help="deep page number to compare with page 1")
+parser.add_argument("--limit", type=int, default=100)
+parser.add_argument("--repeat", type=int, default=5)
+parser.add_argument("--database-url", default=None)
+args = parser.parse_args()
+
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-pagination-'), 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-pagination-secret")
+
+import json
+import statistics
+import time
+from sqlalchemy import text
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import SessionLocal, create_schema, engine
+from app.models import User, Post, PostStatus, UserRole
+from app.pagination import encode_cursor
+
+SEED_SQL = {
+    # Rows share timestamps four at a time so the (created_at, id) tie-break is exercised
+    "sqlite": """
+        WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :count)
+        INSERT INTO posts (author_id, title, content, status, created_at)
+        SELECT :author_id, 'Benchmark post ' || n, 'Lorem ipsum dolor sit amet', 'APPROVED',
+               datetime('now', '-' || (n / 4) || ' seconds')
+        FROM seq
+    """,
+    "postgresql": """
+        INSERT INTO posts (author_id, title, content, status, created_at)
+        SELECT :author_id, 'Benchmark post ' || n, 'Lorem ipsum dolor sit amet', 'APPROVED',
+               now() - (n / 4) * interval '1 second'
+        FROM generate_series(1, :count) AS n
+    """,
+}
+
+def seed(count: int):
+    db = SessionLocal()
+    try:
+        author = User(email="pagination@example.com", hashed_password="x",
+                      full_name="Pagination Bench", role=UserRole.ALUMNI, is_active=True)
+        db.add(author)
+        db.flush()
+        db.execute(text(SEED_SQL[engine.dialect.name]), {"count": count, "author_id": author.id})
+        db.commit()
+    finally:
+        db.close()
+
+def cursor_before(offset: int) -> str:
+    """Cursor a client would hold after reading `offset` rows of the feed"""
+    db = SessionLocal()
+    try:
+        row = (
+            db.query(Post.created_at, Post.id)
+            .filter(Post.status == PostStatus.APPROVED)
+            .order_by(Post.created_at.desc(), Post.id.desc())
+            .offset(offset - 1)
+            .first()
+        )
+        return encode_cursor(row.created_at, row.id)
+    finally:
+        db.close()
+
+def time_request(client: TestClient, url: str, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return round(statistics.median(samples) * 1000, 2)
+
+if __name__ == "__main__":
+    create_schema(engine)
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        seed(args.rows)
+        print(f"Seeded {args.rows} posts in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        deep_offset = (args.page - 1) * args.limit
+        deep_cursor = cursor_before(deep_offset)
+        base = f"/api/posts/?limit={args.limit}"
+        report = {
+            "rows": args.rows,
+            "limit": args.limit,
+            "deep_page": args.page,
+            "dialect": engine.dialect.name,
+            "median_ms": {
+                "offset_page_1": time_request(client, base, args.repeat),
+                "offset_deep_page": time_request(client, f"{base}&skip={deep_offset}", args.repeat),
+                "cursor_page_1": time_request(client, base, args.repeat),
+                "cursor_deep_page": time_request(client, f"{base}&cursor={deep_cursor}", args.repeat),
+            },
+        }
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,105 @@
+"""
+Load benchmark for the public posts feed (GET /api/posts/).
+Reports requests/sec and latency percentiles for a running server, so the
+same command can be pointed at two builds to compare them.
+Usage: python -m scripts.bench_posts_feed --url http://localhost:8000 --seed 500
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import json
+import time
+import httpx
+
+def seed_posts(count: int):
+    """Insert an author and `count` approved posts through the sync session"""
+    from app.database import SessionLocal, engine, Base
+    from app.models import User, Post, PostStatus, UserRole
+    from app.auth import get_password_hash
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        author = db.query(User).filter(User.email == "bench@example.com").first()
+        if not author:
+            author = User(
+                email="bench@example.com",
+                hashed_password=get_password_hash("bench-password"),
+                full_name="Bench Author",
+                role=UserRole.ALUMNI,
+                is_active=True
+            )
+            db.add(author)
+            db.flush()
+        db.add_all([
+            Post(
+                author_id=author.id,
+                title=f"Benchmark post {i}",
+                content="Lorem ipsum dolor sit amet " * 8,
+                status=PostStatus.APPROVED
+            )
+            for i in range(count)
+        ])
+        db.commit()
+        print(f"Seeded {count} approved posts")
+    finally:
+        db.close()
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_load(url: str, path: str, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "path": path,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/posts/")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0, help="insert this many posts before running")
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_posts(args.seed)
+    report = asyncio.run(run_load(args.url, args.path, args.concurrency, args.duration))
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,273 @@
+"""
+Check the login/register/subscribe rate limits end to end, then measure how
+many limiter decisions a process makes per second.
+
+The checks run the app in-process behind RateLimitMiddleware with a
+hand-driven clock: a burst from one IP, then one account tried from many IPs,
+must be refused with 429 + Retry-After once the buckets are empty, without a
+single SQL statement or bcrypt call for the refused requests, and let through
+again once the buckets refill. Oversized bodies on a per-account route must
+get 413 after at most MAX_ACCOUNT_BODY_BYTES have been read. The shared
+backend is checked the same way against a local fake of Redis shared by two
+limiters, standing in for two workers. Exits non-zero if a check fails or the in-process backend makes
+fewer than --min-rate decisions per second.
+Usage: python -m scripts.bench_rate_limit [--decisions 200000] [--min-rate 50000]
+"""
+import sys
+import os
+import argparse
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--decisions", type=int, default=200_000)
+parser.add_argument("--clients", type=int, default=10_000, help="Distinct IPs the measured decisions are spread over")
+parser.add_argument("--min-rate", type=float, default=50_000, help="Required decisions per second")
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-rate-limit-'), 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-rate-limit-secret")
+os.environ["BCRYPT_ROUNDS"] = "4"
+# The app's own limiter is replaced by ones built here around the clock and backends under test
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+import asyncio
+import json
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.auth import get_password_hash
+from app.database import SessionLocal, create_schema, engine
+from app.hashing import password_hasher
+from app.models import User, UserRole
+from app.rate_limit import (
+    MAX_ACCOUNT_BODY_BYTES,
+    MemoryRateLimitBackend,
+    Rate,
+    RateLimiter,
+    RateLimitMiddleware,
+    RedisRateLimitBackend,
+)
+
+LOGIN = ("POST", "/api/auth/login")
+REGISTER = ("POST", "/api/auth/register")
+SUBSCRIBE = ("POST", "/api/newsletter/subscribe")
+LIMITS = {
+    LOGIN: (Rate.parse("5/minute"), Rate.parse("3/minute")),
+    REGISTER: (Rate.parse("2/hour"), None),
+    SUBSCRIBE: (None, Rate.parse("2/hour")),
+}
+EMAIL = "limited@example.com"
+PASSWORD = "limited-password"
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakeRedis:
+    """
+    Just enough of redis.asyncio.Redis for RedisRateLimitBackend:
+    register_script() of the token bucket, run by a Python port of the Lua
+    against this object's own hashes and clock.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.hashes: dict[str, dict] = {}
+        self.calls = 0
+
+    def register_script(self, source: str):
+        assert "HMGET" in source and "PEXPIRE" in source, "unexpected script"
+
+        async def run(keys, args):
+            self.calls += 1
+            capacity, per_second = float(args[0]), float(args[1])
+            now = self.clock()
+            bucket = self.hashes.setdefault(keys[0], {})
+            tokens = float(bucket.get("tokens", capacity))
+            at = float(bucket.get("at", now))
+            tokens = min(capacity, tokens + max(0.0, now - at) * per_second)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / per_second
+            bucket.update(tokens=str(tokens), at=str(now))
+            return str(wait).encode()
+
+        return run
+
+class Work:
+    """SQL statements run and bcrypt operations finished since the last reset"""
+
+    def __init__(self):
+        self.statements = 0
+        event.listen(Engine, "before_cursor_execute", self._count)
+        self.reset()
+
+    def _count(self, *_):
+        self.statements += 1
+
+    def reset(self):
+        self.statements = 0
+        self.hashes = password_hasher.hash_latency.count
+
+    def done(self) -> dict:
+        return {"statements": self.statements, "bcrypt": password_hasher.hash_latency.count - self.hashes}
+
+def check(condition: bool, message: str):
+    if not condition:
+        sys.exit(f"FAILED: {message}")
+
+def login(client: TestClient, email: str = EMAIL, password: str = "wrong-password"):
+    return client.post("/api/auth/login", json={"email": email, "password": password})
+
+def check_limits(backend, clock: FakeClock, work: Work) -> dict:
+    limited = RateLimitMiddleware(app, RateLimiter(LIMITS, backend))
+    results = {}
+    with TestClient(limited, client=("203.0.113.1", 50000)) as client:
+        # Per IP: 5 logins for different accounts, then refusals that cost nothing
+        statuses = [login(client, f"nobody{number}@example.com").status_code for number in range(5)]
+        check(statuses == [401] * 5, f"logins under the IP limit answered {statuses}")
+        work.reset()
+        refused = [login(client, f"nobody{number}@example.com") for number in range(5, 15)]
+        check(all(response.status_code == 429 for response in refused), "IP burst past the limit was not refused")
+        check(refused[0].headers.get("retry-after") == "12", f"Retry-After {refused[0].headers.get('retry-after')}")
+        check(work.done() == {"statements": 0, "bcrypt": 0}, f"refused logins did work: {work.done()}")
+        results["ip_burst_refused"] = len(refused)
+
+        clock.now += 12
+        check(login(client, "nobody0@example.com").status_code == 401, "IP bucket did not refill")
+
+    # Per account: the same email from a new IP each time
+    refused_work = {"statements": 0, "bcrypt": 0}
+    statuses = []
+    for number in range(8):
+        with TestClient(limited, client=(f"198.51.100.{number}", 50000)) as client:
+            work.reset()
+            response = login(client, EMAIL, PASSWORD if number == 0 else "wrong-password")
+            statuses.append(response.status_code)
+            if response.status_code == 429:
+                refused_work = {key: refused_work[key] + value for key, value in work.done().items()}
+    check(statuses == [200, 401, 401] + [429] * 5, f"one account from many IPs answered {statuses}")
+    check(refused_work == {"statements": 0, "bcrypt": 0}, f"refused account logins did work: {refused_work}")
+    results["account_refused"] = statuses.count(429)
+
+    with TestClient(limited, client=("192.0.2.7", 50000)) as client:
+        # Register: per IP only; subscribe: per account only, whatever the case and spacing of the email
+        body = {"email": "new@example.com", "password": "pw", "full_name": "New"}
+        statuses = [client.post("/api/auth/register", json=body).status_code for _ in range(3)]
+        check(statuses == [201, 400, 429], f"register answered {statuses}")
+        statuses = [
+            client.post("/api/newsletter/subscribe", json={"email": email}).status_code
+            for email in ("news@example.com", " News@Example.com ", "news@example.com")
+        ]
+        check(statuses == [201, 201, 429], f"subscribe answered {statuses}")
+        # Unlimited routes and malformed bodies go straight to the app
+        check(client.get("/api/health").status_code == 200, "unlimited route affected")
+        check(client.post("/api/auth/login", content=b"not json").status_code == 422, "malformed body not passed on")
+    return results
+
+def check_shared(clock: FakeClock) -> dict:
+    """Two workers with their own limiter over one fake Redis spend the same buckets"""
+    redis = FakeRedis(clock)
+    workers = [
+        RateLimitMiddleware(app, RateLimiter(LIMITS, RedisRateLimitBackend(client=redis)))
+        for _ in range(2)
+    ]
+    statuses = []
+    for number in range(8):
+        with TestClient(workers[number % 2], client=("203.0.113.99", 50000)) as client:
+            statuses.append(login(client, f"shared{number}@example.com").status_code)
+    check(statuses == [401] * 5 + [429] * 3, f"workers sharing buckets answered {statuses}")
+    clock.now += 60
+    with TestClient(workers[0], client=("203.0.113.99", 50000)) as client:
+        check(login(client, "shared0@example.com").status_code == 401, "shared bucket did not refill")
+    return {"shared_refused": statuses.count(429), "redis_calls": redis.calls}
+
+async def check_body_limit() -> dict:
+    """An endless body, and one declared too large, are refused without reaching the app or being kept"""
+    async def unreachable(scope, receive, send):
+        raise AssertionError("an oversized body reached the app")
+
+    middleware = RateLimitMiddleware(unreachable, RateLimiter(LIMITS, MemoryRateLimitBackend()))
+    results = {}
+    for name, headers in (("streamed", []), ("declared", [(b"content-length", b"1000000000")])):
+        scope = {"type": "http", "method": "POST", "path": SUBSCRIBE[1], "client": ("10.0.0.2", 1), "headers": headers}
+        received = 0
+        statuses = []
+
+        async def receive():
+            nonlocal received
+            received += 4096
+            return {"type": "http.request", "body": b" " * 4096, "more_body": True}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await middleware(scope, receive, send)
+        check(statuses == [413], f"{name} oversized body answered {statuses}")
+        check(received <= MAX_ACCOUNT_BODY_BYTES + 4096, f"{name} oversized body read {received} bytes")
+        results[name] = {"status": statuses[0], "bytes_read": received}
+    return results
+
+async def measure_decisions(decisions: int, clients: int) -> dict:
+    """Per-IP decisions on the login route, spread over `clients` addresses so some are refused"""
+    limiter = RateLimiter(LIMITS, MemoryRateLimitBackend())
+    addresses = [f"10.{number // 65536}.{number // 256 % 256}.{number % 256}" for number in range(clients)]
+    refused = 0
+    started = time.perf_counter()
+    for number in range(decisions):
+        if await limiter.check_ip("POST", "/api/auth/login", addresses[number % clients]):
+            refused += 1
+    elapsed = time.perf_counter() - started
+    return {"decisions": decisions, "refused": refused, "per_second": round(decisions / elapsed)}
+
+async def measure_middleware(requests: int) -> dict:
+    """Whole middleware, refusing every request: the cost a blocked flood adds per request"""
+    async def unreachable(scope, receive, send):
+        raise AssertionError("a refused request reached the app")
+
+    middleware = RateLimitMiddleware(unreachable, RateLimiter(LIMITS, MemoryRateLimitBackend()))
+    scope = {"type": "http", "method": "POST", "path": "/api/auth/login", "client": ("10.0.0.1", 1), "headers": []}
+    while await middleware.limiter.check_ip("POST", "/api/auth/login", "10.0.0.1") == 0:
+        pass
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await middleware(scope, receive, send)
+    elapsed = time.perf_counter() - started
+    return {"requests": requests, "per_second": round(requests / elapsed)}
+
+if __name__ == "__main__":
+    create_schema(engine)
+    db = SessionLocal()
+    db.add(User(email=EMAIL, hashed_password=get_password_hash(PASSWORD), full_name="Limited", role=UserRole.ALUMNI))
+    db.commit()
+    db.close()
+
+    work = Work()
+    clock = FakeClock()
+    report = {"memory_backend": check_limits(MemoryRateLimitBackend(clock=clock), clock, work)}
+    report["shared_backend"] = check_shared(clock)
+    report["oversized_bodies"] = asyncio.run(check_body_limit())
+    report["decisions"] = asyncio.run(measure_decisions(args.decisions, args.clients))
+    report["refused_requests"] = asyncio.run(measure_middleware(args.decisions // 4))
+    report["min_rate"] = args.min_rate
+    print(json.dumps(report, indent=2))
+    if report["decisions"]["per_second"] < args.min_rate:
+        sys.exit(f"{report['decisions']['per_second']} decisions/s, under the required {args.min_rate}")
+    print("Rate limits ok")
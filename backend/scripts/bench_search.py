@@ -0,0 +1,110 @@
+"""
+Latency of GET /api/search against a synthetic corpus (500k rows by default).
+Seeds a scratch SQLite database by default; pass --database-url to run
+against a local Postgres instead (its tables must be empty or disposable).
+Usage: python -m scripts.bench_search [--posts 450000] [--profiles 50000]
+"""
+import sys
+import os
+import argparse
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--posts", type=int, default=450_000)
+parser.add_argument("--profiles", type=int, default=50_000)
+parser.add_argument("--repeat", type=int, default=20)
+parser.add_argument("--database-url", default=None)
+args = parser.parse_args()
+
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-search-'), 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-search-secret")
+
+import itertools
+import json
+import random
+import time
+from sqlalchemy import insert
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import create_schema, engine
+from app.models import User, UserRole, AlumniProfile, Post, PostStatus
+from app.search import rebuild_search_index
+from scripts.bench_posts_feed import percentile
+
+BATCH = 10_000
+rng = random.Random(42)
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "qu", "bi"]
+# Zipf-ish vocabulary: a few words are everywhere, most are rare
+VOCABULARY = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(20_000)})
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+def words(count: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=count))
+
+def seed(post_count: int, profile_count: int):
+    with engine.begin() as conn:
+        for start in range(0, profile_count, BATCH):
+            size = min(BATCH, profile_count - start)
+            conn.execute(insert(User), [
+                {"email": f"user{start + i}@example.com", "hashed_password": "x",
+                 "full_name": words(2).title(), "role": UserRole.ALUMNI, "is_active": True}
+                for i in range(size)
+            ])
+            conn.execute(insert(AlumniProfile), [
+                {"user_id": start + i + 1, "major": words(1), "company": words(1),
+                 "current_position": words(2), "bio": words(30)}
+                for i in range(size)
+            ])
+        for start in range(0, post_count, BATCH):
+            size = min(BATCH, post_count - start)
+            conn.execute(insert(Post), [
+                {"author_id": rng.randint(1, max(1, profile_count)), "title": words(6),
+                 "content": words(80), "status": PostStatus.APPROVED}
+                for _ in range(size)
+            ])
+
+def time_query(client: TestClient, query: str, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get("/api/search", params={"q": query})
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return {
+        "hits": len(response.json()),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+    }
+
+if __name__ == "__main__":
+    create_schema(engine)
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        seed(args.posts, args.profiles)
+        seeded = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            rebuild_search_index(conn)
+        indexed = time.perf_counter() - started
+
+        queries = {
+            "common term": VOCABULARY[0],
+            "mid-frequency term": VOCABULARY[200],
+            "rare term": VOCABULARY[-1],
+            "two terms": f"{VOCABULARY[0]} {VOCABULARY[50]}",
+            "no match": "zzzzzz",
+        }
+        report = {
+            "dialect": engine.dialect.name,
+            "documents": args.posts + args.profiles,
+            "seed_s": round(seeded, 1),
+            "index_build_s": round(indexed, 1),
+            "queries": {name: time_query(client, query, args.repeat) for name, query in queries.items()},
+        }
+    print(json.dumps(report, indent=2))
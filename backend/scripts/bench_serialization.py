@@ -0,0 +1,130 @@
+"""
+Serialize a page of 1,000 PostWithAuthor rows (ORM objects, as the feed loads
+them) the way a list endpoint does, before and after the fast path:
+- before: author emails revalidated as EmailStr, then jsonable_encoder + json.dumps
+- after: the response schemas as they are now, through a TypeAdapter's dump_json
+- orjson over the same validated page, if it is installed, for comparison
+Every path must produce the same JSON. Also reports what gzip (and brotli, if
+installed) make of the body at a few levels.
+Usage: python -m scripts.bench_serialization [--rows 1000] [--repeat 20]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "bench-serialization-secret")
+
+import argparse
+import gzip
+import json
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from fastapi.encoders import jsonable_encoder
+from pydantic import EmailStr, TypeAdapter
+
+from app.models import Post, PostStatus, User, UserRole
+from app.schemas import PostWithAuthor, UserResponse
+
+class EmailStrUserResponse(UserResponse):
+    email: EmailStr
+
+class EmailStrPostWithAuthor(PostWithAuthor):
+    author: EmailStrUserResponse
+
+def build_page(rows: int) -> list[Post]:
+    """Transient ORM rows: 50 authors, posts of a few hundred characters"""
+    started = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    authors = [
+        User(
+            id=number, email=f"alumni{number}@example.com", full_name=f"Alumni {number}",
+            role=UserRole.ALUMNI, is_active=True, created_at=started,
+        )
+        for number in range(1, 51)
+    ]
+    return [
+        Post(
+            id=number, title=f"Update {number}", content=f"News from the class of {2000 + number % 25}. " * 8,
+            author_id=authors[number % 50].id, author=authors[number % 50], status=PostStatus.APPROVED,
+            created_at=started + timedelta(minutes=number), updated_at=None,
+        )
+        for number in range(1, rows + 1)
+    ]
+
+def timed(function, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"median_ms": round(statistics.median(samples), 2), "min_ms": round(min(samples), 2)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    page = build_page(args.rows)
+    before_adapter = TypeAdapter(list[EmailStrPostWithAuthor])
+    after_adapter = TypeAdapter(list[PostWithAuthor])
+
+    def before_stdlib() -> bytes:
+        return json.dumps(
+            jsonable_encoder(before_adapter.validate_python(page)), ensure_ascii=False, separators=(",", ":")
+        ).encode()
+
+    def before_dump_json() -> bytes:
+        return before_adapter.dump_json(before_adapter.validate_python(page))
+
+    def after() -> bytes:
+        return after_adapter.dump_json(after_adapter.validate_python(page))
+
+    paths = {
+        "before_stdlib_json": before_stdlib,
+        "before_dump_json": before_dump_json,
+        "after_dump_json": after,
+    }
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+    if orjson is not None:
+        paths["after_orjson"] = lambda: orjson.dumps(after_adapter.dump_python(after_adapter.validate_python(page), mode="json"))
+
+    body = after()
+    expected = json.loads(body)
+    for name, function in paths.items():
+        if json.loads(function()) != expected:
+            sys.exit(f"{name} serialized the page differently")
+
+    validated = after_adapter.validate_python(page)
+    report = {
+        "rows": args.rows,
+        "repeat": args.repeat,
+        "body_bytes": len(body),
+        "serialize": {name: timed(function, args.repeat) for name, function in paths.items()},
+        "encode_only": {"dump_json": timed(lambda: after_adapter.dump_json(validated), args.repeat)},
+        "compression": {},
+    }
+    if orjson is not None:
+        report["encode_only"]["orjson"] = timed(
+            lambda: orjson.dumps(after_adapter.dump_python(validated, mode="json")), args.repeat
+        )
+    for level in (1, 6, 9):
+        report["compression"][f"gzip-{level}"] = {
+            "bytes": len(gzip.compress(body, compresslevel=level)),
+            **timed(lambda: gzip.compress(body, compresslevel=level), args.repeat),
+        }
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    if brotli is not None:
+        for quality in (1, 4, 11):
+            report["compression"][f"br-{quality}"] = {
+                "bytes": len(brotli.compress(body, quality=quality)),
+                **timed(lambda: brotli.compress(body, quality=quality), args.repeat),
+            }
+    before_ms = report["serialize"]["before_stdlib_json"]["median_ms"]
+    report["speedup"] = round(before_ms / report["serialize"]["after_dump_json"]["median_ms"], 1)
+    print(json.dumps(report, indent=2))
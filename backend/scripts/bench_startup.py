@@ -0,0 +1,101 @@
+"""
+Cold start of the API, for keeping worker startup within a budget. Each run is
+a fresh interpreter that imports app.main and then runs the app's lifespan
+startup against a scratch SQLite database, reporting the median time to each
+point. A separate `python -X importtime` run lists the modules that dominate
+the import. Exits non-zero when the median time to ready is above
+--budget-ms, so it can run as a CI step.
+Usage: python -m scripts.bench_startup [--runs 7] [--budget-ms 1500] [--create-schema]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import statistics
+import subprocess
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child; times are from just before `import app.main`
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def start():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(start())
+print(json.dumps({"import_ms": (imported - started) * 1000, "ready_ms": (ready - started) * 1000}))
+"""
+
+def child_env(database_dir: str, create_schema: bool) -> dict:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(database_dir, 'startup.db')}"
+    env.setdefault("SECRET_KEY", "bench-startup-secret")
+    env["CREATE_SCHEMA_ON_STARTUP"] = "true" if create_schema else "false"
+    return env
+
+def timed_start(env: dict) -> dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    process_ms = (time.perf_counter() - started) * 1000
+    return {**json.loads(result.stdout.strip().splitlines()[-1]), "process_ms": process_ms}
+
+def slowest_imports(env: dict, top: int) -> dict:
+    """Per-module import times from `python -X importtime -c "import app.main"`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if own.strip().isdigit():
+            # Nesting is shown by indenting the name: app.main is depth 0, what it imports depth 1
+            depth = (len(name) - len(name.lstrip()) - 1) // 2
+            modules.append({"module": name.strip(), "depth": depth,
+                            "own_ms": int(own) / 1000, "cumulative_ms": int(cumulative) / 1000})
+    app_main = next(module for module in modules if module["module"] == "app.main")
+    # What app.main imports directly, so a package isn't listed along with everything it pulls in
+    app_imports = [module for module in modules if module["depth"] == 1]
+    return {
+        "app_main_cumulative_ms": app_main["cumulative_ms"],
+        "by_cumulative_time": sorted(app_imports, key=lambda module: module["cumulative_ms"], reverse=True)[:top],
+        "by_own_time": sorted(modules, key=lambda module: module["own_ms"], reverse=True)[:top],
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Median import + lifespan startup")
+    parser.add_argument("--create-schema", action="store_true", help="Start with CREATE_SCHEMA_ON_STARTUP=true")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    env = child_env(tempfile.mkdtemp(prefix="bench-startup-"), args.create_schema)
+    timed_start(env)  # warm the OS file cache and compile bytecode
+    runs = [timed_start(env) for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "create_schema": args.create_schema,
+        **{
+            key: round(statistics.median(run[key] for run in runs), 1)
+            for key in ("import_ms", "ready_ms", "process_ms")
+        },
+        "budget_ms": args.budget_ms,
+        "imports": slowest_imports(env, args.top),
+    }
+    print(json.dumps(report, indent=2))
+    if report["ready_ms"] > args.budget_ms:
+        sys.exit(f"Startup took {report['ready_ms']} ms, over the {args.budget_ms} ms budget")
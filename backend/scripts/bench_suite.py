@@ -0,0 +1,595 @@
+"""
+Load test of every router (auth, alumni, posts, search, admin, newsletter).
+Seeds a synthetic dataset at a chosen scale through app.models, checks that
+each endpoint answers as expected once, then drives a weighted read/write mix
+with --concurrency clients in-process (no network, no external services) and
+prints throughput and latency percentiles per operation, per router and
+overall as JSON.
+
+The dataset and the sequence of operations each client picks are fixed by
+--seed, so two commits run with the same arguments are comparable; pass an
+earlier report to --compare to get the changes. Runs against a scratch SQLite
+database by default, or a local Postgres via --database-url (its tables must
+be empty).
+Usage: python -m scripts.bench_suite [--scale small|medium|large] [--operations 3000] [--output report.json] [--compare baseline.json]
+"""
+import sys
+import os
+import argparse
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCALES = {
+    "small": {"users": 200, "posts": 2_000, "subscribers": 500},
+    "medium": {"users": 2_000, "posts": 20_000, "subscribers": 5_000},
+    "large": {"users": 20_000, "posts": 200_000, "subscribers": 50_000},
+}
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+parser.add_argument("--users", type=int, help="Override the scale's user count")
+parser.add_argument("--posts", type=int, help="Override the scale's post count")
+parser.add_argument("--subscribers", type=int, help="Override the scale's subscriber count")
+parser.add_argument("--operations", type=int, default=3000, help="Measured requests, split across the clients")
+parser.add_argument("--concurrency", type=int, default=8)
+parser.add_argument("--seed", type=int, default=42)
+parser.add_argument("--bcrypt-rounds", type=int, default=4, help="Cost of the seeded and newly hashed passwords")
+parser.add_argument("--database-url", default=None)
+parser.add_argument("--output", help="Also write the report to this file")
+parser.add_argument("--compare", help="Report from an earlier run to compare against")
+args = parser.parse_args()
+
+if args.database_url:
+    os.environ["DATABASE_URL"] = args.database_url
+else:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-suite-'), 'bench.db')}"
+os.environ.setdefault("SECRET_KEY", "bench-suite-secret")
+os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+# Every simulated client shares one address, so the per-IP login/register limits would refuse most of the mix
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+# Any client may start an import while another client's is still running
+os.environ["IMPORT_MAX_RUNNING"] = str(args.concurrency)
+
+import asyncio
+import itertools
+import json
+import platform
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+import httpx
+from sqlalchemy import func, insert, select
+
+from app.main import app
+from app.auth import create_access_token, get_password_hash
+from app.database import create_schema, engine
+from app.counters import rebuild_stats
+from app.facets import rebuild_profile_facets
+from app.models import AlumniProfile, NewsletterSubscriber, Post, PostStatus, User, UserRole
+from app.search import rebuild_search_index
+from scripts.bench_posts_feed import percentile
+
+BATCH = 5_000
+PASSWORD = "bench-suite-password"
+ADMIN_EMAIL = "bench-admin@example.com"
+MAJORS = ["Computer Science", "Economics", "Biology", "History", "Mechanical Engineering",
+          "Mathematics", "Psychology", "Architecture", "Chemistry", "Music"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries",
+             "Wayne Enterprises", "Cyberdyne", "Soylent", "Tyrell"]
+WORDS = ["reunion", "hiring", "conference", "mentor", "startup", "research", "award", "volunteer",
+         "promotion", "workshop", "internship", "launch", "scholarship", "meetup", "podcast", "thesis"]
+SEARCH_TERMS = WORDS + ["Economics", "Globex", "Biology", "Initech", "engineer"]
+# Share of users kept out of the acting pool so admins can toggle them freely
+TOGGLE_SHARE = 0.02
+
+def words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choices(WORDS, k=count))
+
+def seed(counts: dict, rng: random.Random) -> dict:
+    """Insert users, profiles, posts and subscribers; returns the ids the workload draws on"""
+    create_schema(engine)
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(User)).scalar():
+            sys.exit("The database already has users; bench_suite needs empty tables")
+
+    hashed = get_password_hash(PASSWORD)
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        admin_id = conn.execute(insert(User).returning(User.id), {
+            "email": ADMIN_EMAIL, "hashed_password": hashed, "full_name": "Bench Admin",
+            "role": UserRole.ADMIN, "is_active": True,
+        }).scalar_one()
+
+        users = []
+        for start in range(0, counts["users"], BATCH):
+            rows = [
+                {"email": f"alumni{number}@example.com", "hashed_password": hashed,
+                 "full_name": words(rng, 2).title(), "role": UserRole.ALUMNI, "is_active": True}
+                for number in range(start, min(counts["users"], start + BATCH))
+            ]
+            ids = conn.execute(insert(User).returning(User.id, sort_by_parameter_order=True), rows).scalars()
+            users.extend(zip(ids, (row["email"] for row in rows)))
+
+        with_profile = [index for index in range(len(users)) if rng.random() < 0.8]
+        profile_ids = []
+        for start in range(0, len(with_profile), BATCH):
+            rows = [
+                {"user_id": users[index][0], "graduation_year": rng.randint(1990, 2025),
+                 "major": rng.choice(MAJORS), "company": rng.choice(COMPANIES),
+                 "current_position": words(rng, 2).title(), "bio": words(rng, 25)}
+                for index in with_profile[start:start + BATCH]
+            ]
+            profile_ids.extend(conn.execute(
+                insert(AlumniProfile).returning(AlumniProfile.id, sort_by_parameter_order=True), rows
+            ).scalars())
+
+        posts = {status: [] for status in PostStatus}
+        for start in range(0, counts["posts"], BATCH):
+            rows = [
+                {"author_id": rng.choice(users)[0] if users else admin_id, "title": words(rng, 6).capitalize(),
+                 "content": words(rng, 60),
+                 "status": rng.choices(list(PostStatus), weights=(10, 85, 5))[0],
+                 "created_at": now - timedelta(seconds=rng.randint(0, 365 * 86_400))}
+                for _ in range(start, min(counts["posts"], start + BATCH))
+            ]
+            ids = conn.execute(insert(Post).returning(Post.id, sort_by_parameter_order=True), rows).scalars()
+            for post_id, row in zip(ids, rows):
+                posts[row["status"]].append(post_id)
+
+        subscribers = [f"subscriber{number}@example.com" for number in range(counts["subscribers"])]
+        for start in range(0, len(subscribers), BATCH):
+            conn.execute(insert(NewsletterSubscriber), [
+                {"email": email, "is_active": True} for email in subscribers[start:start + BATCH]
+            ])
+
+        rebuild_search_index(conn)
+        rebuild_profile_facets(conn)
+        rebuild_stats(conn)
+
+    toggle_count = int(len(users) * TOGGLE_SHARE)
+    return {
+        "admin_email": ADMIN_EMAIL,
+        "actors": users[toggle_count:],
+        "toggle_targets": [user_id for user_id, _ in users[:toggle_count]],
+        "with_profile": {users[index][1] for index in with_profile},
+        "profile_ids": profile_ids,
+        "posts": posts,
+        "subscribers": subscribers,
+    }
+
+def pop_random(rng: random.Random, pool: list):
+    """Remove and return a random element in O(1); None when the pool is empty"""
+    if not pool:
+        return None
+    index = rng.randrange(len(pool))
+    pool[index], pool[-1] = pool[-1], pool[index]
+    return pool.pop()
+
+class Workload:
+    """
+    The operations of the mix. Each builds one request from the shared state
+    and returns (method, url, request kwargs, expected status, callback run on
+    success), or None when the state can't supply it right now (e.g. no pending
+    posts left), in which case the client picks another operation.
+    """
+
+    def __init__(self, data: dict):
+        self.admin = {"Authorization": f"Bearer {create_access_token({'sub': data['admin_email']})}"}
+        self.tokens = {
+            email: {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
+            for _, email in data["actors"]
+        }
+        self.actors = [email for _, email in data["actors"]]
+        self.with_profile = [email for email in self.actors if email in data["with_profile"]]
+        self.without_profile = [email for email in self.actors if email not in data["with_profile"]]
+        self.toggle_targets = data["toggle_targets"]
+        self.profile_ids = data["profile_ids"]
+        self.approved = data["posts"][PostStatus.APPROVED]
+        self.pending = list(data["posts"][PostStatus.PENDING])
+        self.rejected = list(data["posts"][PostStatus.REJECTED])
+        self.created: list[tuple[int, str]] = []
+        self.subscribers = list(data["subscribers"])
+        self.issue_ids: list[int] = []
+        self.import_job_ids: list[int] = []
+        self.feed_cursors: list[str] = []
+        self.serial = itertools.count()
+
+    def _actor(self, rng):
+        email = rng.choice(self.actors)
+        return email, self.tokens[email]
+
+    def _new_email(self, kind: str) -> str:
+        return f"bench-{kind}-{next(self.serial)}@example.com"
+
+    # Auth
+    def auth_register(self, rng):
+        body = {"email": self._new_email("register"), "full_name": words(rng, 2).title(), "password": PASSWORD}
+        return "POST", "/api/auth/register", {"json": body}, 201, None
+
+    def auth_login(self, rng):
+        email, _ = self._actor(rng)
+        return "POST", "/api/auth/login", {"json": {"email": email, "password": PASSWORD}}, 200, None
+
+    def auth_me(self, rng):
+        _, headers = self._actor(rng)
+        return "GET", "/api/auth/me", {"headers": headers}, 200, None
+
+    # Alumni
+    def alumni_profiles(self, rng):
+        params = {"limit": 20}
+        if rng.random() < 0.5:
+            params["major"] = rng.choice(MAJORS)
+        return "GET", "/api/alumni/profiles", {"params": params}, 200, None
+
+    def alumni_profile_by_id(self, rng):
+        if not self.profile_ids:
+            return None
+        return "GET", f"/api/alumni/profiles/{rng.choice(self.profile_ids)}", {}, 200, None
+
+    def alumni_facets(self, rng):
+        return "GET", "/api/alumni/facets", {}, 200, None
+
+    def alumni_my_profile(self, rng):
+        if not self.with_profile:
+            return None
+        headers = self.tokens[rng.choice(self.with_profile)]
+        return "GET", "/api/alumni/profile", {"headers": headers}, 200, None
+
+    def alumni_create_profile(self, rng):
+        email = pop_random(rng, self.without_profile)
+        if email is None:
+            return None
+        body = {"graduation_year": rng.randint(1990, 2025), "major": rng.choice(MAJORS),
+                "company": rng.choice(COMPANIES), "bio": words(rng, 25)}
+        return ("POST", "/api/alumni/profile", {"json": body, "headers": self.tokens[email]}, 201,
+                lambda response: self.with_profile.append(email))
+
+    def alumni_update_profile(self, rng):
+        if not self.with_profile:
+            return None
+        headers = self.tokens[rng.choice(self.with_profile)]
+        body = {"company": rng.choice(COMPANIES), "current_position": words(rng, 2).title()}
+        return "PUT", "/api/alumni/profile", {"json": body, "headers": headers}, 200, None
+
+    # Posts
+    def posts_feed(self, rng):
+        def keep_cursor(response):
+            cursor = response.headers.get("x-next-cursor")
+            if cursor and len(self.feed_cursors) < 100:
+                self.feed_cursors.append(cursor)
+        return "GET", "/api/posts/", {"params": {"limit": 20}}, 200, keep_cursor
+
+    def posts_feed_next_page(self, rng):
+        if not self.feed_cursors:
+            return None
+        params = {"limit": 20, "cursor": rng.choice(self.feed_cursors)}
+        return "GET", "/api/posts/", {"params": params}, 200, None
+
+    def posts_get(self, rng):
+        if not self.approved:
+            return None
+        return "GET", f"/api/posts/{rng.choice(self.approved)}", {}, 200, None
+
+    def posts_my_posts(self, rng):
+        _, headers = self._actor(rng)
+        return "GET", "/api/posts/my-posts", {"headers": headers}, 200, None
+
+    def posts_create(self, rng):
+        email, headers = self._actor(rng)
+        body = {"title": words(rng, 6).capitalize(), "content": words(rng, 60)}
+        return ("POST", "/api/posts/", {"json": body, "headers": headers}, 201,
+                lambda response: self.created.append((response.json()["id"], email)))
+
+    def posts_update(self, rng):
+        # Out of the pool while in flight, so a concurrent delete can't pick it
+        created = pop_random(rng, self.created)
+        if created is None:
+            return None
+        post_id, email = created
+        body = {"content": words(rng, 60)}
+        return ("PUT", f"/api/posts/{post_id}", {"json": body, "headers": self.tokens[email]}, 200,
+                lambda response: self.created.append(created))
+
+    def posts_delete(self, rng):
+        if not self.created:
+            return None
+        post_id, email = pop_random(rng, self.created)
+        return "DELETE", f"/api/posts/{post_id}", {"headers": self.tokens[email]}, 204, None
+
+    # Search
+    def search(self, rng):
+        params = {"q": rng.choice(SEARCH_TERMS)}
+        if rng.random() < 0.3:
+            params["kind"] = rng.choice(["post", "profile"])
+        return "GET", "/api/search", {"params": params}, 200, None
+
+    # Admin
+    def admin_pending_posts(self, rng):
+        return "GET", "/api/admin/posts/pending", {"headers": self.admin}, 200, None
+
+    def admin_approve(self, rng):
+        post_id = pop_random(rng, self.pending)
+        if post_id is None:
+            return None
+        return "PUT", f"/api/admin/posts/{post_id}/approve", {"headers": self.admin}, 200, None
+
+    def admin_reject(self, rng):
+        post_id = pop_random(rng, self.pending)
+        if post_id is None:
+            return None
+        return ("PUT", f"/api/admin/posts/{post_id}/reject", {"headers": self.admin}, 200,
+                lambda response: self.rejected.append(post_id))
+
+    def _bulk(self, rng, action: str, pool: list, on_success=None):
+        if len(pool) < 10:
+            return None
+        ids = [pop_random(rng, pool) for _ in range(10)]
+        callback = (lambda response: on_success(ids)) if on_success else None
+        return "POST", f"/api/admin/posts/bulk/{action}", {"json": {"ids": ids}, "headers": self.admin}, 200, callback
+
+    def admin_bulk_approve(self, rng):
+        return self._bulk(rng, "approve", self.pending)
+
+    def admin_bulk_reject(self, rng):
+        return self._bulk(rng, "reject", self.pending, self.rejected.extend)
+
+    def admin_bulk_delete(self, rng):
+        return self._bulk(rng, "delete", self.rejected)
+
+    def admin_users(self, rng):
+        return "GET", "/api/admin/users", {"params": {"limit": 50}, "headers": self.admin}, 200, None
+
+    def admin_users_export(self, rng):
+        return "GET", "/api/admin/users/export", {"params": {"format": "ndjson"}, "headers": self.admin}, 200, None
+
+    def admin_users_import(self, rng):
+        lines = ["email,full_name,password,graduation_year,major,company"]
+        for _ in range(5):
+            lines.append(f"{self._new_email('import')},{words(rng, 2).title()},{PASSWORD},"
+                         f"{rng.randint(1990, 2025)},{rng.choice(MAJORS)},{rng.choice(COMPANIES)}")
+        files = {"file": ("alumni.csv", "\n".join(lines).encode(), "text/csv")}
+        return ("POST", "/api/admin/users/import", {"files": files, "headers": self.admin}, 202,
+                lambda response: self.import_job_ids.append(response.json()["id"]))
+
+    def admin_import_job(self, rng):
+        if not self.import_job_ids:
+            return None
+        return "GET", f"/api/admin/users/import/{rng.choice(self.import_job_ids)}", {"headers": self.admin}, 200, None
+
+    def admin_toggle_active(self, rng):
+        if not self.toggle_targets:
+            return None
+        user_id = rng.choice(self.toggle_targets)
+        return "PUT", f"/api/admin/users/{user_id}/toggle-active", {"headers": self.admin}, 200, None
+
+    def admin_metrics(self, rng):
+        name = rng.choice(["password-hashing", "feed-cache", "db-pool"])
+        return "GET", f"/api/admin/metrics/{name}", {"headers": self.admin}, 200, None
+
+    def admin_profiles(self, rng):
+        return "GET", "/api/admin/profiles", {"headers": self.admin}, 200, None
+
+    def admin_stats(self, rng):
+        return "GET", "/api/admin/stats", {"headers": self.admin}, 200, None
+
+    # Newsletter
+    def newsletter_subscribe(self, rng):
+        email = self._new_email("subscriber")
+        return ("POST", "/api/newsletter/subscribe", {"json": {"email": email}}, 201,
+                lambda response: self.subscribers.append(email))
+
+    def newsletter_unsubscribe(self, rng):
+        email = pop_random(rng, self.subscribers)
+        if email is None:
+            return None
+        return "DELETE", f"/api/newsletter/unsubscribe/{email}", {}, 200, None
+
+    def newsletter_subscribers(self, rng):
+        return "GET", "/api/newsletter/subscribers", {"headers": self.admin}, 200, None
+
+    def newsletter_subscribers_export(self, rng):
+        params = {"format": rng.choice(["ndjson", "csv"])}
+        return "GET", "/api/newsletter/subscribers/export", {"params": params, "headers": self.admin}, 200, None
+
+    def newsletter_create_issue(self, rng):
+        return ("POST", "/api/newsletter/issues", {"json": {"days": 30}, "headers": self.admin}, 201,
+                lambda response: self.issue_ids.append(response.json()["id"]))
+
+    def newsletter_get_issue(self, rng):
+        if not self.issue_ids:
+            return None
+        return "GET", f"/api/newsletter/issues/{rng.choice(self.issue_ids)}", {"headers": self.admin}, 200, None
+
+    def health(self, rng):
+        return "GET", "/api/health", {}, 200, None
+
+# (operation, weight): roughly 80% reads, weighted towards the public pages.
+# Order matters for the coverage pass, which runs each once top to bottom.
+MIX = [
+    ("posts.feed", 22), ("posts.feed_next_page", 6), ("posts.get", 10), ("posts.my_posts", 3),
+    ("posts.create", 4), ("posts.update", 2), ("posts.delete", 1),
+    ("alumni.profiles", 8), ("alumni.profile_by_id", 6), ("alumni.facets", 3), ("alumni.my_profile", 3),
+    ("alumni.create_profile", 1), ("alumni.update_profile", 2),
+    ("search", 8),
+    ("auth.me", 5), ("auth.login", 2), ("auth.register", 1),
+    ("admin.pending_posts", 1.5), ("admin.approve", 1), ("admin.reject", 0.5),
+    ("admin.bulk_approve", 0.2), ("admin.bulk_reject", 0.2), ("admin.bulk_delete", 0.2),
+    ("admin.users", 1), ("admin.users_export", 0.1), ("admin.users_import", 0.1),
+    ("admin.import_job", 0.2), ("admin.toggle_active", 0.3), ("admin.metrics", 0.5), ("admin.profiles", 0.2),
+    ("admin.stats", 0.5),
+    ("newsletter.subscribe", 2), ("newsletter.unsubscribe", 1), ("newsletter.subscribers", 0.1),
+    ("newsletter.subscribers_export", 0.1), ("newsletter.create_issue", 0.05), ("newsletter.get_issue", 0.5),
+    ("health", 1),
+]
+
+def router_of(operation: str) -> str:
+    return operation.split(".", 1)[0]
+
+def builder(workload: Workload, operation: str):
+    return getattr(workload, operation.replace(".", "_"))
+
+async def send(client: httpx.AsyncClient, spec) -> tuple[httpx.Response, float]:
+    method, url, kwargs, _, _ = spec
+    started = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    return response, time.perf_counter() - started
+
+async def coverage_pass(client: httpx.AsyncClient, workload: Workload, rng: random.Random) -> list[str]:
+    """Run every operation once; returns the ones that failed"""
+    failures = []
+    for operation, _ in MIX:
+        spec = builder(workload, operation)(rng)
+        if spec is None:
+            failures.append(f"{operation}: nothing to act on")
+            continue
+        response, _ = await send(client, spec)
+        if response.status_code != spec[3]:
+            failures.append(f"{operation}: {response.status_code} {response.text[:200]}")
+        elif spec[4]:
+            spec[4](response)
+    return failures
+
+async def client_loop(client, workload: Workload, worker: int, operations: int, samples: dict, errors: list):
+    names = [operation for operation, _ in MIX]
+    cum_weights = list(itertools.accumulate(weight for _, weight in MIX))
+    # Separate generators, so the order in which this client picks operations
+    # doesn't depend on what the other clients left in the shared state
+    picker = random.Random(f"{args.seed}:{worker}:pick")
+    rng = random.Random(f"{args.seed}:{worker}:build")
+    for _ in range(operations):
+        while True:
+            operation = picker.choices(names, cum_weights=cum_weights)[0]
+            spec = builder(workload, operation)(rng)
+            if spec is not None:
+                break
+        response, elapsed = await send(client, spec)
+        samples[operation].append(elapsed)
+        if response.status_code != spec[3]:
+            errors.append((operation, response.status_code, response.text[:200]))
+        elif spec[4]:
+            spec[4](response)
+
+def summarize(latencies: list[float], error_count: int, elapsed: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "errors": error_count,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+    }
+
+async def run(workload: Workload) -> dict:
+    # Unhandled exceptions come back as 500s and are counted, rather than ending the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        failures = await coverage_pass(client, workload, random.Random(args.seed))
+        if failures:
+            sys.exit("Coverage pass failed:\n  " + "\n  ".join(failures))
+
+        samples = defaultdict(list)
+        errors = []
+        shares = [args.operations // args.concurrency + (worker < args.operations % args.concurrency)
+                  for worker in range(args.concurrency)]
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            client_loop(client, workload, worker, share, samples, errors)
+            for worker, share in enumerate(shares)
+        ))
+        elapsed = time.perf_counter() - started
+
+    errors_by_operation = defaultdict(int)
+    for operation, _, _ in errors:
+        errors_by_operation[operation] += 1
+    by_router = defaultdict(list)
+    for operation, latencies in samples.items():
+        by_router[router_of(operation)].extend(latencies)
+    return {
+        "overall": {
+            **summarize([value for latencies in samples.values() for value in latencies], len(errors), elapsed),
+            "elapsed_seconds": round(elapsed, 2),
+        },
+        "routers": {
+            router: summarize(latencies, sum(count for operation, count in errors_by_operation.items()
+                                             if router_of(operation) == router), elapsed)
+            for router, latencies in sorted(by_router.items())
+        },
+        "operations": {
+            operation: summarize(samples[operation], errors_by_operation[operation], elapsed)
+            for operation, _ in MIX if samples[operation]
+        },
+        "error_samples": [
+            {"operation": operation, "status": status_code, "body": body} for operation, status_code, body in errors[:10]
+        ],
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def change_pct(before: float, after: float):
+    return round((after - before) / before * 100, 1) if before else None
+
+def compare(baseline: dict, report: dict) -> dict:
+    """Changes from an earlier report; lists any run settings that differ, since those make it apples to oranges"""
+    settings_keys = ("dialect", "scale", "seed", "operations", "concurrency", "bcrypt_rounds")
+    mismatched = [key for key in settings_keys if baseline["run"].get(key) != report["run"].get(key)]
+
+    def delta(before: dict, after: dict) -> dict:
+        return {
+            "rps_change_pct": change_pct(before["rps"], after["rps"]),
+            "p50_change_pct": change_pct(before["p50_ms"], after["p50_ms"]),
+            "p99_change_pct": change_pct(before["p99_ms"], after["p99_ms"]),
+        }
+
+    return {
+        "baseline_commit": baseline["run"].get("git_commit"),
+        "mismatched_settings": mismatched,
+        "overall": delta(baseline["overall"], report["overall"]),
+        "operations": {
+            operation: delta(baseline["operations"][operation], stats)
+            for operation, stats in report["operations"].items() if operation in baseline["operations"]
+        },
+    }
+
+if __name__ == "__main__":
+    counts = {name: getattr(args, name) if getattr(args, name) is not None else value
+              for name, value in SCALES[args.scale].items()}
+    seed_started = time.perf_counter()
+    data = seed(counts, random.Random(args.seed))
+    seed_seconds = time.perf_counter() - seed_started
+
+    results = asyncio.run(run(Workload(data)))
+    report = {
+        "run": {
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "dialect": engine.dialect.name,
+            "scale": counts,
+            "seed": args.seed,
+            "operations": args.operations,
+            "concurrency": args.concurrency,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "seed_seconds": round(seed_seconds, 2),
+        },
+        **results,
+    }
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            report["comparison"] = compare(json.load(baseline_file), report)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    if report["overall"]["errors"]:
+        sys.exit(f"{report['overall']['errors']} requests got an unexpected status")
@@ -0,0 +1,265 @@
+"""
+Hold many concurrent subscribers on the moderation event stream in one
+worker and report what each costs. Opens --subscribers streams to
+GET /api/admin/posts/events through the ASGI app (no network), then checks
+that:
+  - no stream holds a pooled database connection while it is open
+  - a post created and then approved through the API reaches every stream
+  - a bulk approve of more posts than a subscriber's queue holds arrives as
+    one posts.bulk event and cuts no stream off
+  - closing the streams leaves no subscriptions behind
+and reports traced Python memory (tracemalloc) and RSS growth per open
+stream, plus how long each write took until its event had reached the last
+subscriber. Also
+checks that RedisBroker relays events between two workers, against a local
+fake of Redis. Exits non-zero if a check fails or a stream costs more than
+--max-kib-per-stream.
+Usage: python -m scripts.check_event_stream [--subscribers 1000] [--max-kib-per-stream 64]
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='check-events-'), 'check.db')}"
+os.environ.setdefault("SECRET_KEY", "check-events-secret")
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import argparse
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+import httpx
+
+from app.main import app
+from app import database
+from app.auth import create_access_token, get_password_hash
+from app.database import SessionLocal, create_schema, engine
+from app.events import RedisBroker, moderation_events
+from app.models import Post, PostStatus, User, UserRole
+
+ADMIN_EMAIL = "events-admin@example.com"
+AUTHOR_EMAIL = "events-author@example.com"
+# More than EVENTS_SUBSCRIBER_QUEUE, as one bulk call may touch up to BULK_MODERATION_LIMIT
+BULK_POSTS = 150
+
+def check(condition: bool, message: str):
+    if not condition:
+        sys.exit(f"FAILED: {message}")
+
+def rss_bytes() -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+class Stream:
+    """One GET of the event stream driven straight through the ASGI app, as a server would"""
+
+    def __init__(self, token: str):
+        self.token = token
+        self.status = None
+        self.received = b""
+        self.seen: dict[str, float] = {}
+        self.opened = asyncio.Event()
+        self.disconnect = asyncio.Event()
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        path = "/api/admin/posts/events"
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"check"), (b"authorization", f"Bearer {self.token}".encode())],
+            "client": ("127.0.0.1", 0), "server": ("check", 80),
+        }
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await self.disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                self.status = message["status"]
+            elif message["type"] == "http.response.body":
+                self.received += message.get("body", b"")
+                for line in message.get("body", b"").split(b"\n"):
+                    if line.startswith(b"event: "):
+                        self.seen.setdefault(line[7:].decode(), time.perf_counter())
+                self.opened.set()
+
+        await app(scope, receive, send)
+
+async def wait_for_event(streams: list[Stream], event_type: str, started: float, timeout: float = 30) -> float:
+    """Seconds from `started` (just before the write) until every stream had seen event_type"""
+    while not all(event_type in stream.seen for stream in streams):
+        check(time.perf_counter() - started < timeout, f"{event_type} did not reach every stream")
+        await asyncio.sleep(0.005)
+    return max(stream.seen[event_type] for stream in streams) - started
+
+class FakeRedis:
+    """Just enough of redis.asyncio.Redis for RedisBroker: publish() and pubsub() on one channel"""
+
+    def __init__(self):
+        self.listeners: list[asyncio.Queue] = []
+
+    async def publish(self, channel: str, data: str):
+        for queue in self.listeners:
+            queue.put_nowait({"type": "message", "channel": channel, "data": data.encode()})
+        return len(self.listeners)
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+class FakePubSub:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, channel: str):
+        self.redis.listeners.append(self.queue)
+
+    async def listen(self):
+        while True:
+            yield await self.queue.get()
+
+    async def aclose(self):
+        self.redis.listeners.remove(self.queue)
+
+async def check_relay() -> dict:
+    """Two workers' brokers over one fake Redis: a subscriber on one sees events published on the other"""
+    redis = FakeRedis()
+    workers = [RedisBroker(client=redis, queue_size=10) for _ in range(2)]
+    subscription = workers[1].subscribe()
+    while not redis.listeners:
+        await asyncio.sleep(0)
+    await workers[0].publish({"type": "post.approved", "post": {"id": 1, "status": "approved"}})
+    frame = await asyncio.wait_for(subscription.queue.get(), 5)
+    check(frame.startswith("event: post.approved\ndata: "), f"relayed frame {frame!r}")
+    for worker in workers:
+        await worker.close()
+    return {"relayed": True, "publish_failures": workers[0].publish_failures}
+
+async def main(subscribers: int, max_kib: float) -> dict:
+    admin_token = create_access_token({"sub": ADMIN_EMAIL})
+    author_token = create_access_token({"sub": AUTHOR_EMAIL})
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+        # Warm up: imports, the principal cache and one stream opened and closed
+        warm = Stream(admin_token)
+        warm.start()
+        await asyncio.wait_for(warm.opened.wait(), 10)
+        check(warm.status == 200, f"stream answered {warm.status}")
+        warm.disconnect.set()
+        await warm.task
+        check(moderation_events.subscribers == 0, "closed warm-up stream still subscribed")
+
+        gc.collect()
+        tracemalloc.start()
+        traced_before, rss_before = tracemalloc.get_traced_memory()[0], rss_bytes()
+        streams = [Stream(admin_token) for _ in range(subscribers)]
+        opening = time.perf_counter()
+        for stream in streams:
+            stream.start()
+        await asyncio.wait_for(asyncio.gather(*(stream.opened.wait() for stream in streams)), 120)
+        open_seconds = time.perf_counter() - opening
+        gc.collect()
+        traced_after, rss_after = tracemalloc.get_traced_memory()[0], rss_bytes()
+        tracemalloc.stop()
+
+        check(all(stream.status == 200 for stream in streams), "a stream was refused")
+        check(moderation_events.subscribers == subscribers, f"{moderation_events.subscribers} subscribed")
+        in_use = database.async_engine.sync_engine.pool.checkedout()
+        check(in_use == 0, f"{in_use} pooled connections held by open streams")
+
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/posts/", json={"title": "Streamed", "content": "Hello"},
+            headers={"Authorization": f"Bearer {author_token}"},
+        )
+        check(response.status_code == 201, response.text)
+        created_seconds = await wait_for_event(streams, "post.created", started)
+        post_id = response.json()["id"]
+        started = time.perf_counter()
+        response = await client.put(
+            f"/api/admin/posts/{post_id}/approve", headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        check(response.status_code == 200, response.text)
+        approved_seconds = await wait_for_event(streams, "post.approved", started)
+        sample = streams[0].received.decode()
+        check(f'"id": {post_id}' in sample, f"event payload {sample!r}")
+
+        pending = [post["id"] for post in (await client.get(
+            "/api/admin/posts/pending", headers={"Authorization": f"Bearer {admin_token}"}
+        )).json()]
+        check(len(pending) == BULK_POSTS, f"{len(pending)} pending posts")
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/admin/posts/bulk/approve", json={"ids": pending}, headers={"Authorization": f"Bearer {admin_token}"}
+        )
+        check(response.status_code == 200 and response.json()["changed"] == BULK_POSTS, response.text)
+        bulk_seconds = await wait_for_event(streams, "posts.bulk", started)
+        check(moderation_events.cut_off == 0, f"bulk approve cut off {moderation_events.cut_off} streams")
+        check(moderation_events.subscribers == subscribers, f"{moderation_events.subscribers} subscribed after bulk")
+        bulk_frame = streams[-1].received.decode().rsplit("event: posts.bulk\ndata: ", 1)[1].split("\n", 1)[0]
+        check(sorted(json.loads(bulk_frame)["ids"]) == sorted(pending), f"bulk payload {bulk_frame[:200]!r}")
+
+        for stream in streams:
+            stream.disconnect.set()
+        await asyncio.wait_for(asyncio.gather(*(stream.task for stream in streams)), 60)
+        check(moderation_events.subscribers == 0, f"{moderation_events.subscribers} subscriptions left behind")
+
+    per_stream_kib = (traced_after - traced_before) / subscribers / 1024
+    report = {
+        "subscribers": subscribers,
+        "open_seconds": round(open_seconds, 2),
+        "traced_kib_per_stream": round(per_stream_kib, 1),
+        "rss_kib_per_stream": round((rss_after - rss_before) / subscribers / 1024, 1),
+        "fan_out_ms": {
+            "post.created": round(created_seconds * 1000, 1),
+            "post.approved": round(approved_seconds * 1000, 1),
+            f"posts.bulk ({BULK_POSTS} posts)": round(bulk_seconds * 1000, 1),
+        },
+        "pooled_connections_in_use": in_use,
+        "broker": moderation_events.metrics(),
+        "redis_relay": await check_relay(),
+        "max_kib_per_stream": max_kib,
+    }
+    check(per_stream_kib <= max_kib, f"{per_stream_kib:.1f} KiB per stream, over {max_kib}")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--max-kib-per-stream", type=float, default=64)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    db = SessionLocal()
+    author = User(email=AUTHOR_EMAIL, hashed_password=get_password_hash("x"), full_name="Author", role=UserRole.ALUMNI)
+    db.add_all([
+        User(email=ADMIN_EMAIL, hashed_password=get_password_hash("x"), full_name="Admin", role=UserRole.ADMIN),
+        author,
+    ])
+    db.add_all([
+        Post(author=author, title=f"Bulk {number}", content="Waiting", status=PostStatus.PENDING)
+        for number in range(BULK_POSTS)
+    ])
+    db.commit()
+    db.close()
+
+    report = asyncio.run(main(args.subscribers, args.max_kib_per_stream))
+    print(json.dumps(report, indent=2))
+    print("Event stream ok")
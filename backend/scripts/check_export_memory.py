@@ -0,0 +1,130 @@
+"""
+Check that the streaming exports use flat memory regardless of table size.
+Seeds a scratch SQLite database, streams the subscriber and user exports
+through the ASGI app (discarding each chunk as a client would after writing
+it out) and compares the tracemalloc peak for a small and a large table.
+Exits non-zero if the peak grows with the row count.
+Usage: python -m scripts.check_export_memory [--small 5000] [--large 50000]
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='check-export-'), 'check.db')}"
+os.environ.setdefault("SECRET_KEY", "check-export-secret")
+
+import argparse
+import asyncio
+import json
+import tracemalloc
+from sqlalchemy import delete, insert
+
+from app.main import app
+from app.auth import create_access_token
+from app.database import engine, Base
+from app.models import NewsletterSubscriber, User, UserRole
+
+ADMIN_EMAIL = "export-admin@example.com"
+EXPORTS = {
+    "subscribers": "/api/newsletter/subscribers/export",
+    "users": "/api/admin/users/export",
+}
+
+def seed(rows: int):
+    """Replace subscribers and users with `rows` of each (plus the admin)"""
+    with engine.begin() as connection:
+        connection.execute(delete(NewsletterSubscriber))
+        connection.execute(delete(User))
+        connection.execute(insert(User), [{
+            "email": ADMIN_EMAIL, "hashed_password": "x", "full_name": "Export Admin",
+            "role": UserRole.ADMIN, "is_active": True,
+        }])
+        for start in range(0, rows, 10000):
+            batch = range(start, min(start + 10000, rows))
+            connection.execute(insert(NewsletterSubscriber), [
+                {"email": f"subscriber{i}@example.com", "is_active": True} for i in batch
+            ])
+            connection.execute(insert(User), [{
+                "email": f"user{i}@example.com", "hashed_password": "x",
+                "full_name": f"User {i}", "role": UserRole.ALUMNI, "is_active": True,
+            } for i in batch])
+
+async def drain(path: str, token: str) -> dict:
+    """Run one GET through the ASGI app, counting body bytes without keeping them"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": query.encode(), "root_path": "",
+        "headers": [(b"host", b"check"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 0), "server": ("check", 80),
+    }
+    stats = {"status": None, "bytes": 0, "lines": 0}
+    finished = asyncio.Event()
+    requested = False
+
+    async def receive():
+        # One empty request body, then block until the response is done (as a server would)
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            stats["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            stats["bytes"] += len(body)
+            stats["lines"] += body.count(b"\n")
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    return stats
+
+async def measure(path: str, token: str) -> dict:
+    await drain(path, token)  # warm up imports, pools and caches outside the measurement
+    tracemalloc.start()
+    try:
+        stats = await drain(path, token)
+        stats["peak_kib"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+    return stats
+
+async def run(sizes: list[int]) -> dict:
+    token = create_access_token({"sub": ADMIN_EMAIL})
+    report = {}
+    for rows in sizes:
+        seed(rows)
+        for name, base in EXPORTS.items():
+            for export_format in ("ndjson", "csv"):
+                stats = await measure(f"{base}?format={export_format}", token)
+                assert stats["status"] == 200, stats
+                report.setdefault(f"{name}.{export_format}", {})[rows] = stats
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--small", type=int, default=5000)
+    parser.add_argument("--large", type=int, default=50000)
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="Allowed ratio of large-table peak to small-table peak")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    report = asyncio.run(run([args.small, args.large]))
+    print(json.dumps(report, indent=2))
+
+    failures = [
+        name for name, runs in report.items()
+        if runs[args.large]["peak_kib"] > runs[args.small]["peak_kib"] * args.tolerance
+    ]
+    if failures:
+        print(f"Memory grows with table size: {', '.join(failures)}")
+        sys.exit(1)
+    print("Export memory is flat")
@@ -0,0 +1,249 @@
+"""
+End-to-end check of profile picture uploads and thumbnails, against a scratch
+SQLite database and media directory, driving the ASGI app in-process:
+  - a large JPEG streamed in 64 KiB chunks is stored without being buffered
+    (traced Python memory stays far below its size), answered 202 before any
+    resizing, and shown on the profile once its thumbnails exist
+  - thumbnails are square WebP of each THUMBNAIL_SIZES edge, served with
+    immutable cache headers, and as an ASGI pathsend (sendfile) message when
+    the server offers that extension
+  - the same image uploaded by another user is stored once and ready at once
+  - wrong types, oversized bodies (declared or streamed), non-images, images
+    of another format than their Content-Type and bad names are refused,
+    leaving no files behind; removing a picture works
+Then uploads --uploads distinct pictures at once and reports request latency
+against thumbnail time. Exits non-zero if a check fails.
+Usage: python -m scripts.check_profile_pictures [--uploads 24]
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+scratch = tempfile.mkdtemp(prefix="check-pictures-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(scratch, 'check.db')}"
+os.environ["MEDIA_ROOT"] = os.path.join(scratch, "media")
+os.environ.setdefault("SECRET_KEY", "check-pictures-secret")
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+import argparse
+import asyncio
+import io
+import json
+import statistics
+import time
+import tracemalloc
+import httpx
+from PIL import Image
+
+from app.main import app
+from app.auth import create_access_token, get_password_hash
+from app.config import settings
+from app.database import SessionLocal, create_schema, engine
+from app.media import IMMUTABLE, thumbnail_pool, thumbnail_sizes
+from app.models import AlumniProfile, User, UserRole
+
+CHUNK = 64 * 1024
+
+def check(condition: bool, message: str):
+    if not condition:
+        sys.exit(f"FAILED: {message}")
+
+def files_under(kind: str) -> list[str]:
+    directory = os.path.join(settings.MEDIA_ROOT, kind)
+    return [name for _, _, names in os.walk(directory) for name in names]
+
+def photo(width: int, height: int, seed: int, format: str = "JPEG") -> bytes:
+    """Noisy enough that JPEG can't shrink it to nothing, like a real photo"""
+    bands = [Image.effect_noise((width, height), 40 + seed % 50 + band * 7) for band in range(3)]
+    image = Image.merge("RGB", bands)
+    if format == "PNG":
+        image.putalpha(Image.linear_gradient("L").resize((width, height)))
+    output = io.BytesIO()
+    image.save(output, format, quality=92)
+    return output.getvalue()
+
+async def raw_upload(body: bytes, token: str, content_type: str = "image/jpeg",
+                     declare_length: bool = True) -> tuple[int, dict]:
+    """PUT the picture through the ASGI app in CHUNK-sized messages, as a server would pass it on"""
+    path = "/api/alumni/profile/picture"
+    headers = [(b"host", b"check"), (b"authorization", f"Bearer {token}".encode()),
+               (b"content-type", content_type.encode())]
+    if declare_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "PUT", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "headers": headers,
+        "client": ("127.0.0.1", 0), "server": ("check", 80),
+    }
+    view = memoryview(body)
+    offsets = iter(range(0, max(len(body), 1), CHUNK))
+    reply = {"status": None, "body": b""}
+
+    async def receive():
+        offset = next(offsets, None)
+        if offset is None:
+            return {"type": "http.disconnect"}
+        return {"type": "http.request", "body": bytes(view[offset:offset + CHUNK]),
+                "more_body": offset + CHUNK < len(body)}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            reply["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            reply["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return reply["status"], json.loads(reply["body"] or b"null")
+
+async def sent_as_pathsend(url: str) -> dict:
+    """GET through the whole middleware stack from a server offering the pathsend extension"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": url, "raw_path": url.encode(),
+        "query_string": b"", "root_path": "", "headers": [(b"host", b"check"), (b"accept-encoding", b"gzip")],
+        "client": ("127.0.0.1", 0), "server": ("check", 80),
+        "extensions": {"http.response.pathsend": {}},
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return {message["type"]: message for message in messages}
+
+async def wait_for_picture(client: httpx.AsyncClient, headers: dict, timeout: float = 60) -> dict:
+    started = time.perf_counter()
+    while True:
+        profile = (await client.get("/api/alumni/profile", headers=headers)).json()
+        if profile["profile_picture_thumbnails"]:
+            return profile
+        check(time.perf_counter() - started < timeout, "thumbnails never attached to the profile")
+        await asyncio.sleep(0.02)
+
+async def main(tokens: list[str], uploads: int) -> dict:
+    report = {}
+    auth = [{"Authorization": f"Bearer {token}"} for token in tokens]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+        # Streamed upload: stored without buffering, answered before any resizing
+        big = photo(2400, 1800, seed=1)
+        tracemalloc.start()
+        started = time.perf_counter()
+        status, body = await raw_upload(big, tokens[0])
+        request_seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        check(status == 202 and body["status"] == "processing", f"upload answered {status} {body}")
+        check(peak < len(big) / 4, f"upload traced {peak} bytes for a {len(big)}-byte body")
+        profile = await wait_for_picture(client, auth[0])
+        report["streamed_upload"] = {
+            "bytes": len(big), "traced_peak_bytes": peak,
+            "request_ms": round(request_seconds * 1000, 1),
+            "thumbnails_ms": thumbnail_pool.metrics()["latency"]["max_ms"],
+        }
+
+        # Thumbnails: square WebP per size, immutable, sent with pathsend when offered
+        urls = profile["profile_picture_thumbnails"]
+        check(sorted(int(size) for size in urls) == list(thumbnail_sizes()), f"thumbnail sizes {list(urls)}")
+        for size, url in urls.items():
+            response = await client.get(url)
+            check(response.status_code == 200, f"{url} answered {response.status_code}")
+            check(response.headers["content-type"] == "image/webp", response.headers["content-type"])
+            check(response.headers["cache-control"] == IMMUTABLE, response.headers["cache-control"])
+            image = Image.open(io.BytesIO(response.content))
+            check(image.format == "WEBP" and image.size == (int(size), int(size)), f"{url} is {image.format} {image.size}")
+        messages = await sent_as_pathsend(urls[str(thumbnail_sizes()[0])])
+        check("http.response.pathsend" in messages and "http.response.body" not in messages,
+              f"thumbnail sent as {list(messages)}")
+        check("content-encoding" not in dict(messages["http.response.start"]["headers"]), "thumbnail was recompressed")
+        report["thumbnail_bytes"] = {size: len((await client.get(url)).content) for size, url in urls.items()}
+        listed = (await client.get("/api/alumni/profiles")).json()
+        check(any(entry["profile_picture_thumbnails"] == urls for entry in listed), "directory lacks the thumbnails")
+
+        # The same bytes from another user: one stored copy, ready without new work
+        status, body = await raw_upload(big, tokens[1])
+        check(status == 200 and body["status"] == "ready", f"duplicate upload answered {status} {body}")
+        check(body["thumbnails"] == urls, "duplicate upload got other thumbnails")
+        check(len(files_under("originals")) == 1, f"{len(files_under('originals'))} originals stored")
+
+        # Refusals, none leaving files behind
+        limit = settings.MEDIA_MAX_UPLOAD_BYTES
+        refusals = {
+            "text/plain": (await raw_upload(b"hello", tokens[2], "text/plain"))[0],
+            "declared too large": (await raw_upload(b"x" * (limit + 1), tokens[2]))[0],
+            "streamed too large": (await raw_upload(b"x" * (limit + 1), tokens[2], declare_length=False))[0],
+            "not an image": (await raw_upload(b"\x89PNG but not really" * 100, tokens[2], "image/png"))[0],
+            "JPEG sent as PNG": (await raw_upload(photo(64, 48, seed=3), tokens[2], "image/png"))[0],
+            "empty": (await raw_upload(b"", tokens[2]))[0],
+        }
+        check(refusals == {"text/plain": 415, "declared too large": 413, "streamed too large": 413,
+                           "not an image": 400, "JPEG sent as PNG": 400, "empty": 400}, f"refusals answered {refusals}")
+        check(files_under("incoming") == [], f"refused uploads left {files_under('incoming')}")
+        for name in ("nothing.webp", "..%2Foriginals", "0" * 64 + "-96.webp"):
+            check((await client.get(f"/api/media/{name}")).status_code == 404, f"/api/media/{name} served")
+        check((await client.delete("/api/alumni/profile/picture", headers=auth[1])).status_code == 204, "remove")
+        check((await client.get("/api/alumni/profile", headers=auth[1])).json()["profile_picture_thumbnails"] == {},
+              "removed picture still shown")
+
+        # A PNG with transparency keeps it
+        status, _ = await raw_upload(photo(800, 600, seed=2, format="PNG"), tokens[2], "image/png")
+        check(status == 202, f"PNG upload answered {status}")
+        png = await wait_for_picture(client, auth[2])
+        thumbnail = Image.open(io.BytesIO((await client.get(png["profile_picture_thumbnails"][str(thumbnail_sizes()[0])])).content))
+        check(thumbnail.mode == "RGBA", f"PNG thumbnail mode {thumbnail.mode}")
+
+        # Many distinct pictures at once: requests stay short while the pool works through them
+        pictures = [photo(1600, 1200, seed=10 + number) for number in range(uploads)]
+        latencies = []
+
+        async def upload(number: int):
+            started = time.perf_counter()
+            status, _ = await raw_upload(pictures[number], tokens[3 + number])
+            latencies.append(time.perf_counter() - started)
+            check(status in (202, 503), f"concurrent upload answered {status}")
+            return status
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(upload(number) for number in range(uploads)))
+        while thumbnail_pool.in_flight:
+            await asyncio.sleep(0.02)
+        all_done = time.perf_counter() - started
+        pool = thumbnail_pool.metrics()
+        check(pool["failed"] == 0, f"{pool['failed']} thumbnail jobs failed")
+        latencies.sort()
+        report["concurrent_uploads"] = {
+            "uploads": uploads,
+            "accepted": statuses.count(202),
+            "refused_busy": statuses.count(503),
+            "request_p50_ms": round(statistics.median(latencies) * 1000, 1),
+            "request_max_ms": round(latencies[-1] * 1000, 1),
+            "all_thumbnails_ms": round(all_done * 1000, 1),
+            "pool": pool,
+        }
+    thumbnail_pool.shutdown()
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=24)
+    args = parser.parse_args()
+
+    create_schema(engine)
+    db = SessionLocal()
+    emails = [f"picture{number}@example.com" for number in range(3 + args.uploads)]
+    for email in emails:
+        user = User(email=email, hashed_password=get_password_hash("x"), full_name=email, role=UserRole.ALUMNI)
+        user.alumni_profile = AlumniProfile(major="Physics")
+        db.add(user)
+    db.commit()
+    db.close()
+
+    report = asyncio.run(main([create_access_token({"sub": email}) for email in emails], args.uploads))
+    print(json.dumps(report, indent=2))
+    print("Profile pictures ok")
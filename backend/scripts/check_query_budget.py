@@ -0,0 +1,140 @@
+"""
+Count the SQL statements each read endpoint issues and fail when one goes
+over its budget. Seeds a throwaway SQLite database, so list endpoints are
+exercised with many rows and N+1 lazy loads show up as budget overruns.
+Usage: python -m scripts.check_query_budget [--rows 100]
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Always run against a scratch database, never the one configured in .env
+_db_dir = tempfile.mkdtemp(prefix="query-budget-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'budget.db')}"
+os.environ.setdefault("SECRET_KEY", "query-budget-secret")
+
+import argparse
+from contextlib import contextmanager
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.database import SessionLocal, async_engine, create_schema, engine
+from app.models import User, UserRole, AlumniProfile, Post, PostStatus, NewsletterSubscriber
+from app.auth import get_password_hash, create_access_token
+
+# Maximum statements per request. Authenticated routes spend one on the user lookup.
+BUDGETS = {
+    "GET /api/posts/": 1,
+    "GET /api/posts/{id}": 1,
+    "GET /api/posts/my-posts": 2,
+    "GET /api/alumni/profiles": 1,
+    "GET /api/alumni/profiles/{id}": 1,
+    "GET /api/alumni/profile": 2,
+    "GET /api/auth/me": 1,
+    "GET /api/admin/posts/pending": 2,
+    "GET /api/admin/users": 2,
+    # Totals, then the rollup days; plus the principal lookup
+    "GET /api/admin/stats": 3,
+    "GET /api/newsletter/subscribers": 2,
+}
+
+class StatementCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+@contextmanager
+def count_statements(engine):
+    counter = StatementCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+
+def seed(rows: int) -> tuple[str, int, int]:
+    db = SessionLocal()
+    try:
+        password = get_password_hash("budget-password")
+        admin = User(email="admin@example.com", hashed_password=password,
+                     full_name="Budget Admin", role=UserRole.ADMIN, is_active=True)
+        db.add(admin)
+        users = [
+            User(email=f"user{i}@example.com", hashed_password=password,
+                 full_name=f"User {i}", role=UserRole.ALUMNI, is_active=True)
+            for i in range(rows)
+        ]
+        db.add_all(users)
+        db.flush()
+        db.add_all([
+            AlumniProfile(user_id=user.id, graduation_year=2000 + i % 25, major="CS", company="Acme")
+            for i, user in enumerate(users)
+        ])
+        db.add_all([
+            Post(author_id=users[i % len(users)].id, title=f"Post {i}", content="Body",
+                 status=PostStatus.APPROVED if i % 2 else PostStatus.PENDING)
+            for i in range(rows * 2)
+        ])
+        db.add_all([NewsletterSubscriber(email=f"sub{i}@example.com") for i in range(rows)])
+        db.add_all([
+            Post(author_id=admin.id, title=f"Admin post {i}", content="Body", status=PostStatus.APPROVED)
+            for i in range(rows)
+        ])
+        db.commit()
+        post_id = db.query(Post.id).filter(Post.status == PostStatus.APPROVED).first()[0]
+        profile_id = db.query(AlumniProfile.id).first()[0]
+        return admin.email, post_id, profile_id
+    finally:
+        db.close()
+
+def main(rows: int) -> int:
+    with TestClient(app) as client:
+        admin_email, post_id, profile_id = seed(rows)
+        # The admin gets a profile too so /api/alumni/profile has something to return
+        db = SessionLocal()
+        admin = db.query(User).filter(User.email == admin_email).first()
+        db.add(AlumniProfile(user_id=admin.id, major="Admin"))
+        db.commit()
+        db.close()
+
+        token = create_access_token({"sub": admin_email})
+        headers = {"Authorization": f"Bearer {token}"}
+        paths = {
+            "GET /api/posts/": "/api/posts/",
+            "GET /api/posts/{id}": f"/api/posts/{post_id}",
+            "GET /api/posts/my-posts": "/api/posts/my-posts",
+            "GET /api/alumni/profiles": "/api/alumni/profiles",
+            "GET /api/alumni/profiles/{id}": f"/api/alumni/profiles/{profile_id}",
+            "GET /api/alumni/profile": "/api/alumni/profile",
+            "GET /api/auth/me": "/api/auth/me",
+            "GET /api/admin/posts/pending": "/api/admin/posts/pending",
+            "GET /api/admin/users": "/api/admin/users",
+            "GET /api/admin/stats": "/api/admin/stats",
+            "GET /api/newsletter/subscribers": "/api/newsletter/subscribers",
+        }
+
+        failures = 0
+        for name, path in paths.items():
+            with count_statements(async_engine.sync_engine) as counter:
+                response = client.get(path, headers=headers)
+            used = len(counter.statements)
+            budget = BUDGETS[name]
+            ok = response.status_code == 200 and used <= budget
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name:<32} {used:>4} / {budget} statements"
+                  f" (HTTP {response.status_code})")
+            if not ok:
+                for statement in counter.statements[:5]:
+                    print(f"       {' '.join(statement.split())[:120]}")
+        return 1 if failures else 0
+
+if __name__ == "__main__":
+    create_schema(engine)
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100, help="rows to seed per table")
+    args = parser.parse_args()
+    sys.exit(main(args.rows))
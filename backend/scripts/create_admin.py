@@ -4,12 +4,14 @@ Usage: python -m scripts.create_admin
 """
 import sys
 import os
+import asyncio
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.models import User, UserRole
-from app.auth import get_password_hash
+from app.auth import get_password_hash, invalidate_principal
+from app.counters import ACTIVE_USERS, USERS, apply_stat_changes_sync
 
 def create_admin(email: str, password: str, full_name: str):
     db: Session = SessionLocal()
@@ -25,6 +27,9 @@ def create_admin(email: str, password: str, full_name: str):
                 existing_user.role = UserRole.ADMIN
                 existing_user.hashed_password = get_password_hash(password)
                 db.commit()
+                # Only reaches other workers when CACHE_URL points at a shared cache;
+                # per-process caches pick up the new role once AUTH_CACHE_TTL_SECONDS passes
+                asyncio.run(invalidate_principal(email))
                 print(f"User {email} upgraded to admin.")
                 return
         
@@ -38,6 +43,7 @@ def create_admin(email: str, password: str, full_name: str):
             is_active=True
         )
         db.add(admin_user)
+        apply_stat_changes_sync(db, {USERS: 1, ACTIVE_USERS: 1}, {"signups": 1})
         db.commit()
         print(f"Admin user {email} created successfully!")
     except Exception as e:
@@ -0,0 +1,68 @@
+"""
+Print the database's query plan for every query shape the routers issue.
+Runs EXPLAIN QUERY PLAN on SQLite and EXPLAIN on Postgres against the
+configured DATABASE_URL; nothing is written. Diff the output between
+commits to spot plan regressions (e.g. a lost index scan).
+Usage: python -m scripts.explain_queries [--analyze]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+from datetime import datetime, timezone
+from sqlalchemy import select, text
+from app.database import engine
+from app.models import User, AlumniProfile, Post, PostStatus, NewsletterSubscriber
+from app.pagination import encode_cursor, paginate_by_created, paginate_by_id
+from app.queries import (
+    select_post_feed,
+    select_author_posts,
+    select_pending_posts,
+    select_posts_with_author,
+    select_profiles_with_user,
+)
+
+def router_queries() -> dict:
+    """The statements behind each endpoint, built with the same helpers the routers use"""
+    feed_cursor = encode_cursor(datetime.now(timezone.utc), 1_000_000)
+    return {
+        "posts.get_posts (page 1)": paginate_by_created(
+            select_post_feed(PostStatus.APPROVED), Post.created_at, Post.id, None, 0, 100),
+        "posts.get_posts (cursor)": paginate_by_created(
+            select_post_feed(PostStatus.APPROVED), Post.created_at, Post.id, feed_cursor, 0, 100),
+        "posts.get_my_posts": select_author_posts(1),
+        "posts.get_post": select_posts_with_author().where(Post.id == 1),
+        "admin.get_pending_posts": select_pending_posts(),
+        "admin.get_all_users (cursor)": paginate_by_id(select(User), User.id, encode_cursor(1), 0, 100),
+        "alumni.get_all_profiles (cursor)": paginate_by_id(
+            select_profiles_with_user(), AlumniProfile.id, encode_cursor(1), 0, 100),
+        "alumni.get_profile_by_id": select_profiles_with_user().where(AlumniProfile.id == 1),
+        "alumni.get_my_profile": select_profiles_with_user().where(AlumniProfile.user_id == 1),
+        "auth.get_current_user": select(User).where(User.email == "someone@example.com"),
+        "newsletter.get_subscribers": select(NewsletterSubscriber).where(NewsletterSubscriber.is_active == True),
+    }
+
+def explain_prefix(analyze: bool) -> str:
+    if engine.dialect.name == "sqlite":
+        return "EXPLAIN QUERY PLAN "
+    return "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+
+def main(analyze: bool):
+    prefix = explain_prefix(analyze)
+    with engine.connect() as conn:
+        for name, statement in router_queries().items():
+            sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            rows = conn.execute(text(prefix + sql)).all()
+            print(f"== {name}")
+            for row in rows:
+                # SQLite returns (id, parent, notused, detail); Postgres returns one text column
+                print(f"   {row[-1]}")
+            print()
+        conn.rollback()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--analyze", action="store_true", help="Postgres only: run EXPLAIN ANALYZE")
+    args = parser.parse_args()
+    main(args.analyze)
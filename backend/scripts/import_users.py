@@ -0,0 +1,33 @@
+"""
+Create alumni accounts and profiles from a CSV file, e.g. a graduating class.
+Columns: email, full_name, password and any profile field (graduation_year,
+major, current_position, company, bio, linkedin_url, profile_picture_url).
+Rows that fail are listed with their line number; the rest are imported.
+Usage: python -m scripts.import_users students.csv [--batch-size 1000]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+from app.config import settings
+from app.user_import import import_users
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    with open(args.path, encoding="utf-8-sig", newline="") as csv_file:
+        report = asyncio.run(import_users(csv_file, args.batch_size))
+
+    for error in report["errors"]:
+        print(f"Line {error['row']} ({error['email'] or 'no email'}): {error['error']}")
+    if report["failed"] > len(report["errors"]):
+        print(f"... and {report['failed'] - len(report['errors'])} more errors")
+    print(
+        f"Imported {report['created']} users and {report['profiles']} profiles from "
+        f"{report['rows']} rows in {report['elapsed_seconds']}s ({report['failed']} failed)"
+    )
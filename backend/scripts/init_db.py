@@ -6,17 +6,13 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import engine, Base
-from app.models import User, AlumniProfile, Post
+from app.database import create_schema, engine
 
 def init_db():
     """Create all tables"""
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    create_schema(engine)
     print("Database tables created successfully!")
 
 if __name__ == "__main__":
     init_db()
-
-
-
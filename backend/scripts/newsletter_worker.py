@@ -0,0 +1,47 @@
+"""
+Newsletter dispatch worker. Run it as its own process next to the API;
+it sends queued issues (POST /api/newsletter/issues) and polls for new ones.
+SIGTERM/SIGINT finish the batch in flight before exiting, and a restarted
+worker carries on from the recorded per-recipient state. With --once it
+exits as soon as nothing is left for it to send now; retries that aren't
+due yet and recipients claimed by another worker are left to a later run.
+Usage: python -m scripts.newsletter_worker [--once]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import signal
+from app.config import settings
+from app.database import SessionLocal
+from app.newsletter_dispatch import NewsletterDispatcher, SMTPPool, SendRateLimiter
+
+def main(once: bool):
+    dispatcher = NewsletterDispatcher(
+        SessionLocal,
+        SMTPPool.from_settings(),
+        SendRateLimiter(settings.NEWSLETTER_SEND_RATE),
+    )
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: dispatcher.stop())
+
+    print(f"Newsletter worker sending via {settings.SMTP_HOST}:{settings.SMTP_PORT}")
+    while not dispatcher.stopping.is_set():
+        stats = dispatcher.run_once()
+        if stats is not None:
+            print(json.dumps(stats))
+            if stats["batches"] or stats["status"] == "sent":
+                # A newer issue may have recipients due while this one waits on retries
+                continue
+        # Nothing due now: only retries that aren't due yet or another worker's claims are outstanding
+        if once:
+            break
+        dispatcher.stopping.wait(settings.NEWSLETTER_POLL_SECONDS)
+    print("Newsletter worker stopped")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--once", action="store_true", help="Exit when nothing is left to send now")
+    main(parser.parse_args().once)
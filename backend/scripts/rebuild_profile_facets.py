@@ -0,0 +1,17 @@
+"""
+Recount the alumni directory facets from alumni_profiles.
+Needed after bulk loads that bypass the API, or if the counters drift.
+Usage: python -m scripts.rebuild_profile_facets
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from app.facets import rebuild_profile_facets
+
+if __name__ == "__main__":
+    print("Rebuilding profile facet counts...")
+    with engine.begin() as connection:
+        rebuild_profile_facets(connection)
+    print("Profile facet counts rebuilt successfully!")
@@ -0,0 +1,18 @@
+"""
+Rebuild the full-text search index from posts and alumni profiles.
+Needed after bulk loads that bypass the API, or for a database whose
+tables were created before search existed.
+Usage: python -m scripts.rebuild_search_index
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from app.search import rebuild_search_index
+
+if __name__ == "__main__":
+    print("Rebuilding search index...")
+    with engine.begin() as connection:
+        rebuild_search_index(connection)
+    print("Search index rebuilt successfully!")
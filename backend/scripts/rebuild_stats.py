@@ -0,0 +1,17 @@
+"""
+Recount the admin dashboard totals and daily rollups from the source tables.
+Needed after bulk loads that bypass the API, or if the counters drift.
+Usage: python -m scripts.rebuild_stats
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import engine
+from app.counters import rebuild_stats
+
+if __name__ == "__main__":
+    print("Rebuilding dashboard stats...")
+    with engine.begin() as connection:
+        rebuild_stats(connection)
+    print("Dashboard stats rebuilt successfully!")
@@ -0,0 +1,74 @@
+"""
+Make any missing profile picture thumbnails, e.g. after THUMBNAIL_SIZES
+changes, from the stored originals. With --prune, also delete originals and
+thumbnails that no profile uses any more (replaced or removed pictures,
+sizes no longer configured, abandoned uploads), once they are older than
+--min-age-hours so uploads still being processed are left alone.
+Usage: python -m scripts.rebuild_thumbnails [--prune] [--min-age-hours 24]
+"""
+import sys
+import os
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select
+from app.config import settings
+from app.database import engine
+from app.media import THUMBNAIL_NAME, make_thumbnails, original_path, thumbnail_sizes, thumbnail_targets
+from app.models import AlumniProfile
+
+def used_digests() -> set[str]:
+    with engine.connect() as connection:
+        result = connection.execute(
+            select(AlumniProfile.profile_picture_hash).where(AlumniProfile.profile_picture_hash.is_not(None)).distinct()
+        )
+        return set(result.scalars())
+
+def rebuild(digests: set[str]) -> int:
+    jobs = []
+    with ProcessPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS) as executor:
+        for digest in digests:
+            missing = [(size, path) for size, path in thumbnail_targets(digest) if not os.path.exists(path)]
+            if not missing:
+                continue
+            if not original_path(digest).exists():
+                print(f"  {digest}: original missing, skipped")
+                continue
+            jobs.append(executor.submit(make_thumbnails, str(original_path(digest)), missing, settings.MEDIA_MAX_PIXELS))
+        for job in jobs:
+            job.result()
+    return len(jobs)
+
+def prune(digests: set[str], min_age_seconds: float) -> int:
+    sizes = set(thumbnail_sizes())
+    cutoff = time.time() - min_age_seconds
+    removed = 0
+    for directory, _, names in os.walk(settings.MEDIA_ROOT):
+        kind = os.path.relpath(directory, settings.MEDIA_ROOT).split(os.sep)[0]
+        for name in names:
+            path = os.path.join(directory, name)
+            if kind == "originals":
+                keep = name in digests
+            elif kind == "thumbnails":
+                match = THUMBNAIL_NAME.fullmatch(name)
+                keep = bool(match) and match.group(1) in digests and int(match.group(2)) in sizes
+            else:
+                keep = kind != "incoming"
+            if not keep and os.path.getmtime(path) < cutoff:
+                os.unlink(path)
+                removed += 1
+    return removed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--prune", action="store_true", help="Delete files no profile uses")
+    parser.add_argument("--min-age-hours", type=float, default=24)
+    args = parser.parse_args()
+
+    digests = used_digests()
+    print(f"Rebuilding thumbnails for {len(digests)} pictures...")
+    print(f"Made thumbnails for {rebuild(digests)} pictures")
+    if args.prune:
+        print(f"Pruned {prune(digests, args.min_age_hours * 3600)} unused files")
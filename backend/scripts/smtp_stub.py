@@ -0,0 +1,137 @@
+"""
+Local SMTP sink for trying out and benchmarking the newsletter worker.
+Speaks enough SMTP for smtplib (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP,
+QUIT), accepts every message and counts deliveries per recipient instead
+of sending anything. Recipients listed in `reject` get a 550, and those in
+`defer` a 451 (try again later).
+Usage: python -m scripts.smtp_stub [--port 1025] [--latency-ms 0]
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+class SMTPStub:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 reject: Optional[set[str]] = None, defer: Optional[set[str]] = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.reject = reject or set()
+        self.defer = defer or set()
+        self.received: Counter = Counter()
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def messages(self) -> int:
+        return sum(self.received.values())
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        with self._lock:
+            self.connections += 1
+        recipients: list[str] = []
+
+        async def reply(line: str):
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 smtp-stub ready")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command = line.decode(errors="replace").strip()
+                verb = command[:4].upper()
+                if verb == "EHLO":
+                    await reply("250-smtp-stub")
+                    await reply("250 8BITMIME")
+                elif verb == "HELO":
+                    await reply("250 smtp-stub")
+                elif verb == "MAIL":
+                    recipients = []
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    address = command.partition(":")[2].strip().strip("<>").split(">")[0]
+                    if address in self.reject:
+                        await reply("550 No such user")
+                    elif address in self.defer:
+                        await reply("451 Try again later")
+                    else:
+                        recipients.append(address)
+                        await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    while (await reader.readline()) not in (b".\r\n", b".\n", b""):
+                        pass
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    with self._lock:
+                        self.received.update(recipients)
+                    recipients = []
+                    await reply("250 OK queued")
+                elif verb == "RSET":
+                    recipients = []
+                    await reply("250 OK")
+                elif verb == "NOOP":
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    return
+                else:
+                    await reply("502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def start(self) -> "SMTPStub":
+        """Serve from a background thread; returns once the port is bound"""
+        ready = threading.Event()
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=serve, name="smtp-stub", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = SMTPStub(args.host, args.port, args.latency_ms / 1000).start()
+    print(f"SMTP stub listening on {stub.host}:{stub.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"{stub.messages} messages, {len(stub.received)} recipients, {stub.connections} connections")
+    except KeyboardInterrupt:
+        stub.stop()
@@ -1,11 +1,18 @@
 import { useEffect, useState } from 'react'
 import { adminApi } from '../services/api'
-import { Post, User } from '../types'
-import { Shield, CheckCircle, XCircle, Calendar, User as UserIcon, ToggleLeft, ToggleRight } from 'lucide-react'
+import { AdminStats, ModerationEvent, Post, User } from '../types'
+import { Shield, CheckCircle, XCircle, Calendar, User as UserIcon, ToggleLeft, ToggleRight, Users, FileText, Mail } from 'lucide-react'
+
+const GROWTH_DAYS = 30
+const RECONNECT_DELAY_MS = 3000
+// Events arriving within this window share one stats request
+const STATS_REFRESH_DELAY_MS = 1000
 
 export default function AdminDashboard() {
   const [pendingPosts, setPendingPosts] = useState<Post[]>([])
   const [users, setUsers] = useState<User[]>([])
+  const [usersLoaded, setUsersLoaded] = useState(false)
+  const [stats, setStats] = useState<AdminStats | null>(null)
   const [activeTab, setActiveTab] = useState<'posts' | 'users'>('posts')
   const [loading, setLoading] = useState(true)
 
@@ -13,14 +20,73 @@ export default function AdminDashboard() {
     fetchData()
   }, [])
 
+  useEffect(() => {
+    // Keep the pending queue current from the moderation event stream instead of re-polling it
+    const controller = new AbortController()
+    let statsTimer: ReturnType<typeof setTimeout> | undefined
+    const scheduleStatsRefresh = () => {
+      if (statsTimer !== undefined) return
+      statsTimer = setTimeout(() => {
+        statsTimer = undefined
+        refreshStats()
+      }, STATS_REFRESH_DELAY_MS)
+    }
+    const handleEvent = (event: ModerationEvent) => {
+      if (event.type === 'posts.bulk') {
+        const ids = new Set(event.ids)
+        setPendingPosts(posts => posts.filter(post => !ids.has(post.id)))
+      } else if (event.type === 'post.created' && event.post.status === 'pending') {
+        const post = event.post as Post
+        setPendingPosts(posts => posts.some(existing => existing.id === post.id) ? posts : [post, ...posts])
+      } else if (event.type !== 'post.created') {
+        setPendingPosts(posts => posts.filter(post => post.id !== event.post.id))
+      }
+      scheduleStatsRefresh()
+    }
+    const listen = async () => {
+      let reconnecting = false
+      while (!controller.signal.aborted) {
+        try {
+          if (reconnecting) {
+            // Events sent while disconnected are not replayed
+            await fetchData()
+          }
+          await adminApi.streamModerationEvents(handleEvent, controller.signal)
+        } catch (error) {
+          if (controller.signal.aborted) return
+          console.error('Moderation event stream dropped:', error)
+        }
+        reconnecting = true
+        await new Promise(resolve => setTimeout(resolve, RECONNECT_DELAY_MS))
+      }
+    }
+    listen()
+    return () => {
+      controller.abort()
+      clearTimeout(statsTimer)
+    }
+  }, [])
+
+  useEffect(() => {
+    // The user list is only needed once its tab is opened; the counts come from the stats
+    if (activeTab === 'users' && !usersLoaded) {
+      adminApi.getUsers()
+        .then((usersData) => {
+          setUsers(usersData)
+          setUsersLoaded(true)
+        })
+        .catch((error) => console.error('Failed to fetch users:', error))
+    }
+  }, [activeTab, usersLoaded])
+
   const fetchData = async () => {
     try {
-      const [posts, usersData] = await Promise.all([
+      const [statsData, posts] = await Promise.all([
+        adminApi.getStats(GROWTH_DAYS),
         adminApi.getPendingPosts(),
-        adminApi.getUsers(),
       ])
+      setStats(statsData)
       setPendingPosts(posts)
-      setUsers(usersData)
     } catch (error) {
       console.error('Failed to fetch data:', error)
     } finally {
@@ -28,10 +94,19 @@ export default function AdminDashboard() {
     }
   }
 
+  const refreshStats = async () => {
+    try {
+      setStats(await adminApi.getStats(GROWTH_DAYS))
+    } catch (error) {
+      console.error('Failed to refresh stats:', error)
+    }
+  }
+
   const handleApprove = async (id: number) => {
     try {
       await adminApi.approvePost(id)
-      setPendingPosts(pendingPosts.filter(post => post.id !== id))
+      // The stats follow from the post.approved event
+      setPendingPosts(posts => posts.filter(post => post.id !== id))
     } catch (error) {
       console.error('Failed to approve post:', error)
       alert('Failed to approve post')
@@ -43,7 +118,7 @@ export default function AdminDashboard() {
     
     try {
       await adminApi.rejectPost(id)
-      setPendingPosts(pendingPosts.filter(post => post.id !== id))
+      setPendingPosts(posts => posts.filter(post => post.id !== id))
     } catch (error) {
       console.error('Failed to reject post:', error)
       alert('Failed to reject post')
@@ -54,6 +129,7 @@ export default function AdminDashboard() {
     try {
       const updatedUser = await adminApi.toggleUserActive(id)
       setUsers(users.map(user => user.id === id ? updatedUser : user))
+      refreshStats()
     } catch (error) {
       console.error('Failed to toggle user:', error)
       alert('Failed to update user')
@@ -78,6 +154,50 @@ export default function AdminDashboard() {
         <p className="text-gray-600">Manage posts and users</p>
       </div>
 
+      {stats && (
+        <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-4 gap-6 mb-8">
+          <div className="card">
+            <div className="flex items-center text-sm text-gray-500 mb-2">
+              <Users className="w-4 h-4 mr-2" />
+              Users
+            </div>
+            <div className="text-3xl font-bold text-gray-900">{stats.users}</div>
+            <div className="text-sm text-gray-500">{stats.active_users} active</div>
+          </div>
+          <div className="card">
+            <div className="flex items-center text-sm text-gray-500 mb-2">
+              <FileText className="w-4 h-4 mr-2" />
+              Posts
+            </div>
+            <div className="text-3xl font-bold text-gray-900">{stats.posts.approved}</div>
+            <div className="text-sm text-gray-500">
+              {stats.posts.pending} pending, {stats.posts.rejected} rejected
+            </div>
+          </div>
+          <div className="card">
+            <div className="flex items-center text-sm text-gray-500 mb-2">
+              <Mail className="w-4 h-4 mr-2" />
+              Subscribers
+            </div>
+            <div className="text-3xl font-bold text-gray-900">{stats.active_subscribers}</div>
+            <div className="text-sm text-gray-500">active</div>
+          </div>
+          <div className="card">
+            <div className="flex items-center text-sm text-gray-500 mb-2">
+              <Calendar className="w-4 h-4 mr-2" />
+              Last {GROWTH_DAYS} days
+            </div>
+            <div className="text-sm text-gray-700 space-y-1">
+              <div>+{stats.daily.reduce((total, day) => total + day.signups, 0)} signups</div>
+              <div>+{stats.daily.reduce((total, day) => total + day.posts, 0)} posts</div>
+              <div>
+                {stats.daily.reduce((total, day) => total + day.subscriptions - day.unsubscriptions, 0)} net subscribers
+              </div>
+            </div>
+          </div>
+        </div>
+      )}
+
       <div className="mb-6 border-b border-gray-200">
         <nav className="flex space-x-8">
           <button
@@ -88,7 +208,7 @@ export default function AdminDashboard() {
                 : 'border-transparent text-gray-500 hover:text-gray-700 hover:border-gray-300'
             }`}
           >
-            Pending Posts ({pendingPosts.length})
+            Pending Posts ({stats ? stats.posts.pending : pendingPosts.length})
           </button>
           <button
             onClick={() => setActiveTab('users')}
@@ -98,7 +218,7 @@ export default function AdminDashboard() {
                 : 'border-transparent text-gray-500 hover:text-gray-700 hover:border-gray-300'
             }`}
           >
-            Users ({users.length})
+            Users ({stats ? stats.users : users.length})
           </button>
         </nav>
       </div>
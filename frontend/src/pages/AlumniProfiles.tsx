@@ -1,5 +1,5 @@
 import { useEffect, useState } from 'react'
-import { alumniApi } from '../services/api'
+import { alumniApi, thumbnailUrl } from '../services/api'
 import { AlumniProfile } from '../types'
 import { User, Briefcase, GraduationCap, Building, Linkedin } from 'lucide-react'
 
@@ -48,9 +48,21 @@ export default function AlumniProfiles() {
             <div key={profile.id} className="card hover:shadow-lg transition-shadow">
               <div className="flex items-start space-x-4 mb-4">
                 <div className="flex-shrink-0">
-                  <div className="w-16 h-16 rounded-full bg-primary-100 flex items-center justify-center">
-                    <User className="w-8 h-8 text-primary-600" />
-                  </div>
+                  {thumbnailUrl(profile.profile_picture_thumbnails, 64) ? (
+                    <img
+                      src={thumbnailUrl(profile.profile_picture_thumbnails, 64)}
+                      alt=""
+                      width={64}
+                      height={64}
+                      loading="lazy"
+                      decoding="async"
+                      className="w-16 h-16 rounded-full object-cover"
+                    />
+                  ) : (
+                    <div className="w-16 h-16 rounded-full bg-primary-100 flex items-center justify-center">
+                      <User className="w-8 h-8 text-primary-600" />
+                    </div>
+                  )}
                 </div>
                 <div className="flex-1 min-w-0">
                   <h3 className="text-lg font-semibold text-gray-900 truncate">
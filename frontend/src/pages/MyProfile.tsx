@@ -1,9 +1,13 @@
 import { useEffect, useState } from 'react'
-import { alumniApi } from '../services/api'
+import { alumniApi, thumbnailUrl } from '../services/api'
 import { AlumniProfile } from '../types'
 import { useForm } from 'react-hook-form'
 import { User, Briefcase, GraduationCap, Building, Linkedin, Save } from 'lucide-react'
 
+const PICTURE_TYPES = 'image/jpeg,image/png,image/webp,image/gif'
+const PICTURE_POLL_MS = 1000
+const PICTURE_POLL_ATTEMPTS = 30
+
 export default function MyProfile() {
   const [profile, setProfile] = useState<AlumniProfile | null>(null)
   const [loading, setLoading] = useState(true)
@@ -11,6 +15,7 @@ export default function MyProfile() {
   const [saving, setSaving] = useState(false)
   const [error, setError] = useState('')
   const [success, setSuccess] = useState('')
+  const [pictureStatus, setPictureStatus] = useState<'' | 'uploading' | 'processing'>('')
 
   const { register, handleSubmit, reset } = useForm<Partial<AlumniProfile>>()
 
@@ -57,6 +62,47 @@ export default function MyProfile() {
     }
   }
 
+  const handlePictureChange = async (event: React.ChangeEvent<HTMLInputElement>) => {
+    const file = event.target.files?.[0]
+    event.target.value = ''
+    if (!file) return
+    try {
+      setError('')
+      setPictureStatus('uploading')
+      const upload = await alumniApi.uploadProfilePicture(file)
+      if (upload.status === 'ready') {
+        setProfile(await alumniApi.getMyProfile())
+        return
+      }
+      // Thumbnails are made in the background; the profile shows the picture once they exist
+      setPictureStatus('processing')
+      const [size, url] = Object.entries(upload.thumbnails)[0]
+      for (let attempt = 0; attempt < PICTURE_POLL_ATTEMPTS; attempt++) {
+        await new Promise(resolve => setTimeout(resolve, PICTURE_POLL_MS))
+        const data = await alumniApi.getMyProfile()
+        if (data.profile_picture_thumbnails?.[size] === url) {
+          setProfile(data)
+          return
+        }
+      }
+      setError('Your picture is still being processed; reload the page in a moment')
+    } catch (error: any) {
+      setError(error.response?.data?.detail || 'Failed to upload picture')
+    } finally {
+      setPictureStatus('')
+    }
+  }
+
+  const handlePictureRemove = async () => {
+    try {
+      setError('')
+      await alumniApi.deleteProfilePicture()
+      setProfile(profile && { ...profile, profile_picture_thumbnails: {} })
+    } catch (error: any) {
+      setError(error.response?.data?.detail || 'Failed to remove picture')
+    }
+  }
+
   if (loading) {
     return (
       <div className="flex items-center justify-center py-12">
@@ -91,11 +137,40 @@ export default function MyProfile() {
               <div>
                 <div className="flex items-start justify-between mb-6">
                   <div className="flex items-center space-x-4">
-                    <div className="w-20 h-20 rounded-full bg-primary-100 flex items-center justify-center">
-                      <User className="w-10 h-10 text-primary-600" />
-                    </div>
+                    {thumbnailUrl(profile.profile_picture_thumbnails, 80) ? (
+                      <img
+                        src={thumbnailUrl(profile.profile_picture_thumbnails, 80)}
+                        alt=""
+                        width={80}
+                        height={80}
+                        className="w-20 h-20 rounded-full object-cover"
+                      />
+                    ) : (
+                      <div className="w-20 h-20 rounded-full bg-primary-100 flex items-center justify-center">
+                        <User className="w-10 h-10 text-primary-600" />
+                      </div>
+                    )}
                     <div>
                       <h2 className="text-2xl font-bold text-gray-900">Your Profile</h2>
+                      <div className="flex items-center space-x-3 text-sm mt-1">
+                        {pictureStatus ? (
+                          <span className="text-gray-500">
+                            {pictureStatus === 'uploading' ? 'Uploading picture...' : 'Processing picture...'}
+                          </span>
+                        ) : (
+                          <>
+                            <label className="text-primary-600 hover:text-primary-700 cursor-pointer">
+                              Change picture
+                              <input type="file" accept={PICTURE_TYPES} onChange={handlePictureChange} className="hidden" />
+                            </label>
+                            {thumbnailUrl(profile.profile_picture_thumbnails, 80) && (
+                              <button onClick={handlePictureRemove} className="text-gray-500 hover:text-gray-700">
+                                Remove
+                              </button>
+                            )}
+                          </>
+                        )}
+                      </div>
                     </div>
                   </div>
                   <button
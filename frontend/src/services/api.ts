@@ -1,5 +1,5 @@
 import axios from 'axios'
-import { User, AlumniProfile, Post, LoginResponse } from '../types'
+import { User, AlumniProfile, Post, LoginResponse, AdminStats, ModerationEvent, ProfilePictureUpload } from '../types'
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
 
@@ -31,6 +31,15 @@ api.interceptors.response.use(
   }
 )
 
+// The smallest uploaded thumbnail covering `cssPixels` on this screen, as an absolute URL
+export const thumbnailUrl = (thumbnails: Record<string, string> | undefined, cssPixels: number): string | undefined => {
+  const sizes = Object.keys(thumbnails ?? {}).map(Number).sort((a, b) => a - b)
+  if (!thumbnails || sizes.length === 0) return undefined
+  const wanted = cssPixels * (window.devicePixelRatio || 1)
+  const size = sizes.find(each => each >= wanted) ?? sizes[sizes.length - 1]
+  return `${API_BASE_URL}${thumbnails[size]}`
+}
+
 export const authApi = {
   setToken: (token: string | null) => {
     if (token) {
@@ -81,6 +90,18 @@ export const alumniApi = {
     const response = await api.put<AlumniProfile>('/api/alumni/profile', data)
     return response.data
   },
+  
+  // The file itself is the request body, streamed by the browser rather than wrapped in a form
+  uploadProfilePicture: async (file: File): Promise<ProfilePictureUpload> => {
+    const response = await api.put<ProfilePictureUpload>('/api/alumni/profile/picture', file, {
+      headers: { 'Content-Type': file.type },
+    })
+    return response.data
+  },
+  
+  deleteProfilePicture: async (): Promise<void> => {
+    await api.delete('/api/alumni/profile/picture')
+  },
 }
 
 export const postsApi = {
@@ -115,6 +136,36 @@ export const postsApi = {
 }
 
 export const adminApi = {
+  getStats: async (days = 30): Promise<AdminStats> => {
+    const response = await api.get<AdminStats>('/api/admin/stats', { params: { days } })
+    return response.data
+  },
+  
+  // Server-Sent Events, read with fetch() because EventSource can't send the Authorization header.
+  // Resolves when the server ends the stream; rejects on network errors or an aborted signal.
+  streamModerationEvents: async (onEvent: (event: ModerationEvent) => void, signal: AbortSignal): Promise<void> => {
+    const response = await fetch(`${API_BASE_URL}/api/admin/posts/events`, {
+      headers: { Authorization: `Bearer ${localStorage.getItem('token')}`, Accept: 'text/event-stream' },
+      signal,
+    })
+    if (!response.ok || !response.body) {
+      throw new Error(`Event stream answered ${response.status}`)
+    }
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+    let buffer = ''
+    for (;;) {
+      const { value, done } = await reader.read()
+      if (done) return
+      buffer += value
+      const frames = buffer.split('\n\n')
+      buffer = frames.pop() ?? ''
+      for (const frame of frames) {
+        const data = frame.split('\n').find(line => line.startsWith('data: '))
+        if (data) onEvent(JSON.parse(data.slice(6)))
+      }
+    }
+  },
+  
   getPendingPosts: async (): Promise<Post[]> => {
     const response = await api.get<Post[]>('/api/admin/posts/pending')
     return response.data
@@ -20,11 +20,18 @@ export interface AlumniProfile {
   bio?: string
   linkedin_url?: string
   profile_picture_url?: string
+  // Uploaded picture: square thumbnail URL per edge in pixels; empty without one
+  profile_picture_thumbnails?: Record<string, string>
   created_at: string
   updated_at?: string
   user?: User
 }
 
+export interface ProfilePictureUpload {
+  status: 'ready' | 'processing'
+  thumbnails: Record<string, string>
+}
+
 export interface Post {
   id: number
   author_id: number
@@ -36,6 +43,37 @@ export interface Post {
   author?: User
 }
 
+export interface DailyGrowth {
+  day: string
+  signups: number
+  posts: number
+  subscriptions: number
+  unsubscriptions: number
+}
+
+export interface AdminStats {
+  users: number
+  active_users: number
+  posts: Record<PostStatus, number>
+  active_subscribers: number
+  daily: DailyGrowth[]
+}
+
+export type PostEventType = 'post.created' | 'post.approved' | 'post.rejected' | 'post.deleted'
+
+export type ModerationEvent =
+  | {
+      type: PostEventType
+      // The whole post for post.created; only id (and status) otherwise
+      post: Partial<Post> & { id: number }
+    }
+  | {
+      // One bulk approve/reject/delete; status is null when the posts were deleted
+      type: 'posts.bulk'
+      ids: number[]
+      status: PostStatus | null
+    }
+
 export interface LoginRequest {
   email: string
   password: string